@@ -9,13 +9,21 @@ load_dotenv()
 
 from backend.api import api  # Import your api blueprint
 from backend.wbot import GeminiBot
-from backend.messaging import messaging_bot  # Import for Telegram only
+from backend.session_cache import get_session_cache
+from backend.credentials import credential_stats
+from backend.scheduler import get_scheduler
+from backend.metrics import install as install_metrics
+from backend.profiling import install as install_profiling
 
 def create_app():
     app = Flask(__name__)
 
     with app.app_context():
         app.register_blueprint(api, url_prefix="/home/api")  # Register the api blueprint
+        # Stage and request latency histograms, scraped from /metrics
+        install_metrics(app)
+        # Opt-in cProfile of single requests (X-Profile-Token or PROFILE_SAMPLE_RATE)
+        install_profiling(app)
 
         @app.route("/")  # Add this route for the root URL
         def index():
@@ -55,6 +63,9 @@ def create_app():
                 if not chat_id or not message:
                     return jsonify({"error": "Missing 'chat_id' or 'message' parameter"}), 400
                 
+                # Telegram and its client library load on first use, not at startup
+                from backend.messaging import messaging_bot
+
                 success = messaging_bot.send_telegram_message(chat_id, message)
                 
                 if success:
@@ -66,10 +77,20 @@ def create_app():
                 print(f"Error sending Telegram message: {e}")
                 return jsonify({"status": "error", "message": str(e)}), 500
 
-        @app.after_request
-        def after_request(response):
-            request.get_data()
-            return response
+        @app.route("/metrics/sessions", methods=["GET"])
+        def session_metrics():
+            """Session cache hit rate, flush latency and memory use"""
+            return jsonify(get_session_cache().stats())
+
+        @app.route("/metrics/credentials", methods=["GET"])
+        def credential_metrics():
+            """Per-key request, error and cooldown counters (keys are masked)"""
+            return jsonify(credential_stats())
+
+        @app.route("/metrics/scheduler", methods=["GET"])
+        def scheduler_metrics():
+            """LLM slots in use and queue wait per priority"""
+            return jsonify(get_scheduler().stats())
 
     return app
 
@@ -77,8 +98,13 @@ app = create_app()
 
 def run_telegram_bot():
     """Run Telegram bot in a separate thread"""
+    if not os.getenv("TELEGRAM_BOT_TOKEN"):
+        print("⚠️ Telegram bot not configured - skipping")
+        return
     try:
         import asyncio
+        from backend.messaging import messaging_bot
+
         telegram_app = messaging_bot.setup_telegram_bot()
         if telegram_app:
             print("🤖 Starting Telegram bot...")
@@ -8,6 +8,7 @@ import os
 from flask import Flask, render_template, request, jsonify
 from dotenv import load_dotenv
 import google.generativeai as genai
+from backend.keyword_router import router
 
 # Load environment variables
 load_dotenv()
@@ -98,20 +99,20 @@ def api_response():
         "sentiment": sentiment
     })
 
+FALLBACK_RESPONSES = {
+    "greeting": "Hello! I'm AUDEXA, your mental health AI assistant. I'm here to help with support and guidance. How are you feeling today?",
+    "anxiety": "I understand you're feeling anxious. Take a deep breath. Here are some quick techniques: 4-7-8 breathing (inhale 4, hold 7, exhale 8), grounding (5 things you see, 4 you can touch, 3 you hear), and progressive muscle relaxation. What's making you feel anxious?",
+    "depression": "I'm sorry you're feeling down. It's okay to feel this way. You're not alone. Try to maintain basic self-care: eat regularly, get some sunlight, move your body gently, and reach out to someone you trust. What's been weighing on your mind?",
+    "sleep": "Sleep issues can really affect your well-being. Try establishing a consistent bedtime routine: no screens 1 hour before bed, cool dark room, same sleep/wake times daily, and relaxation techniques. What's keeping you up at night?",
+}
+
 def get_fallback_response(query):
     """Fallback responses when AI is not available"""
-    query_lower = query.lower()
-    
-    if any(word in query_lower for word in ['hello', 'hi', 'hey']):
-        return "Hello! I'm AUDEXA, your mental health AI assistant. I'm here to help with support and guidance. How are you feeling today?"
-    elif any(word in query_lower for word in ['anxiety', 'anxious', 'worried', 'stress']):
-        return "I understand you're feeling anxious. Take a deep breath. Here are some quick techniques: 4-7-8 breathing (inhale 4, hold 7, exhale 8), grounding (5 things you see, 4 you can touch, 3 you hear), and progressive muscle relaxation. What's making you feel anxious?"
-    elif any(word in query_lower for word in ['sad', 'depressed', 'down', 'hopeless']):
-        return "I'm sorry you're feeling down. It's okay to feel this way. You're not alone. Try to maintain basic self-care: eat regularly, get some sunlight, move your body gently, and reach out to someone you trust. What's been weighing on your mind?"
-    elif any(word in query_lower for word in ['sleep', 'insomnia', 'tired']):
-        return "Sleep issues can really affect your well-being. Try establishing a consistent bedtime routine: no screens 1 hour before bed, cool dark room, same sleep/wake times daily, and relaxation techniques. What's keeping you up at night?"
-    else:
-        return "I'm listening and here to help. Please tell me more about what's on your mind or how you're feeling. I can provide support for mental health, stress management, and general wellness."
+    return router.respond(
+        query,
+        FALLBACK_RESPONSES,
+        "I'm listening and here to help. Please tell me more about what's on your mind or how you're feeling. I can provide support for mental health, stress management, and general wellness."
+    )
 
 @app.route("/home/api/voice", methods=["POST"])
 def voice():
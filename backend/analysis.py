@@ -0,0 +1,206 @@
+"""
+Single-pass message analysis shared by every channel.
+A message is normalized and tokenized once, and everything downstream reads
+from the result: script, language, sentiment, crisis match and fallback
+intent. MessageAnalysis is immutable, and analyze_message() caches results
+by message text, so a message passed through several channels or retried is
+analyzed once.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import FrozenSet, Optional, Tuple
+
+from backend.crisis import CrisisMatch, detect_crisis_normalized, normalize_text
+from backend.keyword_router import TOKEN_PATTERN, router
+from backend.metrics import span
+
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "2048"))
+
+# Word lists for the fast sentiment estimate
+NEGATIVE_WORDS = {
+    'sad', 'depressed', 'anxious', 'worried', 'scared', 'angry', 'hopeless', 'lonely', 
+    'pain', 'suicidal', 'panic', 'stressed', 'overwhelmed', 'frustrated', 'tired', 
+    'exhausted', 'hurt', 'upset', 'crying', 'terrible', 'awful', 'hate', 'can\'t', 
+    'won\'t', 'never', 'always', 'everything', 'nothing', 'bad', 'horrible', 'worst',
+    'disappointed', 'annoyed', 'irritated', 'mad', 'furious', 'devastated', 'broken',
+    'empty', 'lost', 'confused', 'helpless', 'worthless', 'useless', 'failure',
+    'sick', 'ill', 'unwell', 'miserable', 'suffering', 'struggling', 'difficult', 'hard',
+    'impossible', 'can\'t handle', 'too much', 'overwhelming', 'nightmare', 'disaster'
+}
+
+POSITIVE_WORDS = {
+    'happy', 'better', 'good', 'great', 'excited', 'hopeful', 'proud', 'calm', 
+    'peaceful', 'motivated', 'confident', 'amazing', 'wonderful', 'fantastic', 
+    'love', 'enjoy', 'grateful', 'thankful', 'blessed', 'lucky', 'success', 
+    'accomplished', 'relieved', 'content', 'excellent', 'perfect', 'awesome',
+    'brilliant', 'outstanding', 'incredible', 'marvelous', 'delighted', 'thrilled',
+    'ecstatic', 'joyful', 'cheerful', 'optimistic', 'positive', 'energetic',
+    'refreshed', 'renewed', 'inspired', 'determined', 'focused', 'clear',
+    'satisfied', 'fulfilled', 'complete', 'whole', 'healthy', 'strong', 'powerful'
+}
+
+# Languages AUDEXA answers in, with the names used in model instructions
+LANGUAGE_NAMES = {
+    'en': 'English',
+    'hi': 'Hindi (हिन्दी)',
+    'bn': 'Bengali (বাংলা)',
+    'ta': 'Tamil (தமிழ்)',
+    'te': 'Telugu (తెలుగు)',
+    'mr': 'Marathi (मराठी)',
+    'gu': 'Gujarati (ગુજરાતી)',
+    'pa': 'Punjabi (ਪੰਜਾਬੀ)',
+    'kn': 'Kannada (ಕನ್ನಡ)',
+    'ml': 'Malayalam (മലയാളം)',
+    'ur': 'Urdu (اردو)',
+    'es': 'Spanish (Español)',
+    'fr': 'French (Français)',
+    'de': 'German (Deutsch)',
+    'it': 'Italian (Italiano)',
+    'pt': 'Portuguese (Português)',
+    'ru': 'Russian (Русский)',
+    'ja': 'Japanese (日本語)',
+    'ko': 'Korean (한국어)',
+    'zh': 'Chinese (中文)',
+    'ar': 'Arabic (العربية)'
+}
+
+# Words that identify a language, checked in this order before falling back to script
+LANGUAGE_INDICATORS = {
+    'hi': ['है', 'हूं', 'हैं', 'मैं', 'आप', 'कैसे', 'क्या', 'हैं', 'में', 'को', 'से', 'पर', 'के', 'का', 'की', 'हो', 'था', 'थी', 'थे'],
+    'bn': ['আমি', 'আপনি', 'কিভাবে', 'কি', 'হয়', 'এবং', 'বা', 'কিন্তু', 'যদি', 'তবে', 'হয়তো', 'নাকি', 'কেন', 'কখন', 'কোথায়'],
+    'ta': ['நான்', 'நீங்கள்', 'எப்படி', 'என்ன', 'ஆக', 'மற்றும்', 'அல்லது', 'ஆனால்', 'என்றால்', 'பின்னர்', 'ஒருவேளை', 'ஏன்', 'எப்போது', 'எங்கே'],
+    'te': ['నేను', 'మీరు', 'ఎలా', 'ఏమి', 'అవుతుంది', 'మరియు', 'లేదా', 'కానీ', 'అయితే', 'అప్పుడు', 'బహుశా', 'ఎందుకు', 'ఎప్పుడు', 'ఎక్కడ'],
+    'gu': ['હું', 'તમે', 'કેવી રીતે', 'શું', 'છે', 'અને', 'અથવા', 'પરંતુ', 'જો', 'તો', 'કદાચ', 'શા માટે', 'ક્યારે', 'ક્યાં'],
+    'pa': ['ਮੈਂ', 'ਤੁਸੀਂ', 'ਕਿਵੇਂ', 'ਕੀ', 'ਹੈ', 'ਅਤੇ', 'ਜਾਂ', 'ਪਰ', 'ਜੇ', 'ਤਾਂ', 'ਸ਼ਾਇਦ', 'ਕਿਉਂ', 'ਕਦੋਂ', 'ਕਿੱਥੇ'],
+    'kn': ['ನಾನು', 'ನೀವು', 'ಹೇಗೆ', 'ಏನು', 'ಆಗುತ್ತದೆ', 'ಮತ್ತು', 'ಅಥವಾ', 'ಆದರೆ', 'ಒಂದು ವೇಳೆ', 'ನಂತರ', 'ಬಹುಶಃ', 'ಏಕೆ', 'ಯಾವಾಗ', 'ಎಲ್ಲಿ'],
+    'ml': ['ഞാൻ', 'നിങ്ങൾ', 'എങ്ങനെ', 'എന്ത്', 'ആകുന്നു', 'ഒപ്പം', 'അല്ലെങ്കിൽ', 'പക്ഷേ', 'എങ്കിൽ', 'പിന്നെ', 'ഒരുപക്ഷേ', 'എന്തുകൊണ്ട്', 'എപ്പോൾ', 'എവിടെ'],
+    'ur': ['میں', 'آپ', 'کیسے', 'کیا', 'ہے', 'اور', 'یا', 'لیکن', 'اگر', 'تو', 'شاید', 'کیوں', 'کب', 'کہاں'],
+    'es': ['hola', 'gracias', 'por favor', 'sí', 'buenos', 'días', 'noche', 'cómo', 'estás', 'soy', 'tengo', 'quiero', 'necesito', 'ayuda'],
+    'fr': ['bonjour', 'merci', 's\'il vous plaît', 'oui', 'non', 'comment', 'allez-vous', 'je suis', 'j\'ai', 'je veux', 'j\'ai besoin', 'aide'],
+    'de': ['hallo', 'danke', 'bitte', 'ja', 'nein', 'wie', 'geht', 'es', 'ich bin', 'ich habe', 'ich will', 'ich brauche', 'hilfe'],
+    'it': ['ciao', 'grazie', 'per favore', 'sì', 'stai', 'sono', 'ho', 'voglio', 'ho bisogno', 'aiuto'],
+    'pt': ['olá', 'obrigado', 'por favor', 'sim', 'não', 'como', 'está', 'sou', 'tenho', 'quero', 'preciso', 'ajuda'],
+    'ru': ['привет', 'спасибо', 'пожалуйста', 'да', 'нет', 'как', 'дела', 'я', 'у меня', 'хочу', 'нужно', 'помощь'],
+    'ja': ['こんにちは', 'ありがとう', 'お願いします', 'はい', 'いいえ', 'どう', 'です', '私は', '持っています', '欲しい', '必要', '助け'],
+    'ko': ['안녕하세요', '감사합니다', '부탁드립니다', '네', '아니요', '어떻게', '입니다', '저는', '가지고', '원해요', '필요해요', '도움'],
+    'zh': ['你好', '谢谢', '请', '是', '不', '怎么', '是', '我', '有', '想要', '需要', '帮助'],
+    'ar': ['مرحبا', 'شكرا', 'من فضلك', 'نعم', 'لا', 'كيف', 'هو', 'أنا', 'لدي', 'أريد', 'أحتاج', 'مساعدة']
+}
+
+# Indicators that are also English words or common tokens ("es" in "es file", "sim card",
+# "ho ho", "ja" in names); on their own they are not evidence, two of one language are
+AMBIGUOUS_INDICATORS = frozenset({"es", "ja", "ho", "sim", "non", "comment", "aide", "soy"})
+
+# Script ranges in priority order: (language, script, first, last)
+SCRIPT_RANGES = (
+    ("hi", "devanagari", "\u0900", "\u097F"),
+    ("bn", "bengali", "\u0980", "\u09FF"),
+    ("ta", "tamil", "\u0B80", "\u0BFF"),
+    ("te", "telugu", "\u0C00", "\u0C7F"),
+    ("gu", "gujarati", "\u0A80", "\u0AFF"),
+    ("pa", "gurmukhi", "\u0A00", "\u0A7F"),
+    ("kn", "kannada", "\u0C80", "\u0CFF"),
+    ("ml", "malayalam", "\u0D00", "\u0D7F"),
+    ("ur", "arabic", "\u0600", "\u06FF"),
+    ("zh", "han", "\u4E00", "\u9FFF"),
+    ("ja", "kana", "\u3040", "\u30FF"),
+    ("ko", "hangul", "\uAC00", "\uD7AF"),
+    ("ru", "cyrillic", "\u0400", "\u04FF"),
+)
+# Every character of the scripts above; one findall collects them all
+_NON_LATIN = re.compile("[" + "".join(f"{first}-{last}" for _, _, first, last in SCRIPT_RANGES) + "]")
+
+
+def _compile_indicators():
+    """
+    Per language: single Latin words (looked up in the token set), the
+    ambiguous ones among them, Latin phrases (one whole-word regex) and
+    other-script indicators (substrings, since word boundaries are
+    unreliable around combining marks).
+    """
+    compiled = []
+    for language, indicators in LANGUAGE_INDICATORS.items():
+        latin = [i for i in indicators if i.isascii()]
+        single = frozenset(i for i in latin if TOKEN_PATTERN.fullmatch(i))
+        words = single - AMBIGUOUS_INDICATORS
+        weak = single & AMBIGUOUS_INDICATORS
+        phrases = [i for i in latin if i not in single]
+        phrase_re = re.compile(r"(?<!\w)(?:" + "|".join(map(re.escape, phrases)) + r")(?!\w)") if phrases else None
+        substrings = tuple(i for i in indicators if not i.isascii())
+        compiled.append((language, words, weak, phrase_re, substrings))
+    return compiled
+
+
+_INDICATORS = _compile_indicators()
+
+
+def _detect_script(text: str) -> Tuple[str, Optional[str]]:
+    """(script, language implied by script) for the highest-priority non-Latin script present"""
+    chars = set(_NON_LATIN.findall(text))
+    if chars:
+        for language, script, first, last in SCRIPT_RANGES:
+            if any(first <= ch <= last for ch in chars):
+                return script, language
+    return "latin", None
+
+
+def _detect_language(normalized: str, words: FrozenSet[str], script_language: Optional[str]) -> str:
+    for language, indicator_words, weak, phrase_re, substrings in _INDICATORS:
+        if not words.isdisjoint(indicator_words) or len(words & weak) >= 2:
+            return language
+        if phrase_re is not None and phrase_re.search(normalized):
+            return language
+        if any(s in normalized for s in substrings):
+            return language
+    return script_language or "en"
+
+
+class MessageAnalysis:
+    __slots__ = ("text", "normalized", "tokens", "words", "script", "language",
+                 "sentiment", "crisis", "intent")
+
+    def __init__(self, text: str, normalized: str, tokens: Tuple[str, ...], words: FrozenSet[str],
+                 script: str, language: str, sentiment: str, crisis: Optional[CrisisMatch], intent: Optional[str]):
+        for name, value in zip(self.__slots__, (text, normalized, tokens, words, script, language,
+                                                sentiment, crisis, intent)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MessageAnalysis is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("MessageAnalysis is immutable")
+
+    def __repr__(self):
+        return (f"MessageAnalysis(language={self.language!r}, script={self.script!r}, "
+                f"sentiment={self.sentiment!r}, crisis={self.crisis and self.crisis.category!r}, "
+                f"intent={self.intent!r}, tokens={len(self.tokens)})")
+
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+@span("analysis")  # language detection and lexicon sentiment; cache hits are not timed
+def analyze_message(text: str) -> MessageAnalysis:
+    """Normalize and tokenize `text` once and derive every per-message signal from that"""
+    text = text or ""
+    normalized = normalize_text(text)
+    tokens = tuple(TOKEN_PATTERN.findall(normalized))
+    words = frozenset(tokens)
+
+    negative = len(words & NEGATIVE_WORDS)
+    positive = len(words & POSITIVE_WORDS)
+    sentiment = "negative" if negative > positive else "positive" if positive > negative else "neutral"
+
+    script, script_language = _detect_script(normalized)
+    return MessageAnalysis(
+        text=text,
+        normalized=normalized,
+        tokens=tokens,
+        words=words,
+        script=script,
+        language=_detect_language(normalized, words, script_language),
+        sentiment=sentiment,
+        crisis=detect_crisis_normalized(normalized) if normalized else None,
+        intent=router.route_tokens(tokens),
+    )
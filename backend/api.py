@@ -1,47 +1,41 @@
+import importlib.util
+import io
 import re
 import os
-from flask import Blueprint, request, render_template
+import uuid
+from flask import Blueprint, request, render_template, jsonify
 from backend.config import Config
 from datetime import datetime
 from dotenv import load_dotenv
-import google.generativeai as genai
-
-# Optimized sentiment analysis with Cohere and enhanced fallback
-try:
-    import cohere  # type: ignore
-    from cohere.responses.classify import Example  # type: ignore
-    COHERE_AVAILABLE = True
-except Exception:
-    cohere = None  # type: ignore
-    COHERE_AVAILABLE = False
-
-    class Example:  # fallback shim to satisfy examples list construction
-        def __init__(self, text: str, label: str):
-            self.text = text
-            self.label = label
-
-# Pre-compiled word lists for faster sentiment analysis
-NEGATIVE_WORDS = {
-    'sad', 'depressed', 'anxious', 'worried', 'scared', 'angry', 'hopeless', 'lonely', 
-    'pain', 'suicidal', 'panic', 'stressed', 'overwhelmed', 'frustrated', 'tired', 
-    'exhausted', 'hurt', 'upset', 'crying', 'terrible', 'awful', 'hate', 'can\'t', 
-    'won\'t', 'never', 'always', 'everything', 'nothing', 'bad', 'horrible', 'worst',
-    'disappointed', 'annoyed', 'irritated', 'mad', 'furious', 'devastated', 'broken',
-    'empty', 'lost', 'confused', 'helpless', 'worthless', 'useless', 'failure',
-    'sick', 'ill', 'unwell', 'miserable', 'suffering', 'struggling', 'difficult', 'hard',
-    'impossible', 'can\'t handle', 'too much', 'overwhelming', 'nightmare', 'disaster'
-}
-
-POSITIVE_WORDS = {
-    'happy', 'better', 'good', 'great', 'excited', 'hopeful', 'proud', 'calm', 
-    'peaceful', 'motivated', 'confident', 'amazing', 'wonderful', 'fantastic', 
-    'love', 'enjoy', 'grateful', 'thankful', 'blessed', 'lucky', 'success', 
-    'accomplished', 'relieved', 'content', 'excellent', 'perfect', 'awesome',
-    'brilliant', 'outstanding', 'incredible', 'marvelous', 'delighted', 'thrilled',
-    'ecstatic', 'joyful', 'cheerful', 'optimistic', 'positive', 'energetic',
-    'refreshed', 'renewed', 'inspired', 'determined', 'focused', 'clear',
-    'satisfied', 'fulfilled', 'complete', 'whole', 'healthy', 'strong', 'powerful'
-}
+from backend.asr import whisper_available, transcribe
+from backend.session_cache import get_session_cache
+from backend.context import PromptContext, build_context
+from backend.credentials import get_credential_pool
+from backend.errors import MalformedResponse, ServiceNotConfigured, failure_reason
+from backend.faults import inject
+from backend.gemini import gemini_configured, generate_content, response_text
+from backend.scheduler import PRIORITY_NORMAL, classify_priority
+from backend.crisis import crisis_response
+from backend.analysis import LANGUAGE_NAMES, MessageAnalysis, analyze_message
+from backend.knowledge import direct_answer, get_knowledge_index, grounding_notes
+from backend.keyword_router import router
+from backend.fallback_catalog import FallbackCatalog
+from backend.metrics import bind_labels, label_in, span
+from backend.logs import begin_message, get_logger
+from backend.career_guidance import CAREER_SEARCH_LIMIT, career_guidance
+from backend.music import get_music_catalog
+from backend.tts import synthesize_mp3
+
+# Optimized sentiment analysis with Cohere and enhanced fallback.
+# The client is imported on the first classification, not at startup.
+COHERE_AVAILABLE = importlib.util.find_spec("cohere") is not None
+
+
+class Example:
+    """A labelled sentiment example; converted to cohere's Example when classifying"""
+    def __init__(self, text: str, label: str):
+        self.text = text
+        self.label = label
 
 api = Blueprint(
     "api",
@@ -51,36 +45,53 @@ api = Blueprint(
     static_url_path="/static",
 )
 
-# Initialize Cohere client with error handling
-cohere_client = None
+log = get_logger(__name__)
+
+# Cohere keys rotate through a credential pool (COHERE_API_KEYS and/or COHERE_API_KEY)
+cohere_pool = get_credential_pool("cohere")
+cohere_clients = {}
 if COHERE_AVAILABLE:
-    cohere_api_key = os.getenv("COHERE_API_KEY")
-    if cohere_api_key:
-        try:
-            cohere_client = cohere.Client(cohere_api_key)
-            print("✅ Cohere sentiment analysis initialized successfully")
-        except Exception as e:
-            print(f"⚠️ Cohere initialization failed: {e}")
-            cohere_client = None
+    if len(cohere_pool):
+        print(f"✅ Cohere sentiment analysis initialized with {len(cohere_pool)} key(s)")
     else:
         print("⚠️ COHERE_KEY not found in environment variables")
 else:
     print("⚠️ Cohere library not available, using fallback sentiment analysis")
 
+
+@span("sentiment")
+def cohere_classify(inputs: list, examples: list):
+    """Classify with the healthiest Cohere key, rotating on quota errors"""
+    import cohere  # type: ignore
+    from cohere.responses.classify import Example as CohereExample  # type: ignore
+
+    labelled = [CohereExample(e.text, e.label) for e in examples]
+
+    def attempt(api_key):
+        client = cohere_clients.get(api_key)
+        if client is None:
+            client = cohere_clients[api_key] = cohere.Client(api_key)
+        return inject("sentiment", client.classify, inputs=inputs, examples=labelled)
+
+    return cohere_pool.call(attempt)
+
+
+def cohere_sentiment(text: str):
+    """(prediction, confidence) for one message; raises MalformedResponse for an unreadable classification"""
+    result = cohere_classify([text], examples)
+    try:
+        classification = result[0]
+        prediction, confidence = classification.prediction, float(classification.confidence)
+    except (TypeError, IndexError, AttributeError, ValueError) as e:
+        raise MalformedResponse("sentiment", str(e)) from e
+    if not isinstance(prediction, str):
+        raise MalformedResponse("sentiment", f"prediction is {type(prediction).__name__}")
+    return prediction, confidence
+
+
 def analyze_sentiment_fast(text: str) -> str:
     """Fast sentiment analysis using pre-compiled word sets"""
-    text_lower = text.lower()
-    words = set(text_lower.split())
-    
-    negative_count = len(words.intersection(NEGATIVE_WORDS))
-    positive_count = len(words.intersection(POSITIVE_WORDS))
-    
-    if negative_count > positive_count:
-        return "negative"
-    elif positive_count > negative_count:
-        return "positive"
-    else:
-        return "neutral"
+    return analyze_message(text).sentiment
 
 def optimize_for_voice(text: str, max_length: int = 200) -> str:
     """Optimize text for faster voice response by shortening and making more conversational"""
@@ -145,122 +156,52 @@ def get_welcome_message(language: str = "en") -> str:
 
 def detect_language_from_text(text: str) -> str:
     """Enhanced language detection from text for auto-detection"""
-    text_lower = text.lower()
-    
-    # Check for specific language words first (more accurate)
-    language_indicators = {
-        'hi': ['है', 'हूं', 'हैं', 'मैं', 'आप', 'कैसे', 'क्या', 'हैं', 'में', 'को', 'से', 'पर', 'के', 'का', 'की', 'हो', 'था', 'थी', 'थे'],
-        'bn': ['আমি', 'আপনি', 'কিভাবে', 'কি', 'হয়', 'এবং', 'বা', 'কিন্তু', 'যদি', 'তবে', 'হয়তো', 'নাকি', 'কেন', 'কখন', 'কোথায়'],
-        'ta': ['நான்', 'நீங்கள்', 'எப்படி', 'என்ன', 'ஆக', 'மற்றும்', 'அல்லது', 'ஆனால்', 'என்றால்', 'பின்னர்', 'ஒருவேளை', 'ஏன்', 'எப்போது', 'எங்கே'],
-        'te': ['నేను', 'మీరు', 'ఎలా', 'ఏమి', 'అవుతుంది', 'మరియు', 'లేదా', 'కానీ', 'అయితే', 'అప్పుడు', 'బహుశా', 'ఎందుకు', 'ఎప్పుడు', 'ఎక్కడ'],
-        'gu': ['હું', 'તમે', 'કેવી રીતે', 'શું', 'છે', 'અને', 'અથવા', 'પરંતુ', 'જો', 'તો', 'કદાચ', 'શા માટે', 'ક્યારે', 'ક્યાં'],
-        'pa': ['ਮੈਂ', 'ਤੁਸੀਂ', 'ਕਿਵੇਂ', 'ਕੀ', 'ਹੈ', 'ਅਤੇ', 'ਜਾਂ', 'ਪਰ', 'ਜੇ', 'ਤਾਂ', 'ਸ਼ਾਇਦ', 'ਕਿਉਂ', 'ਕਦੋਂ', 'ਕਿੱਥੇ'],
-        'kn': ['ನಾನು', 'ನೀವು', 'ಹೇಗೆ', 'ಏನು', 'ಆಗುತ್ತದೆ', 'ಮತ್ತು', 'ಅಥವಾ', 'ಆದರೆ', 'ಒಂದು ವೇಳೆ', 'ನಂತರ', 'ಬಹುಶಃ', 'ಏಕೆ', 'ಯಾವಾಗ', 'ಎಲ್ಲಿ'],
-        'ml': ['ഞാൻ', 'നിങ്ങൾ', 'എങ്ങനെ', 'എന്ത്', 'ആകുന്നു', 'ഒപ്പം', 'അല്ലെങ്കിൽ', 'പക്ഷേ', 'എങ്കിൽ', 'പിന്നെ', 'ഒരുപക്ഷേ', 'എന്തുകൊണ്ട്', 'എപ്പോൾ', 'എവിടെ'],
-        'ur': ['میں', 'آپ', 'کیسے', 'کیا', 'ہے', 'اور', 'یا', 'لیکن', 'اگر', 'تو', 'شاید', 'کیوں', 'کب', 'کہاں'],
-        'es': ['hola', 'gracias', 'por favor', 'sí', 'no', 'buenos', 'días', 'noche', 'cómo', 'estás', 'soy', 'tengo', 'quiero', 'necesito', 'ayuda'],
-        'fr': ['bonjour', 'merci', 's\'il vous plaît', 'oui', 'non', 'comment', 'allez-vous', 'je suis', 'j\'ai', 'je veux', 'j\'ai besoin', 'aide'],
-        'de': ['hallo', 'danke', 'bitte', 'ja', 'nein', 'wie', 'geht', 'es', 'ich bin', 'ich habe', 'ich will', 'ich brauche', 'hilfe'],
-        'it': ['ciao', 'grazie', 'per favore', 'sì', 'no', 'come', 'stai', 'sono', 'ho', 'voglio', 'ho bisogno', 'aiuto'],
-        'pt': ['olá', 'obrigado', 'por favor', 'sim', 'não', 'como', 'está', 'sou', 'tenho', 'quero', 'preciso', 'ajuda'],
-        'ru': ['привет', 'спасибо', 'пожалуйста', 'да', 'нет', 'как', 'дела', 'я', 'у меня', 'хочу', 'нужно', 'помощь'],
-        'ja': ['こんにちは', 'ありがとう', 'お願いします', 'はい', 'いいえ', 'どう', 'です', '私は', '持っています', '欲しい', '必要', '助け'],
-        'ko': ['안녕하세요', '감사합니다', '부탁드립니다', '네', '아니요', '어떻게', '입니다', '저는', '가지고', '원해요', '필요해요', '도움'],
-        'zh': ['你好', '谢谢', '请', '是', '不', '怎么', '是', '我', '有', '想要', '需要', '帮助'],
-        'ar': ['مرحبا', 'شكرا', 'من فضلك', 'نعم', 'لا', 'كيف', 'هو', 'أنا', 'لدي', 'أريد', 'أحتاج', 'مساعدة']
-    }
-    
-    # Check for language indicators
-    for lang_code, indicators in language_indicators.items():
-        if any(indicator in text_lower for indicator in indicators):
-            return lang_code
-    
-    # Fallback to script-based detection
-    if any('\u0900' <= char <= '\u097F' for char in text):  # Devanagari
-        return 'hi'
-    elif any('\u0980' <= char <= '\u09FF' for char in text):  # Bengali
-        return 'bn'
-    elif any('\u0B80' <= char <= '\u0BFF' for char in text):  # Tamil
-        return 'ta'
-    elif any('\u0C00' <= char <= '\u0C7F' for char in text):  # Telugu
-        return 'te'
-    elif any('\u0A80' <= char <= '\u0AFF' for char in text):  # Gujarati
-        return 'gu'
-    elif any('\u0A00' <= char <= '\u0A7F' for char in text):  # Gurmukhi (Punjabi)
-        return 'pa'
-    elif any('\u0C80' <= char <= '\u0CFF' for char in text):  # Kannada
-        return 'kn'
-    elif any('\u0D00' <= char <= '\u0D7F' for char in text):  # Malayalam
-        return 'ml'
-    elif any('\u0600' <= char <= '\u06FF' for char in text):  # Arabic/Persian/Urdu
-        return 'ur'
-    elif any('\u4E00' <= char <= '\u9FFF' for char in text):  # Chinese
-        return 'zh'
-    elif any('\u3040' <= char <= '\u309F' or '\u30A0' <= char <= '\u30FF' for char in text):  # Japanese
-        return 'ja'
-    elif any('\uAC00' <= char <= '\uD7AF' for char in text):  # Korean
-        return 'ko'
-    elif any('\u0400' <= char <= '\u04FF' for char in text):  # Cyrillic (Russian)
-        return 'ru'
-    else:
-        return 'en'  # Default to English
-
-def get_gemini_response(query: str, messages: list) -> str:
-    """Optimized Gemini response generation with faster processing"""
-    # Configure on demand so updated .env is respected even after reloads
-    api_key = Config.GEMINI_KEY or os.getenv("GEMINI_KEY")
-    if not api_key:
-        return "I apologize, but the Gemini API key is not configured. Please set GEMINI_KEY to use Google Gemini."
-    
-    try:
-        genai.configure(api_key=api_key)
-        
-        # Optimized system prompt for faster processing
-        system_prefix = (
-            "You are AUDEXA, a compassionate mental health AI assistant. "
-            "Provide helpful, evidence-based guidance. Be warm and supportive."
-        )
-        
-        # Build conversation history more efficiently
-        history_parts = []
-        for m in messages[-3:]:  # Only use last 3 messages for faster processing
-            role = m.get("role")
-            content = m.get("content")
-            if role and content:
-                history_parts.append(f"{role.upper()}: {content}")
-        
-        history_text = "\n".join(history_parts) if history_parts else ""
-        full_prompt = f"{system_prefix}\n\n{history_text}\n\nUSER: {query}\nASSISTANT:"
-
-        # Use working model configuration
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        result = model.generate_content(
-            full_prompt,
-            generation_config=genai.types.GenerationConfig(
-                max_output_tokens=1000,  # Limit response length for faster processing
-                temperature=0.7,
-                top_p=0.8,
-                top_k=40
-            )
-        )
-        
-        response_text = getattr(result, "text", "") or ""
-        print(f"✅ Gemini response generated successfully ({len(response_text)} chars)")
-        return response_text
-        
-    except Exception as e:
-        error_msg = str(e)
-        print(f"❌ Gemini API error: {error_msg}")
-        
-        # Optimized error handling with specific messages
-        if "quota" in error_msg.lower() or "429" in error_msg or "ResourceExhausted" in error_msg:
-            return "I'm currently experiencing high demand and my AI quota has been reached for today. I'm still here to help with my fallback responses! What's on your mind?"
-        elif "api key" in error_msg.lower() or "authentication" in error_msg.lower() or "expired" in error_msg.lower():
-            return "I'm having trouble with my AI service right now. Let me help you with my built-in responses instead!"
-        else:
-            return "I'm experiencing some technical difficulties with my AI service. I'm still here to help with my fallback responses! What can I assist you with?"
+    return analyze_message(text).language
 
 
+GEMINI_SYSTEM_PREFIX = (
+    "You are AUDEXA, a compassionate mental health AI assistant. "
+    "Provide helpful, evidence-based guidance. Be warm and supportive."
+)
+
+
+def build_gemini_context(query: str, messages: list, session=None, notes: str = "") -> PromptContext:
+    """Fit system messages, guide snippets, summary and the newest turns into the prompt token budget"""
+    system_prompt = "\n".join(
+        [GEMINI_SYSTEM_PREFIX] + [m["content"] for m in messages if m.get("role") == "system" and m.get("content")]
+    )
+    history = [m for m in messages if m.get("role") != "system"]
+    if session is None:
+        return build_context(system_prompt, history, query, notes=notes)
+    return build_context(system_prompt, history, query, session.summary,
+                         session.summary_upto, session.first_index, notes=notes)
+
+
+def get_gemini_response(query: str, messages: list, context: PromptContext = None,
+                        priority: int = PRIORITY_NORMAL) -> str:
+    """Gemini's answer; failures are raised as typed errors, see backend.errors.failure_reason"""
+    if not gemini_configured():
+        raise ServiceNotConfigured("llm", "set GEMINI_KEY to use Google Gemini")
+
+    # Newest turns within the token budget, older ones as a rolling summary
+    if context is None:
+        context = build_gemini_context(query, messages)
+
+    result = generate_content(
+        context.prompt,
+        "gemini-2.0-flash",
+        priority=priority,
+        # A plain dict, so this module never needs google.generativeai itself
+        generation_config=dict(
+            max_output_tokens=1000,  # Limit response length for faster processing
+            temperature=0.7,
+            top_p=0.8,
+            top_k=40
+        )
+    )
+    answer = response_text(result)
+    log.info("Gemini response", chars=len(answer))
+    return answer
 
 
 examples = [
@@ -316,8 +257,22 @@ examples = [
     Example("How can I prevent this?", "neutral"),
 ]
 
+WEB_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a compassionate medical chatbot here to provide support and accurate advice for health concerns. Your main goal is to offer helpful advice to users seeking assistance with their medical queries. If urgent or severe, advise seeking immediate medical help. Remember, your name is AUDEXA. Now, please answer my question:",
+}
+
+# Longest chat message accepted by the conversation API
+MAX_MESSAGE_CHARS = 4000
+# Only ids issued by create_conversation are accepted; the prefix keeps web conversations apart
+# from the Telegram and WhatsApp sessions that share the session store
+WEB_CONVERSATION_PREFIX = "web-"
+CONVERSATION_ID_RE = re.compile(rf"^{WEB_CONVERSATION_PREFIX}[0-9a-f]{{32}}$")
+
+
 @api.route("/response")
 def response():
+    """Legacy endpoint: the client re-sends the whole history in the query string"""
     query = request.args.get("msg")
     questions = request.args.get("questions")
     answers = request.args.get("answers")
@@ -326,29 +281,82 @@ def response():
     questions = questions.split("|")[:-2]
     answers = answers.split("|")[:-1]
 
-    messages = [
-        {
-            "role": "system",
-            "content": "You are a compassionate medical chatbot here to provide support and accurate advice for health concerns. Your main goal is to offer helpful advice to users seeking assistance with their medical queries. If urgent or severe, advise seeking immediate medical help. Remember, your name is AUDEXA. Now, please answer my question:",
-        }
-    ]
+    messages = [WEB_SYSTEM_MESSAGE]
     for question, answer in zip(questions, answers):
         messages.append({"role": "user", "content": question})
         messages.append({"role": "assistant", "content": answer})
 
+    return generate_reply(query, messages, lang)
+
+
+@api.route("/conversations", methods=["POST"])
+def create_conversation():
+    """Start a server-side conversation; the client only keeps the returned id"""
+    data = request.get_json(silent=True) or {}
+    language = data.get("language", "auto")
+    conversation_id = f"{WEB_CONVERSATION_PREFIX}{uuid.uuid4().hex}"
+    get_session_cache().get(conversation_id, language if language != "auto" else "en")
+    return jsonify({"conversation_id": conversation_id}), 201
+
+
+@api.route("/conversations/<conversation_id>/messages", methods=["POST"])
+def conversation_message(conversation_id):
+    """Answer one new message; history stays on the server under the conversation id"""
+    if not CONVERSATION_ID_RE.match(conversation_id):
+        return jsonify({"error": "Invalid conversation id"}), 400
+
+    data = request.get_json(silent=True) or {}
+    query = (data.get("msg") or "").strip()
+    lang = data.get("language") or data.get("lang") or "auto"
+    if not query:
+        return jsonify({"error": "No message provided"}), 400
+    if len(query) > MAX_MESSAGE_CHARS:
+        return jsonify({"error": f"Message is longer than {MAX_MESSAGE_CHARS} characters"}), 413
+
+    cache = get_session_cache()
+    session = cache.get(conversation_id, create=False)
+    if session is None:
+        return jsonify({"error": "Unknown conversation"}), 404
+
+    reply = generate_reply(query, [WEB_SYSTEM_MESSAGE] + list(session.log), lang, session)
+    cache.append(session, [
+        {"role": "user", "content": query},
+        {"role": "assistant", "content": reply["answer"]},
+    ])
+
+    reply["conversation_id"] = conversation_id
+    return jsonify(reply)
+
+
+def generate_reply(query: str, messages: list, lang: str = "auto", session=None) -> dict:
+    """Sentiment, language handling, Gemini answer and fallback for one user message"""
+    begin_message()
     # Get the user's message
     user_message = query
 
+    analysis = analyze_message(query)
+
+    # Crisis fast path: answer locally before any sentiment or model call
+    crisis = analysis.crisis
+    if crisis and crisis.acute:
+        answer = crisis_response(crisis, lang)
+        log.warning("Crisis fast path", category=crisis.category, language=crisis.language)
+        return {
+            "answer": answer,
+            "voice_answer": optimize_for_voice(answer),
+            "popup_message": "💙 You're not alone. Please reach out to one of the helplines below right now.",
+            "sentiment": "negative",
+            "crisis": crisis.category,
+            "context_tokens": 0
+        }
+
     # Optimized sentiment analysis - try Cohere first, fallback to fast analysis
     sentiment_label = "neutral"
     
-    if cohere_client:
+    if COHERE_AVAILABLE and len(cohere_pool):
         try:
             # Use Cohere for more accurate sentiment analysis
-            sentiment_response = cohere_client.classify(inputs=[user_message], examples=examples)
-            classification_result = sentiment_response[0]
-            sentiment_prediction = classification_result.prediction
-            sentiment_confidence = classification_result.confidence
+            sentiment_prediction, sentiment_confidence = cohere_sentiment(user_message)
             
             # Use prediction if confidence is high enough
             if sentiment_confidence > 0.3:
@@ -358,83 +366,79 @@ def response():
                     sentiment_label = "negative"
                 else:
                     sentiment_label = "neutral"
-                print(f"✅ Cohere sentiment: {sentiment_label} (confidence: {sentiment_confidence:.2f})")
+                log.debug("Cohere sentiment", sentiment=sentiment_label, confidence=round(sentiment_confidence, 2))
             else:
                 # Low confidence, use fast fallback
-                sentiment_label = analyze_sentiment_fast(user_message)
-                print(f"⚠️ Low Cohere confidence, using fast analysis: {sentiment_label}")
+                sentiment_label = analysis.sentiment
+                log.debug("Low Cohere confidence, using fast analysis", sentiment=sentiment_label)
                 
         except Exception as e:
             # Cohere failed, use fast fallback
-            sentiment_label = analyze_sentiment_fast(user_message)
-            print(f"⚠️ Cohere failed ({e}), using fast analysis: {sentiment_label}")
+            sentiment_label = analysis.sentiment
+            log.warning("Cohere failed, using fast analysis", reason=failure_reason(e), error=str(e),
+                        sentiment=sentiment_label)
     else:
         # No Cohere client, use fast analysis
-        sentiment_label = analyze_sentiment_fast(user_message)
-        print(f"⚡ Fast sentiment analysis: {sentiment_label}")
+        sentiment_label = analysis.sentiment
+        log.debug("Fast sentiment analysis", sentiment=sentiment_label)
 
     # Get Gemini response
     answer = ""
-    print(f"User query: {query}")
+    context = None
+    fallback_reason = None
+    log.debug("User query", query=query)
+
+    # Built-in guides: a close match is the answer, otherwise the best sections ground the prompt
+    # (the guides are English, so a close match already implies an English query)
+    reply_lang = lang if lang and lang != "auto" else analysis.language
+    # lang comes from the client; any code outside LANGUAGE_NAMES would start a new series
+    bind_labels(language=label_in(reply_lang, LANGUAGE_NAMES))
+    hits = get_knowledge_index().search(query, tokens=analysis.tokens)
+    direct = direct_answer(hits) if lang in (None, "", "auto", "en") else None
+    if direct:
+        log.info("Answered from local guide", title=hits[0].document.title, score=round(hits[0].score, 2))
+        return {
+            "answer": direct,
+            "voice_answer": optimize_for_voice(direct),
+            "popup_message": "📚 Here's a guide from AUDEXA's built-in resources. Ask me anything to go deeper.",
+            "sentiment": sentiment_label,
+            "knowledge": hits[0].document.title,
+            "context_tokens": 0
+        }
     
     try:
-        print("Attempting Gemini response...")
         lang_note = ""
-        # Enhanced language mapping for better AI understanding
-        lang_map = {
-            'en': 'English',
-            'hi': 'Hindi (हिन्दी)',
-            'bn': 'Bengali (বাংলা)',
-            'ta': 'Tamil (தமிழ்)',
-            'te': 'Telugu (తెలుగు)',
-            'mr': 'Marathi (मराठी)',
-            'gu': 'Gujarati (ગુજરાતી)',
-            'pa': 'Punjabi (ਪੰਜਾਬੀ)',
-            'kn': 'Kannada (ಕನ್ನಡ)',
-            'ml': 'Malayalam (മലയാളം)',
-            'ur': 'Urdu (اردو)',
-            'es': 'Spanish (Español)',
-            'fr': 'French (Français)',
-            'de': 'German (Deutsch)',
-            'it': 'Italian (Italiano)',
-            'pt': 'Portuguese (Português)',
-            'ru': 'Russian (Русский)',
-            'ja': 'Japanese (日本語)',
-            'ko': 'Korean (한국어)',
-            'zh': 'Chinese (中文)',
-            'ar': 'Arabic (العربية)'
-        }
         
         if lang and lang != "auto":
-            lang_name = lang_map.get(lang, lang)
+            lang_name = LANGUAGE_NAMES.get(lang, lang)
             lang_note = f" IMPORTANT: Respond ONLY in {lang_name}. Do not use English. Keep your response to 2-3 sentences maximum, be warm and conversational, and always end with a follow-up question or encouragement in {lang_name}."
         else:
-            # Auto-detect language from the query
-            detected_lang = detect_language_from_text(query)
-            print(f"Auto-detected language: {detected_lang}")
+            # Auto-detected from the query above
+            detected_lang = reply_lang
+            log.debug("Auto-detected language", language=detected_lang)
             if detected_lang != 'en':
-                lang_name = lang_map.get(detected_lang, detected_lang)
+                lang_name = LANGUAGE_NAMES.get(detected_lang, detected_lang)
                 lang_note = f" IMPORTANT: I detected this message is in {lang_name}. Respond ONLY in {lang_name}. Do not use English. Keep your response to 2-3 sentences maximum, be warm and conversational, and always end with a follow-up question or encouragement in {lang_name}."
             else:
                 lang_note = " Respond in English. Keep your response to 2-3 sentences maximum, be warm and conversational, and always end with a follow-up question or encouragement."
         
-        answer = get_gemini_response(query + lang_note, messages)
+        context = build_gemini_context(query + lang_note, messages, session, grounding_notes(hits))
+        log.debug("Prompt context", tokens=context.tokens, history_messages=context.history_messages)
+        if session is not None and context.summary_upto > session.summary_upto:
+            get_session_cache().update_summary(session, context.summary, context.summary_upto)
+        # Distressed users jump the queue for model capacity
+        priority = classify_priority(analysis, sentiment_label)
+        answer = get_gemini_response(query + lang_note, messages, context, priority)
     except Exception as e:
-        print(f"AI model failed: {e}")
-        # Use fallback response when AI models fail
-        answer = get_fallback_response(query)
-    
-    # If we still don't have an answer, use fallback
-    if not answer or "error" in answer.lower() or "unable" in answer.lower() or "quota" in answer.lower() or "credit" in answer.lower():
-        print("Using fallback response due to AI model issues")
-        answer = get_fallback_response(query)
+        # Chosen by the kind of failure, never by the wording of the answer
+        fallback_reason = failure_reason(e)
+        log.warning("AI model failed, using fallback response", reason=fallback_reason, error=str(e))
+        answer = get_fallback_response(query, reply_lang, analysis)
     
     # Optimize answer for voice response if needed
     voice_optimized_answer = optimize_for_voice(answer) if answer else ""
     
-    print(f"Final answer length: {len(answer) if answer else 0}")
-    print(f"Voice optimized length: {len(voice_optimized_answer)}")
-    print(f"Answer preview: {answer[:100] if answer else 'None'}...")
+    log.debug("Answer", answer=answer or "", voice_chars=len(voice_optimized_answer))
 
     # Create a popup message based on sentiment
     if sentiment_label == "positive":
@@ -445,17 +449,75 @@ def response():
         popup_message = f"ℹ️ I'm here to help with whatever you need. Let's work together on your health and wellness goals."
     
     # Add fallback system notification if AI models are unavailable
-    if "error" in answer.lower() or "unable" in answer.lower() or "quota" in answer.lower() or "credit" in answer.lower():
+    if fallback_reason:
         popup_message += "\n\n⚠️ Note: AI models are currently unavailable. You're receiving responses from AUDEXA's fallback system with pre-programmed medical guidance."
 
-    return {
+    reply = {
         "answer": answer,
         "voice_answer": voice_optimized_answer,  # Optimized version for voice
         "popup_message": popup_message,
-        "sentiment": sentiment_label
+        "sentiment": sentiment_label,
+        "context_tokens": context.tokens if context else 0
     }
+    if fallback_reason:
+        reply["fallback"] = fallback_reason
+    return reply
+
 
 
+MAX_CAREER_QUERY_CHARS = 200
+
+
+@api.route("/career/search", methods=["GET"])
+def career_search():
+    """Roles matching ?q= by word, prefix or near-miss spelling, filtered by industry, skill and salary band"""
+    query = (request.args.get("q") or "").strip()
+    filters = {name: request.args.get(name) for name in ("industry", "skill", "band")}
+    if not query and not any(filters.values()):
+        return jsonify({"error": "Provide q or a filter (industry, skill, band)"}), 400
+    if len(query) > MAX_CAREER_QUERY_CHARS:
+        return jsonify({"error": f"Query is longer than {MAX_CAREER_QUERY_CHARS} characters"}), 400
+    try:
+        limit = max(1, min(int(request.args.get("limit", 10)), CAREER_SEARCH_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
+    bands = career_guidance.salary_bands
+    if filters["band"] and filters["band"] not in bands:
+        return jsonify({"error": f"Unknown band, expected one of: {', '.join(bands)}"}), 400
+
+    matches = career_guidance.search_roles(query, limit=limit, **filters)
+    return jsonify({"query": query, "filters": filters, "results": [m.to_dict() for m in matches]})
+
+
+MAX_MUSIC_TRACKS = 10
+
+
+@api.route("/music/recommendations", methods=["GET"])
+def music_recommendations():
+    """Tracks for ?mood= (or one per mood without it), not repeated within ?conversation_id="""
+    catalog = get_music_catalog()
+    mood = request.args.get("mood") or None
+    energy = request.args.get("energy") or None
+    language = request.args.get("language") or request.args.get("lang")
+    conversation_id = request.args.get("conversation_id") or None
+    if mood is not None and mood not in catalog.moods:
+        return jsonify({"error": f"Unknown mood, expected one of: {', '.join(catalog.moods)}"}), 400
+    if energy is not None and energy not in catalog.energy_levels:
+        return jsonify({"error": f"Unknown energy, expected one of: {', '.join(catalog.energy_levels)}"}), 400
+    if conversation_id is not None and not CONVERSATION_ID_RE.match(conversation_id):
+        return jsonify({"error": "Invalid conversation id"}), 400
+    try:
+        limit = max(1, min(int(request.args.get("limit", 3)), MAX_MUSIC_TRACKS))
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
+    if language in (None, "", "auto"):
+        language = None
+
+    if mood is None:
+        tracks = [dict(track.to_dict(), note=note) for track, note in catalog.mix(language, conversation_id)]
+    else:
+        tracks = [t.to_dict() for t in catalog.recommend(mood, language, energy, conversation_id, k=limit)]
+    return jsonify({"mood": mood, "tracks": tracks})
 
 
 @api.route("/test_mic", methods=["GET"])
@@ -465,15 +527,11 @@ def test_mic():
 
 @api.route("/voice", methods=["POST"])
 def voice():
-    # Lazy import to avoid heavy dependency at app startup
-    try:
-        import whisper  # type: ignore
-    except ImportError:
+    begin_message()
+    if not whisper_available():
         return "Speech-to-text is unavailable: whisper is not installed on the server."
 
     try:
-        DEVICE = "cpu"
-        
         # Check if audio file is provided
         if "audio_data" not in request.files:
             return "No audio file provided"
@@ -490,16 +548,15 @@ def voice():
         
         # Check file size and content
         file_size = os.path.getsize(audio_filename)
-        print(f"Audio file saved: {audio_filename}, size: {file_size} bytes")
+        log.debug("Audio file saved", file=audio_filename, bytes=file_size)
         
         if file_size < 800:  # Less than ~0.8KB
-            print("Warning: Audio file seems too small, might be empty or corrupted")
+            log.warning("Audio file seems too small", bytes=file_size)
             return "Audio recording too short or empty. Please speak clearly for at least 2-3 seconds and ensure your microphone is working."
         
         # Convert audio to WAV for better Whisper compatibility
         try:
             from pydub import AudioSegment
-            print(f"Converting {audio_filename} to WAV format...")
             
             # Detect file format from extension
             file_extension = audio_filename.split('.')[-1].lower()
@@ -510,55 +567,44 @@ def voice():
                 audio = AudioSegment.from_file(audio_filename)
             
             # Analyze audio properties
-            print(f"Audio duration: {len(audio)}ms")
-            print(f"Audio frame rate: {audio.frame_rate}Hz")
-            print(f"Audio channels: {audio.channels}")
-            print(f"Audio sample width: {audio.sample_width} bytes")
-            print(f"Audio volume: {audio.dBFS:.1f} dBFS")
+            log.debug("Audio decoded", duration_ms=len(audio), frame_rate=audio.frame_rate, channels=audio.channels,
+                      sample_width=audio.sample_width, dbfs=round(audio.dBFS, 1))
             
             # Check if audio is too short
             if len(audio) < 700:  # Less than ~0.7 second
-                print("Audio too short for reliable transcription")
+                log.info("Audio too short for reliable transcription", duration_ms=len(audio))
                 return "Audio recording too short. Please speak for at least 2-3 seconds."
             
             # Check if audio is too quiet (likely silence) - adjusted threshold
             if audio.dBFS < -70 or audio.dBFS == float('-inf'):
-                print("Audio too quiet or no audio detected")
+                log.info("Audio too quiet or no audio detected", dbfs=audio.dBFS)
                 return "No speech detected. Please check:\n1. Microphone permissions are granted\n2. Microphone is not muted\n3. Speak louder and closer to microphone\n4. Try using the 'Browser STT' button instead"
             
             # Normalize audio volume if it's too quiet - more aggressive normalization
             if audio.dBFS < -35:
-                print(f"Audio is quiet ({audio.dBFS:.1f} dBFS), normalizing...")
                 # More aggressive volume boost for quiet audio
                 volume_boost = min(45, max(25, -audio.dBFS - 15))  # Dynamic boost based on current volume
                 audio = audio + volume_boost
-                print(f"Applied {volume_boost}dB boost, new volume: {audio.dBFS:.1f} dBFS")
+                log.debug("Quiet audio boosted", boost_db=volume_boost, dbfs=round(audio.dBFS, 1))
             
             wav_filename = audio_filename.rsplit('.', 1)[0] + '.wav'
             audio.export(wav_filename, format="wav", parameters=["-ar", "16000", "-ac", "1"])
-            print(f"Converted to {wav_filename}")
             
             # Use the WAV file for transcription
             audio_filename = wav_filename
         except Exception as conversion_error:
-            print(f"Audio conversion failed: Decoding failed. ffmpeg returned error code: 3199971767")
-            print(f"Output from ffmpeg/avlib:\n{conversion_error}")
+            log.warning("Audio conversion failed", error=str(conversion_error))
             # Check if it's a file format issue
             if "Invalid data" in str(conversion_error) or "EBML header parsing failed" in str(conversion_error):
                 return "Audio file appears to be corrupted. Please try recording again with a clear voice."
             # Continue with original file if conversion fails
         
-        # Try to load whisper model
-        model = whisper.load_model("base", device=DEVICE)
-        print("Whisper model loaded successfully")
-        
         # Initialize transcribed_text variable
         transcribed_text = ""
         
         # Try to transcribe the audio with FFmpeg workaround
         try:
             # First try normal transcription with optimized parameters for quiet audio
-            print("Attempting normal transcription...")
             # Enhanced language support for speech-to-text
             lang = request.form.get("language", "auto")
             
@@ -590,12 +636,10 @@ def voice():
             if lang == "auto":
                 # For auto-detection, let Whisper handle it
                 whisper_lang = None
-                print("Using Whisper auto-detection for language")
             else:
                 whisper_lang = whisper_lang_map.get(lang, lang)
-                print(f"Using specified language for Whisper: {whisper_lang}")
             
-            print(f"Language parameter: {lang}, Whisper language: {whisper_lang if whisper_lang else 'auto-detect'}")
+            log.debug("Whisper language", lang=lang, whisper_lang=whisper_lang or "auto")
             
             task_kwargs = {
                 "language": whisper_lang,
@@ -607,36 +651,28 @@ def voice():
                 "logprob_threshold": -1.0,
                 "no_speech_threshold": 0.3  # More lenient for multilingual speech
             }
-            result = model.transcribe(
+            result = transcribe(
                 audio_filename,
                 **task_kwargs
             )
-            print(f"Transcription result type: {type(result)}")
-            print(f"Transcription result keys: {result.keys() if hasattr(result, 'keys') else 'No keys'}")
-            print(f"Transcription result: {result}")
             transcribed_text = result.get("text", "")
-            print(f"Transcription successful: {transcribed_text[:50] if transcribed_text else 'Empty text'}...")
+            log.debug("Transcription", transcript=transcribed_text, segments=len(result.get("segments") or ()))
         except Exception as transcribe_error:
-            print(f"Normal transcription failed: {transcribe_error}")
+            log.warning("Transcription failed", error=str(transcribe_error))
             # If FFmpeg is missing, try to work around it
             if "FileNotFoundError" in str(transcribe_error) or "WinError 2" in str(transcribe_error):
                 try:
-                    print("Trying librosa fallback...")
                     # Try to use whisper with a different approach
                     import numpy as np
                     import librosa
                     
                     # Load audio with librosa instead of FFmpeg
                     audio_data, sr = librosa.load(audio_filename, sr=16000)
-                    print(f"Audio loaded with librosa: {len(audio_data)} samples at {sr}Hz")
-                    result = model.transcribe(audio_data)
-                    print(f"Librosa result type: {type(result)}")
-                    print(f"Librosa result keys: {result.keys() if hasattr(result, 'keys') else 'No keys'}")
-                    print(f"Librosa result: {result}")
+                    result = transcribe(audio_data)
                     transcribed_text = result.get("text", "")
-                    print(f"Librosa transcription successful: {transcribed_text[:50] if transcribed_text else 'Empty text'}...")
+                    log.debug("Librosa transcription", transcript=transcribed_text, samples=len(audio_data), rate=sr)
                 except Exception as librosa_error:
-                    print(f"Librosa fallback failed: {librosa_error}")
+                    log.warning("Librosa fallback failed", error=str(librosa_error))
                     return "Speech-to-text is temporarily unavailable: Audio processing tools are not properly installed. Please use text input for now."
             else:
                 return f"Speech-to-text error: {str(transcribe_error)}"
@@ -650,16 +686,14 @@ def voice():
             original_filename = f"{base_name}.{ext}"
             if os.path.exists(original_filename):
                 os.remove(original_filename)
-                print(f"Cleaned up original file: {original_filename}")
                 break
         
         if os.path.exists(audio_filename):
             os.remove(audio_filename)
-            print(f"Cleaned up audio file: {audio_filename}")
         
         # Check if we got any transcription
         if not transcribed_text or transcribed_text.strip() == "":
-            print("No transcription text received from WAV file, trying original audio...")
+            log.debug("Empty WAV transcription, trying original audio")
             
             # Try with original audio file as fallback
             try:
@@ -671,23 +705,21 @@ def voice():
                         break
                 
                 if original_file:
-                    print(f"Trying transcription with original file: {original_file}")
-                    result = model.transcribe(original_file, **task_kwargs)
+                    result = transcribe(original_file, **task_kwargs)
                     transcribed_text = result.get("text", "")
-                    print(f"Original file transcription: {transcribed_text[:50] if transcribed_text else 'Empty text'}...")
+                    log.debug("Original file transcription", transcript=transcribed_text)
             except Exception as fallback_error:
-                print(f"Fallback transcription failed: {fallback_error}")
+                log.warning("Fallback transcription failed", error=str(fallback_error))
         
         # Final check
         if not transcribed_text or transcribed_text.strip() == "":
-            print("No transcription text received from any method")
+            log.debug("No transcription from any method, retrying with auto-detect")
             
             # Try one more time with different parameters and multiple language attempts
             try:
-                print("Trying final transcription attempt with different parameters...")
                 
                 # Try with auto-detection first
-                result = model.transcribe(
+                result = transcribe(
                     audio_filename,
                     language=None,  # Let Whisper auto-detect
                     task="transcribe",
@@ -699,15 +731,14 @@ def voice():
                     no_speech_threshold=0.3  # More lenient threshold
                 )
                 transcribed_text = result.get("text", "").strip()
-                print(f"Auto-detect transcription: {transcribed_text[:50] if transcribed_text else 'Empty text'}...")
+                log.debug("Auto-detect transcription", transcript=transcribed_text)
                 
                 # If still no text, try with common languages
                 if not transcribed_text:
-                    print("Trying with common languages...")
                     common_languages = ['hi', 'en', 'es', 'fr', 'de', 'zh', 'ja', 'ko', 'ar', 'ru']
                     for lang_code in common_languages:
                         try:
-                            result = model.transcribe(
+                            result = transcribe(
                                 audio_filename,
                                 language=lang_code,
                                 task="transcribe",
@@ -721,25 +752,24 @@ def voice():
                             temp_text = result.get("text", "").strip()
                             if temp_text:
                                 transcribed_text = temp_text
-                                print(f"Found text with language {lang_code}: {transcribed_text[:50]}...")
+                                log.debug("Transcribed with forced language", language=lang_code, transcript=transcribed_text)
                                 break
                         except Exception as lang_error:
-                            print(f"Failed with language {lang_code}: {lang_error}")
+                            log.debug("Forced language failed", language=lang_code, error=str(lang_error))
                             continue
                 
-                print(f"Final attempt transcription: {transcribed_text[:50] if transcribed_text else 'Empty text'}...")
             except Exception as final_error:
-                print(f"Final transcription attempt failed: {final_error}")
+                log.warning("Final transcription attempt failed", error=str(final_error))
             
             # If still no text, return a more helpful message
             if not transcribed_text or transcribed_text.strip() == "":
                 return "I couldn't detect any speech in your recording. Please try:\n1. Speaking more clearly and loudly\n2. Recording for at least 3-5 seconds\n3. Checking your microphone permissions\n4. Speaking closer to your microphone\n5. Using the text input instead"
         
-        print(f"Final transcription: '{transcribed_text}'")
+        log.info("Voice transcribed", transcript=transcribed_text)
         return transcribed_text.strip()
         
     except Exception as e:
-        print(f"Voice route error: {e}")
+        log.error("Voice route error", error=str(e))
         return f"Speech-to-text error: {str(e)}"
 
 
@@ -748,8 +778,6 @@ def text_to_speech():
     """Optimized text-to-speech with faster response times"""
     try:
         from flask import jsonify, send_file
-        import tempfile
-        import os
         import time
         
         start_time = time.time()
@@ -774,7 +802,7 @@ def text_to_speech():
         
         # For faster response, limit text length and use browser TTS for long texts
         if len(text) > 200:
-            print(f"⚡ Long text detected ({len(text)} chars), using browser TTS for speed")
+            log.debug("Long text, using browser TTS", chars=len(text))
             return jsonify({
                 "text": text,
                 "language": tts_lang,
@@ -782,36 +810,9 @@ def text_to_speech():
                 "message": f"Using browser TTS for faster response in {tts_lang}"
             })
         
-        # Try optimized gTTS with faster settings
+        # Synthesized straight into memory: nothing is left behind on disk
         try:
-            from gtts import gTTS
-            
-            # Create TTS with optimized settings for speed
-            tts = gTTS(
-                text=text, 
-                lang=tts_lang, 
-                slow=False,  # Fast speech
-                tld='com'    # Use faster server
-            )
-            
-            # Create temporary file with optimized settings
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-            temp_file.close()
-            
-            # Save audio to temporary file
-            tts.save(temp_file.name)
-            
-            generation_time = time.time() - start_time
-            print(f"⚡ TTS generated in {generation_time:.2f}s for {tts_lang}: {text[:30]}...")
-            
-            # Return the audio file
-            return send_file(
-                temp_file.name,
-                as_attachment=True,
-                download_name=f'response_{tts_lang}.mp3',
-                mimetype='audio/mpeg'
-            )
-            
+            mp3, tts_lang = synthesize_mp3(text, tts_lang)
         except ImportError:
             # Fallback: return text for browser TTS
             return jsonify({
@@ -821,34 +822,27 @@ def text_to_speech():
                 "message": f"Server TTS not available, using browser TTS in {tts_lang}"
             })
         except Exception as tts_error:
-            print(f"⚠️ TTS error for {tts_lang}: {tts_error}")
-            # Fast fallback to English
-            try:
-                tts = gTTS(text=text, lang='en', slow=False, tld='com')
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-                temp_file.close()
-                tts.save(temp_file.name)
-                
-                generation_time = time.time() - start_time
-                print(f"⚡ Fallback TTS in {generation_time:.2f}s: {text[:30]}...")
-                
-                return send_file(
-                    temp_file.name,
-                    as_attachment=True,
-                    download_name='response_en.mp3',
-                    mimetype='audio/mpeg'
-                )
-            except Exception as fallback_error:
-                print(f"❌ Fallback TTS failed: {fallback_error}")
-                return jsonify({
-                    "text": text,
-                    "language": "en",
-                    "use_browser_tts": True,
-                    "message": "TTS not available, using browser TTS"
-                })
-            
+            # synthesize_mp3 already retried in English
+            log.error("TTS failed", language=tts_lang, error=str(tts_error))
+            return jsonify({
+                "text": text,
+                "language": "en",
+                "use_browser_tts": True,
+                "message": "TTS not available, using browser TTS"
+            })
+
+        generation_time = time.time() - start_time
+        log.info("TTS generated", seconds=round(generation_time, 2), language=tts_lang, chars=len(text),
+                 bytes=len(mp3))
+        return send_file(
+            io.BytesIO(mp3),
+            as_attachment=True,
+            download_name=f'response_{tts_lang}.mp3',
+            mimetype='audio/mpeg'
+        )
+
     except Exception as e:
-        print(f"TTS error: {e}")
+        log.error("TTS error", error=str(e))
         return jsonify({"error": f"Text-to-speech error: {str(e)}"}), 500
 
 
@@ -857,16 +851,9 @@ def get_response(query: str, messages: list) -> str:
     return get_gemini_response(query, messages)
 
 
-def get_fallback_response(query: str) -> str:
-    """
-    Enhanced fallback rule-based chatbot when AI models are unavailable.
-    Provides comprehensive mental health guidance, prevention strategies, and support.
-    """
-    query_lower = query.lower()
-    
-    # Mental health responses with prevention strategies
-    if any(word in query_lower for word in ['anxious', 'anxiety', 'worried', 'stress', 'stressed']):
-        return """😰 **ANXIETY GUIDE** 😰
+# Rule-based replies by intent; the shared keyword router picks one per query
+FALLBACK_RESPONSES = {
+    "anxiety": """😰 **ANXIETY GUIDE** 😰
 
 **STEP 1: QUICK CALMING**
 • 4-7-8 Breathing: Inhale 4, hold 7, exhale 8
@@ -895,10 +882,8 @@ def get_fallback_response(query: str) -> str:
 • Physical symptoms
 • Thoughts of self-harm
 
-**Crisis: 988 | Text: HOME to 741741 | Emergency: 911**"""
-
-    elif any(word in query_lower for word in ['sad', 'depressed', 'down', 'hopeless', 'lonely']):
-        return """😔 **DEPRESSION GUIDE** 😔
+**Crisis: 988 | Text: HOME to 741741 | Emergency: 911**""",
+    "depression": """😔 **DEPRESSION GUIDE** 😔
 
 **STEP 1: IMMEDIATE HELP**
 • Reach out to someone you trust
@@ -926,10 +911,8 @@ def get_fallback_response(query: str) -> str:
 • Lasts 2+ weeks
 • Can't care for self
 
-**Crisis: 988 | Text: HOME to 741741 | Emergency: 911**"""
-
-    elif any(word in query_lower for word in ['sleep', 'insomnia', 'tired', 'exhausted']):
-        return """🌙 **SLEEP GUIDE** 🌙
+**Crisis: 988 | Text: HOME to 741741 | Emergency: 911**""",
+    "sleep": """🌙 **SLEEP GUIDE** 🌙
 
 **STEP 1: QUICK FIXES**
 • 4-7-8 Breathing: Inhale 4, hold 7, exhale 8
@@ -962,10 +945,8 @@ def get_fallback_response(query: str) -> str:
 • Sleep specialist
 • CBT-I therapy
 • Sleep study
-• Medication evaluation"""
-
-    elif any(word in query_lower for word in ['pain', 'hurt', 'ache', 'sore']):
-        return """I'm sorry you're experiencing pain. Here are some general guidelines:
+• Medication evaluation""",
+    "pain": """I'm sorry you're experiencing pain. Here are some general guidelines:
 
 1. **Immediate Relief**:
    - Rest the affected area
@@ -985,10 +966,8 @@ def get_fallback_response(query: str) -> str:
    - Pain that interferes with daily activities
    - Pain that doesn't improve with rest
 
-**Note**: This is general advice. For specific pain conditions, please consult a healthcare provider."""
-
-    elif any(word in query_lower for word in ['exercise', 'workout', 'fitness', 'physical']):
-        return """Great question about exercise! Here are some general guidelines:
+**Note**: This is general advice. For specific pain conditions, please consult a healthcare provider.""",
+    "exercise": """Great question about exercise! Here are some general guidelines:
 
 1. **Getting Started**:
    - Start slowly and gradually increase intensity
@@ -1014,10 +993,8 @@ def get_fallback_response(query: str) -> str:
    - Set realistic goals
    - Track your progress
 
-Remember: Any movement is better than none! Start where you are and build from there."""
-
-    elif any(word in query_lower for word in ['diet', 'nutrition', 'food', 'eating', 'healthy']):
-        return """Here are some general nutrition guidelines for better health:
+Remember: Any movement is better than none! Start where you are and build from there.""",
+    "nutrition": """Here are some general nutrition guidelines for better health:
 
 1. **Balanced Meals**:
    - Include protein, healthy fats, and complex carbohydrates
@@ -1047,10 +1024,8 @@ Remember: Any movement is better than none! Start where you are and build from t
    - Excessive salt and saturated fats
    - Refined carbohydrates
 
-**Note**: Individual nutritional needs vary. For personalized advice, consider consulting a registered dietitian."""
-
-    elif any(word in query_lower for word in ['headache', 'migraine', 'head pain']):
-        return """Headaches can be really uncomfortable. Here are some strategies that might help:
+**Note**: Individual nutritional needs vary. For personalized advice, consider consulting a registered dietitian.""",
+    "headache": """Headaches can be really uncomfortable. Here are some strategies that might help:
 
 1. **Immediate Relief**:
    - Rest in a quiet, dark room
@@ -1078,11 +1053,8 @@ Remember: Any movement is better than none! Start where you are and build from t
    - Consistent sleep schedule
    - Regular meals to avoid low blood sugar
 
-If headaches are frequent or severe, please consult a healthcare provider."""
-
-    # Mental health prevention and wellness
-    elif any(word in query_lower for word in ['mental health', 'prevention', 'wellness', 'coping', 'therapy', 'counseling']):
-        return """Excellent question about mental health prevention and wellness! Let me provide you with comprehensive strategies to maintain and improve your mental well-being.
+If headaches are frequent or severe, please consult a healthcare provider.""",
+    "mental_health": """Excellent question about mental health prevention and wellness! Let me provide you with comprehensive strategies to maintain and improve your mental well-being.
 
 **MENTAL HEALTH PREVENTION STRATEGIES:**
 
@@ -1159,11 +1131,8 @@ If headaches are frequent or severe, please consult a healthcare provider."""
 - Emergency: 911
 - Local mental health crisis hotlines
 
-**Remember**: Mental health prevention is an ongoing practice, not a one-time fix. Small, consistent actions build resilience over time. You're building a foundation for long-term mental well-being!"""
-
-    # General health and wellness
-    elif any(word in query_lower for word in ['health', 'wellness', 'well-being', 'healthy']):
-        return """Your health is your greatest asset! Here's a comprehensive guide to maintaining and improving your overall well-being:
+**Remember**: Mental health prevention is an ongoing practice, not a one-time fix. Small, consistent actions build resilience over time. You're building a foundation for long-term mental well-being!""",
+    "health": """Your health is your greatest asset! Here's a comprehensive guide to maintaining and improving your overall well-being:
 
 **PILLARS OF HEALTH:**
 
@@ -1213,11 +1182,8 @@ If headaches are frequent or severe, please consult a healthcare provider."""
 - Watch for physical symptoms
 - Regular health assessments
 
-**Remember**: Health is a journey, not a destination. Small, consistent actions compound over time to create significant improvements in your overall well-being!"""
-
-    # PTSD and trauma responses
-    elif any(word in query_lower for word in ['ptsd', 'trauma', 'flashback', 'nightmare', 'triggered', 'abuse', 'assault']):
-        return """I'm so sorry you're dealing with trauma. You're incredibly brave for reaching out, and healing is absolutely possible. Here are some strategies that may help:
+**Remember**: Health is a journey, not a destination. Small, consistent actions compound over time to create significant improvements in your overall well-being!""",
+    "trauma": """I'm so sorry you're dealing with trauma. You're incredibly brave for reaching out, and healing is absolutely possible. Here are some strategies that may help:
 
 **IMMEDIATE COPING STRATEGIES:**
 
@@ -1273,11 +1239,10 @@ If headaches are frequent or severe, please consult a healthcare provider."""
 - National Suicide Prevention Lifeline: 988
 - Emergency: 911
 
-**Remember**: You are not alone, and healing is possible. Take things one day at a time, and be gentle with yourself throughout this process."""
+**Remember**: You are not alone, and healing is possible. Take things one day at a time, and be gentle with yourself throughout this process.""",
+}
 
-    # Default response for other queries
-    else:
-        return """Thanks for reaching out! I'm here to help with mental health, wellness, and general health questions. I can offer support with:
+DEFAULT_FALLBACK_RESPONSE = """Thanks for reaching out! I'm here to help with mental health, wellness, and general health questions. I can offer support with:
 
 **MENTAL HEALTH TOPICS:**
 - Anxiety and stress management
@@ -1315,3 +1280,19 @@ If headaches are frequent or severe, please consult a healthcare provider."""
 While I can provide general health information and support, I'm not a replacement for professional medical or mental health care. For serious health concerns, please consult with qualified healthcare providers.
 
 What specific area would you like to explore together? I'm here to provide guidance and support on your wellness journey!"""
+
+
+# Translated replies are built offline; see backend/fallback_catalog.py
+fallback_catalog = FallbackCatalog(FALLBACK_RESPONSES, DEFAULT_FALLBACK_RESPONSE)
+
+
+@span("fallback")
+def get_fallback_response(query: str, lang: str = "en", analysis: MessageAnalysis = None) -> str:
+    """
+    Enhanced fallback rule-based chatbot when AI models are unavailable.
+    Provides comprehensive mental health guidance, prevention strategies, and support,
+    in `lang` when the catalog has a translation and in English otherwise.
+    """
+    analysis = analysis or analyze_message(query)
+    responses, default = fallback_catalog.get(lang)
+    return router.respond_intent(analysis.intent, responses, default)
@@ -0,0 +1,70 @@
+"""
+Shared speech-to-text service.
+Whisper models are loaded once per worker thread and reused by the web
+/voice route and the Telegram bot, so no request pays the model load cost.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.audio import decode_to_pcm
+from backend.errors import MalformedResponse
+from backend.faults import inject
+from backend.metrics import span
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+# Each worker holds its own model replica; whisper decoding installs hooks on
+# the model, so a single replica must never be used by two threads at once.
+ASR_WORKERS = int(os.getenv("ASR_WORKERS", "1"))
+
+_executor = ThreadPoolExecutor(max_workers=ASR_WORKERS, thread_name_prefix="asr")
+_local = threading.local()
+
+
+def whisper_available() -> bool:
+    """Check whether the whisper package can be imported"""
+    try:
+        import whisper  # type: ignore  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _get_model():
+    model = getattr(_local, "model", None)
+    if model is None:
+        import whisper  # type: ignore
+
+        model = whisper.load_model(WHISPER_MODEL, device=WHISPER_DEVICE)
+        _local.model = model
+        print(f"✅ Whisper '{WHISPER_MODEL}' model loaded for {threading.current_thread().name}")
+    return model
+
+
+def _run(audio, options: dict) -> dict:
+    # Raw bytes are decoded here so the caller's thread/event loop never blocks on ffmpeg
+    if isinstance(audio, (bytes, bytearray)):
+        with span("whisper_decode"):
+            audio = decode_to_pcm(audio)
+    model = _get_model()
+    with span("whisper_transcribe"):
+        result = inject("asr", model.transcribe, audio, **options)
+    if not isinstance(result, dict) or not isinstance(result.get("text", ""), str):
+        raise MalformedResponse("asr", f"transcription is {type(result).__name__}")
+    return result
+
+
+def transcribe(audio, **options) -> dict:
+    """Transcribe a file path, PCM array or encoded bytes; blocks until done"""
+    # The caller's context rides along so the spans keep its route/channel/language labels
+    return _executor.submit(contextvars.copy_context().run, _run, audio, options).result()
+
+
+async def transcribe_async(audio, **options) -> dict:
+    """Transcribe without blocking the running event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, contextvars.copy_context().run, _run, audio, options)
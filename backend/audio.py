@@ -0,0 +1,42 @@
+"""
+In-memory audio helpers shared by the web and messaging voice paths.
+Audio is piped through ffmpeg instead of being written to disk.
+"""
+
+import subprocess
+
+# Whisper expects 16 kHz mono float32 PCM
+SAMPLE_RATE = 16000
+
+
+class AudioDecodeError(RuntimeError):
+    """Raised when ffmpeg cannot decode or encode the supplied audio bytes"""
+
+
+def _ffmpeg(output_args: list, data: bytes) -> bytes:
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0"] + output_args + ["pipe:1"]
+    try:
+        proc = subprocess.run(cmd, input=bytes(data), capture_output=True, check=False)
+    except FileNotFoundError as e:
+        raise AudioDecodeError("ffmpeg is not installed on the server") from e
+
+    if proc.returncode != 0 or not proc.stdout:
+        raise AudioDecodeError(proc.stderr.decode("utf-8", "ignore").strip() or "empty audio stream")
+    return proc.stdout
+
+
+def decode_to_pcm(data: bytes, sample_rate: int = SAMPLE_RATE):
+    """Decode compressed audio (OGG/Opus, WebM, MP3, ...) to mono float32 PCM"""
+    # Lazy import to avoid heavy dependency at app startup
+    import numpy as np
+
+    raw = _ffmpeg(["-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sample_rate)], data)
+    return np.frombuffer(raw, np.int16).astype(np.float32) / 32768.0
+
+
+def encode_opus(data: bytes, bitrate: str = "24k") -> bytes:
+    """Transcode any ffmpeg-readable audio to a mono OGG/Opus voice note"""
+    return _ffmpeg([
+        "-c:a", "libopus", "-b:a", bitrate, "-application", "voip",
+        "-ac", "1", "-ar", "48000", "-f", "ogg",
+    ], data)
@@ -1,108 +1,266 @@
+"""
+Career guidance data and role search.
+Everything CareerGuidance knows lives in backend/data/career.json, a versioned
+file read once and frozen into tuples and read-only mappings, so the getters
+hand out shared data instead of rebuilding it on every call.
+
+Roles are indexed on the first search. Inverted indexes map title words and
+skills, industries and salary bands to role ids held in NumPy arrays. A
+sorted vocabulary answers prefixes ("data sci") by bisection, and an index of
+one-letter deletions finds misspellings ("pyhton") without scanning the
+vocabulary, so a query only touches the postings of the words it matches.
+"""
+
+import bisect
+import json
+import os
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.keyword_router import tokenize
+
+CAREER_DATA_VERSION = 1
+CAREER_DATA_PATH = os.getenv(
+    "CAREER_DATA_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "career.json"),
+)
+CAREER_SEARCH_LIMIT = int(os.getenv("CAREER_SEARCH_LIMIT", "50"))
+
+NO_INSIGHTS = MappingProxyType({"message": "No specific insights available for this industry yet."})
+_STOPWORDS = frozenset({"a", "an", "and", "for", "in", "of", "the", "to", "with"})
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def load_career_data(path: str = CAREER_DATA_PATH) -> Mapping:
+    """The career data file as read-only mappings and tuples"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != CAREER_DATA_VERSION:
+        raise ValueError(f"{path}: career data version {data.get('version')} != {CAREER_DATA_VERSION}")
+    return _freeze(data)
+
+
+class Role:
+    __slots__ = ("title", "industry", "skills", "salary_min", "salary_max", "bands")
+
+    def __init__(self, title: str, industry: str, skills: Sequence[str], salary_min: float, salary_max: float,
+                 bands: Sequence[str] = ()):
+        self.title = title
+        self.industry = industry
+        self.skills = tuple(skills)
+        self.salary_min = salary_min
+        self.salary_max = salary_max
+        self.bands = tuple(bands)
+
+    def to_dict(self) -> dict:
+        return {
+            "title": self.title,
+            "industry": self.industry,
+            "skills": list(self.skills),
+            "salary_range": f"₹{self.salary_min:g} LPA - ₹{self.salary_max:g} LPA",
+            "salary_bands": list(self.bands),
+        }
+
+
+class RoleMatch:
+    __slots__ = ("score", "role")
+
+    def __init__(self, score: float, role: Role):
+        self.score = score
+        self.role = role
+
+    def to_dict(self) -> dict:
+        return dict(self.role.to_dict(), score=round(self.score, 3))
+
+
+def _deletions(word: str):
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def edit_distance(a: str, b: str, limit: int = 2) -> int:
+    """Edit distance with adjacent transpositions; anything above `limit` is reported as limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and cost and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return min(current[-1], limit + 1)
+
+
+class CareerIndex:
+    # A hit in the title outweighs one in the skills or industry
+    TITLE_WEIGHT = 2.0
+    # How much a query word is worth by the way it matched
+    PREFIX_WEIGHT = 0.7
+    FUZZY_WEIGHT = 0.5
+    # Words shorter than this are not corrected, "ui" is not a typo of "ai"
+    FUZZY_MIN_LENGTH = 4
+    # Prefix expansions per query word; "s" alone would otherwise pull in half the vocabulary
+    MAX_EXPANSIONS = 64
+
+    def __init__(self, roles: Sequence[Role]):
+        self.roles = tuple(roles)
+        words: Dict[str, Dict[int, float]] = {}
+        industries: Dict[str, List[int]] = {}
+        skills: Dict[str, List[int]] = {}
+        bands: Dict[str, List[int]] = {}
+        for i, role in enumerate(self.roles):
+            fields = ((role.title, self.TITLE_WEIGHT), (role.industry, 1.0)) + tuple((s, 1.0) for s in role.skills)
+            for text, weight in fields:
+                for word in tokenize(text):
+                    if word not in _STOPWORDS:
+                        postings = words.setdefault(word, {})
+                        postings[i] = max(postings.get(i, 0.0), weight)
+            industries.setdefault(role.industry.lower(), []).append(i)
+            for skill in role.skills:
+                skills.setdefault(skill.lower(), []).append(i)
+            for band in role.bands:
+                bands.setdefault(band, []).append(i)
+
+        self._words = {
+            word: (np.fromiter(postings, dtype=np.int32, count=len(postings)),
+                   np.fromiter(postings.values(), dtype=np.float32, count=len(postings)))
+            for word, postings in words.items()
+        }
+        self._filters = {
+            name: {key: np.array(sorted(set(ids)), dtype=np.int32) for key, ids in index.items()}
+            for name, index in (("industry", industries), ("skill", skills), ("band", bands))
+        }
+        self._vocabulary = sorted(self._words)
+        self._deletes: Dict[str, List[str]] = {}
+        for word in self._vocabulary:
+            if len(word) >= self.FUZZY_MIN_LENGTH - 1:
+                for key in _deletions(word) | {word}:
+                    self._deletes.setdefault(key, []).append(word)
+
+    def __len__(self):
+        return len(self.roles)
+
+    def expand(self, word: str) -> List[Tuple[str, float]]:
+        """Vocabulary words a query word stands for, with their weight: exact, else prefixes, else typos"""
+        if word in self._words:
+            return [(word, 1.0)]
+        start = bisect.bisect_left(self._vocabulary, word)
+        stop = min(start + self.MAX_EXPANSIONS, len(self._vocabulary))
+        end = bisect.bisect_left(self._vocabulary, word + "\uffff", start, stop)
+        if end > start:
+            return [(w, self.PREFIX_WEIGHT) for w in self._vocabulary[start:end]]
+        if len(word) < self.FUZZY_MIN_LENGTH:
+            return []
+        limit = 1 if len(word) < 7 else 2
+        candidates = {w for key in _deletions(word) | {word} for w in self._deletes.get(key, ())}
+        matches = []
+        for candidate in candidates:
+            distance = edit_distance(word, candidate, limit)
+            if distance <= limit:
+                matches.append((candidate, self.FUZZY_WEIGHT / distance))
+        return matches
+
+    def search(self, query: str = "", industry: Optional[str] = None, skill: Optional[str] = None,
+               band: Optional[str] = None, limit: int = 10) -> List[RoleMatch]:
+        """Best roles for the query words within the filters; with filters only, roles in data order"""
+        allowed = None
+        for name, key in (("industry", industry), ("skill", skill), ("band", band)):
+            if not key:
+                continue
+            ids = self._filters[name].get(key.lower() if name != "band" else key)
+            if ids is None:
+                return []
+            allowed = ids if allowed is None else np.intersect1d(allowed, ids, assume_unique=True)
+
+        words = [w for w in tokenize(query or "") if w not in _STOPWORDS]
+        if words:
+            scores = np.zeros(len(self.roles), dtype=np.float32)
+            for word in words:
+                # A role counts once per query word, through its best matching expansion
+                best = np.zeros(len(self.roles), dtype=np.float32)
+                for match, weight in self.expand(word):
+                    ids, weights = self._words[match]
+                    best[ids] = np.maximum(best[ids], weights * weight)
+                scores += best
+            if allowed is not None:
+                mask = np.zeros(len(self.roles), dtype=bool)
+                mask[allowed] = True
+                scores[~mask] = 0
+        elif allowed is not None:
+            return [RoleMatch(1.0, self.roles[i]) for i in allowed[:limit]]
+        else:
+            return []
+
+        k = min(limit, len(scores))
+        if k <= 0:
+            return []
+        top = np.sort(np.argpartition(-scores, k - 1)[:k])
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [RoleMatch(float(scores[i]), self.roles[i]) for i in top if scores[i] > 0]
+
+
+def roles_from_data(data: Mapping) -> List[Role]:
+    """Roles from the data file, tagged with every salary band their range overlaps"""
+    bands = [(b["band"], b["min"], b["max"]) for b in data["salary_bands"]]
+    roles = []
+    for entry in data["roles"]:
+        low, high = entry["salary_lpa"]
+        tags = [name for name, band_min, band_max in bands
+                if (band_max is None or low < band_max) and high > band_min]
+        roles.append(Role(entry["title"], entry["industry"], entry["skills"], low, high, tags))
+    return roles
+
+
 class CareerGuidance:
+    def __init__(self, path: str = CAREER_DATA_PATH):
+        self.data = load_career_data(path)
+        self._index = None
+        self._index_lock = threading.Lock()
+
     def get_career_assessment_questions(self):
-        return [
-            "What are your main interests and passions?",
-            "What skills do you enjoy using the most?",
-            "What kind of work environment do you thrive in?",
-            "What are your long-term career goals?",
-            "What values are most important to you in a job (e.g., impact, salary, work-life balance)?",
-            "What industries or fields are you curious about?",
-            "What problems do you enjoy solving?",
-            "What are your strengths and weaknesses?",
-            "How do you handle stress and challenges at work?",
-            "What kind of impact do you want to make with your career?"
-        ]
+        return self.data["assessment_questions"]
 
     def get_career_resources(self, resource_type):
-        resources = {
-            "resume_tips": [
-                "Use action verbs to describe achievements.",
-                "Quantify your accomplishments with numbers.",
-                "Tailor your resume to each job description.",
-                "Keep it concise, ideally 1-2 pages.",
-                "Proofread carefully for any errors.",
-                "Use a clean, professional format.",
-                "Include relevant keywords from the job posting."
-            ],
-            "interview_preparation": [
-                "Research the company and the role thoroughly.",
-                "Practice common interview questions (STAR method).",
-                "Prepare thoughtful questions to ask the interviewer.",
-                "Dress professionally and arrive on time.",
-                "Send a thank-you note after the interview.",
-                "Be confident and enthusiastic.",
-                "Listen actively and answer clearly."
-            ],
-            "job_search_platforms": [
-                "LinkedIn",
-                "Indeed",
-                "Glassdoor",
-                "Naukri.com (for India)",
-                "Monster.com",
-                "AngelList (for startups)",
-                "Remote.co (for remote jobs)"
-            ],
-            "skill_development": [
-                "Coursera",
-                "Udemy",
-                "LinkedIn Learning",
-                "edX",
-                "Khan Academy",
-                "Codecademy",
-                "Google Digital Garage"
-            ]
-        }
-        return resources.get(resource_type, [])
+        return self.data["resources"].get(resource_type, ())
 
     def get_salary_negotiation_tips(self):
-        return [
-            "Research average salaries for your role and location.",
-            "Know your worth and be confident in your ask.",
-            "Practice your negotiation script.",
-            "Focus on your value and contributions.",
-            "Consider the entire compensation package (benefits, bonuses).",
-            "Be prepared to walk away if the offer doesn't meet your needs.",
-            "Get the offer in writing before accepting."
-        ]
+        return self.data["salary_negotiation_tips"]
 
     def get_work_life_balance_tips(self):
-        return [
-            "Set clear boundaries between work and personal life.",
-            "Prioritize tasks and learn to say no.",
-            "Take regular breaks throughout the day.",
-            "Delegate tasks when possible.",
-            "Engage in hobbies and activities outside of work.",
-            "Ensure you get enough sleep.",
-            "Communicate your needs to your employer."
-        ]
+        return self.data["work_life_balance_tips"]
 
     def get_industry_insights(self, industry):
-        insights = {
-            "technology": {
-                "trending_roles": ["AI Engineer", "Data Scientist", "Cloud Architect", "Cybersecurity Analyst"],
-                "in_demand_skills": ["Python", "Machine Learning", "Cloud Computing", "DevOps", "Data Analytics"],
-                "salary_range": "₹6 LPA - ₹30 LPA+",
-                "growth_prospects": "High growth, constant innovation"
-            },
-            "healthcare": {
-                "trending_roles": ["Telemedicine Specialist", "Health Informatics Analyst", "Medical Researcher", "Nurse Practitioner"],
-                "in_demand_skills": ["Clinical Skills", "Data Analysis", "Patient Care", "Regulatory Knowledge", "Communication"],
-                "salary_range": "₹4 LPA - ₹25 LPA+",
-                "growth_prospects": "Steady growth, increasing demand"
-            },
-            "finance": {
-                "trending_roles": ["Financial Analyst", "Investment Banker", "FinTech Specialist", "Risk Manager"],
-                "in_demand_skills": ["Financial Modeling", "Data Analysis", "Blockchain", "Regulatory Compliance", "Market Research"],
-                "salary_range": "₹5 LPA - ₹35 LPA+",
-                "growth_prospects": "Moderate to high growth, evolving with technology"
-            },
-            "marketing": {
-                "trending_roles": ["Digital Marketing Manager", "Content Strategist", "SEO Specialist", "Social Media Manager"],
-                "in_demand_skills": ["SEO/SEM", "Content Creation", "Social Media Marketing", "Data Analytics", "CRM"],
-                "salary_range": "₹3 LPA - ₹15 LPA+",
-                "growth_prospects": "High growth, especially in digital domains"
-            }
-        }
-        return insights.get(industry.lower(), {"message": "No specific insights available for this industry yet."})
+        return self.data["industries"].get(industry.lower(), NO_INSIGHTS)
+
+    @property
+    def salary_bands(self) -> Tuple[str, ...]:
+        return tuple(band["band"] for band in self.data["salary_bands"])
+
+    @property
+    def index(self) -> CareerIndex:
+        """Role index, built on first use"""
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    self._index = CareerIndex(roles_from_data(self.data))
+                    print(f"💼 Career index ready ({len(self._index)} roles)")
+        return self._index
+
+    def search_roles(self, query: str = "", **filters) -> List[RoleMatch]:
+        return self.index.search(query, **filters)
+
 
 career_guidance = CareerGuidance()
@@ -9,3 +9,6 @@ class Config:
     FLASK_APP = os.getenv("FLASK_APP")
     FLASK_RUN_PORT = os.environ.get("FLASK_RUN_PORT")
     GEMINI_KEY = os.getenv("GEMINI_KEY")
+    SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "audexa_sessions.db")
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "sqlite")
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
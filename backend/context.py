@@ -0,0 +1,120 @@
+"""
+Token-budgeted prompt builder shared by the web API and GeminiBot.
+The newest turns are packed into the prompt until CONTEXT_TOKEN_BUDGET is
+reached; anything older is folded into a rolling summary that is cached with
+the session and extended incrementally, so each message is summarized once
+and prompt size stays flat however long the conversation gets.
+
+Grounding notes are the first thing given up: they are trimmed so that at
+least CONTEXT_MIN_HISTORY_TOKENS are left for recent turns, and that floor
+holds even when the system prompt and a long query crowd the budget.
+"""
+
+import os
+import re
+from typing import List
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "300"))
+# Recent turns always get at least this much, before any grounding notes
+CONTEXT_MIN_HISTORY_TOKENS = int(os.getenv("CONTEXT_MIN_HISTORY_TOKENS", "400"))
+
+# Longest excerpt kept from a single folded message
+_SUMMARY_LINE_CHARS = 160
+_SENTENCE_END = re.compile(r"(?<=[.!?।。])\s|\n")
+_ROLE_LABELS = {"user": "USER", "assistant": "ASSISTANT"}
+_SUMMARY_LABELS = {"user": "User", "assistant": "AUDEXA"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: ~4 UTF-8 bytes per token holds for Latin and Indic scripts alike"""
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def fold_into_summary(summary: str, messages: List[dict], budget: int = SUMMARY_TOKEN_BUDGET) -> str:
+    """Append one short line per message, dropping the oldest lines once over budget"""
+    lines = summary.split("\n") if summary else []
+    for m in messages:
+        label = _SUMMARY_LABELS.get(m.get("role"))
+        content = (m.get("content") or "").strip()
+        if not label or not content:
+            continue
+        first = _SENTENCE_END.split(content, 1)[0].strip()
+        if len(first) > _SUMMARY_LINE_CHARS:
+            first = first[:_SUMMARY_LINE_CHARS - 3] + "..."
+        lines.append(f"{label}: {first}")
+
+    while lines and estimate_tokens("\n".join(lines)) > budget:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def trim_notes(notes: str, budget: int) -> str:
+    """Drop note lines from the end (the weakest matches) until `notes` fits; "" if only the heading would be left"""
+    lines = notes.split("\n") if notes else []
+    while lines and estimate_tokens("\n".join(lines)) > budget:
+        lines.pop()
+    if len(lines) == 1 and notes.count("\n"):
+        return ""
+    return "\n".join(lines)
+
+
+class PromptContext:
+    __slots__ = ("prompt", "tokens", "history_messages", "summary", "summary_upto")
+
+    def __init__(self, prompt: str, tokens: int, history_messages: int, summary: str, summary_upto: int):
+        self.prompt = prompt
+        self.tokens = tokens
+        self.history_messages = history_messages
+        self.summary = summary
+        self.summary_upto = summary_upto
+
+
+def build_context(system_prompt: str, history: List[dict], query: str, summary: str = "",
+                  summary_upto: int = 0, first_index: int = 0,
+                  budget: int = CONTEXT_TOKEN_BUDGET, notes: str = "") -> PromptContext:
+    """
+    Pack `history` (chronological user/assistant messages) into a prompt.
+    `first_index` is the absolute position of history[0] in the conversation
+    and `summary_upto` the absolute position the summary already covers, so
+    only messages that newly left the window are folded into the summary.
+    `notes` (grounding snippets) only get what is left over above the
+    history floor.
+    """
+    history = [m for m in history if m.get("role") in _ROLE_LABELS and m.get("content")]
+    tail = f"USER: {query}\nASSISTANT:"
+    remaining = budget - estimate_tokens(system_prompt) - estimate_tokens(tail) - SUMMARY_TOKEN_BUDGET
+    notes = trim_notes(notes, remaining - CONTEXT_MIN_HISTORY_TOKENS)
+    if notes:
+        remaining -= estimate_tokens(notes) + 1
+    remaining = max(remaining, CONTEXT_MIN_HISTORY_TOKENS)
+
+    # Walk back from the newest message while it still fits
+    window_start = len(history)
+    lines = []
+    for m in reversed(history):
+        line = f"{_ROLE_LABELS[m['role']]}: {m['content']}"
+        cost = estimate_tokens(line) + 1
+        if cost > remaining:
+            break
+        remaining -= cost
+        lines.append(line)
+        window_start -= 1
+    lines.reverse()
+
+    folded_end = first_index + window_start
+    if folded_end > summary_upto:
+        skip = max(0, summary_upto - first_index)
+        summary = fold_into_summary(summary, history[skip:window_start])
+        summary_upto = folded_end
+
+    parts = [system_prompt]
+    if notes:
+        parts.append(notes)
+    if summary:
+        parts.append("Earlier in this conversation:\n" + summary)
+    if lines:
+        parts.append("\n".join(lines))
+    parts.append(tail)
+    prompt = "\n\n".join(parts)
+    return PromptContext(prompt, estimate_tokens(prompt), len(lines), summary, summary_upto)
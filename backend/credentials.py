@@ -0,0 +1,208 @@
+"""
+Pools of API keys for the hosted model providers (Gemini, Cohere).
+Several keys can be configured per provider (GEMINI_KEYS=key1,key2 next to
+the single GEMINI_KEY). Every call takes the healthiest key; a key that hits
+its quota (HTTP 429 / ResourceExhausted) cools down with exponential backoff
+and a rejected key is parked for longer, so traffic moves to the remaining
+keys instead of the whole service dropping to fallback answers.
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List
+
+# First cooldown after a quota error; doubles on every consecutive one
+QUOTA_COOLDOWN_SECONDS = float(os.getenv("QUOTA_COOLDOWN_SECONDS", "60"))
+MAX_COOLDOWN_SECONDS = float(os.getenv("MAX_COOLDOWN_SECONDS", str(24 * 3600)))
+# Invalid or expired keys are rarely fixed quickly
+AUTH_COOLDOWN_SECONDS = float(os.getenv("AUTH_COOLDOWN_SECONDS", "3600"))
+
+_QUOTA_MARKERS = ("429", "quota", "resourceexhausted", "resource has been exhausted", "rate limit", "too many requests")
+_AUTH_MARKERS = ("401", "403", "api key", "api_key", "permission", "unauthorized", "authentication", "expired")
+# "Please retry in 35.2s" / "retry_delay { seconds: 35 }"
+_RETRY_DELAY = re.compile(r"retry(?:_delay| in|-after)?\D{0,20}?(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+class CredentialsExhausted(RuntimeError):
+    """Every key of a provider is cooling down; `retry_after` is the wait until the first frees up"""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"all {provider} API keys are over quota or unavailable; retry in {retry_after:.0f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+def is_quota_error(error: Exception) -> bool:
+    if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in _QUOTA_MARKERS)
+
+
+def is_auth_error(error: Exception) -> bool:
+    if getattr(error, "code", None) in (401, 403) or getattr(error, "status_code", None) in (401, 403):
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in _AUTH_MARKERS)
+
+
+def parse_keys(*env_names: str) -> List[str]:
+    """Collect comma-separated keys from the given variables, first occurrence wins"""
+    keys = []
+    for name in env_names:
+        for key in (os.getenv(name) or "").split(","):
+            key = key.strip()
+            if key and key not in keys:
+                keys.append(key)
+    return keys
+
+
+class Credential:
+    __slots__ = ("key", "label", "requests", "successes", "failures", "quota_errors", "auth_errors",
+                 "consecutive_quota_errors", "cooldown_until", "in_flight", "last_used", "last_error")
+
+    def __init__(self, key: str):
+        self.key = key
+        # Never expose more than the tail of a key
+        self.label = "…" + key[-4:] if len(key) > 8 else "…"
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.quota_errors = 0
+        self.auth_errors = 0
+        self.consecutive_quota_errors = 0
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.last_used = 0
+        self.last_error = ""
+
+
+class CredentialPool:
+    def __init__(self, provider: str, keys: List[str], clock: Callable[[], float] = time.monotonic,
+                 quota_cooldown: float = QUOTA_COOLDOWN_SECONDS, auth_cooldown: float = AUTH_COOLDOWN_SECONDS):
+        self.provider = provider
+        self.credentials = [Credential(k) for k in keys]
+        self.clock = clock
+        self.quota_cooldown = quota_cooldown
+        self.auth_cooldown = auth_cooldown
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self.credentials)
+
+    def acquire(self) -> Credential:
+        """Least busy, then least recently used key that is not cooling down"""
+        with self._lock:
+            now = self.clock()
+            ready = [c for c in self.credentials if c.cooldown_until <= now]
+            if not ready:
+                retry_after = min((c.cooldown_until for c in self.credentials), default=now) - now
+                raise CredentialsExhausted(self.provider, max(retry_after, 0.0))
+            credential = min(ready, key=lambda c: (c.in_flight, c.last_used))
+            credential.in_flight += 1
+            credential.requests += 1
+            # A counter rather than the clock, so ties never pin traffic to one key
+            self._sequence += 1
+            credential.last_used = self._sequence
+            return credential
+
+    def report_success(self, credential: Credential) -> None:
+        with self._lock:
+            credential.in_flight -= 1
+            credential.successes += 1
+            credential.consecutive_quota_errors = 0
+
+    def report_failure(self, credential: Credential, error: Exception) -> None:
+        with self._lock:
+            credential.in_flight -= 1
+            credential.failures += 1
+            credential.last_error = str(error)[:200]
+            now = self.clock()
+            if is_quota_error(error):
+                credential.quota_errors += 1
+                credential.consecutive_quota_errors += 1
+                cooldown = self.quota_cooldown * 2 ** (credential.consecutive_quota_errors - 1)
+                hinted = _RETRY_DELAY.search(str(error))
+                if hinted:
+                    cooldown = max(cooldown, float(hinted.group(1)))
+                credential.cooldown_until = now + min(cooldown, MAX_COOLDOWN_SECONDS)
+            elif is_auth_error(error):
+                credential.auth_errors += 1
+                credential.cooldown_until = now + self.auth_cooldown
+
+    def call(self, fn: Callable[[str], object]):
+        """
+        Run `fn(api_key)`, moving on to the next key when one is over quota or
+        rejected. Other errors are raised straight away. Raises
+        CredentialsExhausted once no usable key is left.
+        """
+        last_error = None
+        for _ in range(len(self.credentials)):
+            try:
+                credential = self.acquire()
+            except CredentialsExhausted:
+                if last_error is not None:
+                    break
+                raise
+            try:
+                result = fn(credential.key)
+            except Exception as e:
+                self.report_failure(credential, e)
+                if is_quota_error(e) or is_auth_error(e):
+                    last_error = e
+                    continue
+                raise
+            self.report_success(credential)
+            return result
+        raise CredentialsExhausted(self.provider, self.retry_after()) from last_error
+
+    def retry_after(self) -> float:
+        with self._lock:
+            now = self.clock()
+            return max(min((c.cooldown_until for c in self.credentials), default=now) - now, 0.0)
+
+    def stats(self) -> List[dict]:
+        with self._lock:
+            now = self.clock()
+            return [
+                {
+                    "key": c.label,
+                    "available": c.cooldown_until <= now,
+                    "cooldown_seconds": max(c.cooldown_until - now, 0.0),
+                    "requests": c.requests,
+                    "successes": c.successes,
+                    "failures": c.failures,
+                    "quota_errors": c.quota_errors,
+                    "auth_errors": c.auth_errors,
+                    "in_flight": c.in_flight,
+                    "last_error": c.last_error,
+                }
+                for c in self.credentials
+            ]
+
+
+_PROVIDER_ENV = {
+    "gemini": ("GEMINI_KEYS", "GEMINI_KEY"),
+    "cohere": ("COHERE_API_KEYS", "COHERE_API_KEY"),
+}
+_pools: Dict[str, CredentialPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_credential_pool(provider: str) -> CredentialPool:
+    """Process-wide pool for a provider, built from its environment variables on first use"""
+    pool = _pools.get(provider)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(provider)
+            if pool is None:
+                pool = CredentialPool(provider, parse_keys(*_PROVIDER_ENV[provider]))
+                _pools[provider] = pool
+    return pool
+
+
+def credential_stats() -> Dict[str, List[dict]]:
+    return {provider: get_credential_pool(provider).stats() for provider in _PROVIDER_ENV}
@@ -0,0 +1,389 @@
+"""
+Crisis fast path.
+Messages are screened with patterns compiled once at import, across every
+supported language. Acute hits (self-harm, abuse/assault) are answered at once with a
+pre-rendered, localized message and helplines; there is no Cohere or Gemini round trip.
+Messaging channels can follow up with a model reply afterwards. Trauma terms
+(PTSD, flashbacks) are detected too; they raise scheduling priority but still
+get a full answer.
+"""
+
+import os
+import re
+from typing import Dict, Optional
+
+from backend.logs import get_logger
+
+log = get_logger(__name__)
+
+CATEGORY_SELF_HARM = "self_harm"
+CATEGORY_ABUSE = "abuse"
+CATEGORY_TRAUMA = "trauma"
+ACUTE_CATEGORIES = (CATEGORY_SELF_HARM, CATEGORY_ABUSE)
+
+# Who a "beats me" / "hits me" is about; on their own those phrases are also idioms ("Beats me, ...")
+_ABUSERS = ("he", "she", "my husband", "my wife", "my partner", "my boyfriend", "my girlfriend", "my father",
+            "my mother", "my dad", "my mom", "my stepfather", "my stepmother", "my brother", "my uncle", "my boss")
+
+# Crisis terms from NEGATIVE_WORDS and the trauma keywords of get_fallback_response, per language
+CRISIS_TERMS = {
+    "en": {
+        CATEGORY_SELF_HARM: ["suicide", "suicidal", "kill myself", "killing myself", "end my life", "ending my life",
+                             "want to die", "wanna die", "better off dead", "self-harm", "self harm", "harm myself",
+                             "hurt myself", "hurting myself", "cut myself", "cutting myself", "no reason to live",
+                             "take my own life", "don't want to live", "dont want to live"],
+        CATEGORY_ABUSE: ["abused", "abusing me", "abusive", "assaulted", "sexual assault", "raped", "molested",
+                         "domestic violence"] + [f"{who} {verb} me" for who in _ABUSERS for verb in ("beats", "hits")],
+        # Bare "abuse"/"assault" also cover "substance abuse" and the like
+        CATEGORY_TRAUMA: ["ptsd", "trauma", "traumatic", "traumatized", "flashback", "flashbacks", "triggered",
+                          "abuse", "assault"],
+    },
+    "hi": {
+        CATEGORY_SELF_HARM: ["आत्महत्या", "खुदकुशी", "ख़ुदकुशी", "मरना चाहता", "मरना चाहती", "जान देना", "जान दे दूं",
+                             "खुद को नुकसान", "जीना नहीं चाहता", "जीना नहीं चाहती", "aatmahatya", "khudkushi",
+                             "marna chahta", "marna chahti", "jaan dena"],
+        CATEGORY_ABUSE: ["दुर्व्यवहार", "शोषण", "बलात्कार", "मारपीट", "यौन उत्पीड़न"],
+        CATEGORY_TRAUMA: ["सदमा", "आघात"],
+    },
+    "mr": {
+        CATEGORY_SELF_HARM: ["मरायचे आहे", "मरायचं आहे", "जीव द्यायचा"],
+        CATEGORY_ABUSE: ["अत्याचार", "छळ"],
+    },
+    "bn": {
+        CATEGORY_SELF_HARM: ["আত্মহত্যা", "মরে যেতে চাই", "নিজেকে শেষ", "নিজের ক্ষতি", "বাঁচতে চাই না"],
+        CATEGORY_ABUSE: ["নির্যাতন", "ধর্ষণ", "যৌন হয়রানি"],
+        CATEGORY_TRAUMA: ["ট্রমা"],
+    },
+    "ta": {
+        CATEGORY_SELF_HARM: ["தற்கொலை", "சாக வேண்டும்", "சாகணும்", "என்னை நானே காயப்படுத்த"],
+        CATEGORY_ABUSE: ["துஷ்பிரயோகம்", "பாலியல் வன்கொடுமை", "வன்முறை"],
+    },
+    "te": {
+        CATEGORY_SELF_HARM: ["ఆత్మహత్య", "చనిపోవాలని", "చచ్చిపోవాలని"],
+        CATEGORY_ABUSE: ["వేధింపు", "అత్యాచారం", "హింస"],
+    },
+    "gu": {
+        CATEGORY_SELF_HARM: ["આત્મહત્યા", "મરી જવું છે", "મરવું છે"],
+        CATEGORY_ABUSE: ["દુર્વ્યવહાર", "બળાત્કાર", "શોષણ"],
+    },
+    "pa": {
+        CATEGORY_SELF_HARM: ["ਖੁਦਕੁਸ਼ੀ", "ਆਤਮਹੱਤਿਆ", "ਮਰਨਾ ਚਾਹੁੰਦਾ", "ਮਰਨਾ ਚਾਹੁੰਦੀ"],
+        CATEGORY_ABUSE: ["ਸ਼ੋਸ਼ਣ", "ਬਲਾਤਕਾਰ", "ਕੁੱਟਮਾਰ"],
+    },
+    "kn": {
+        CATEGORY_SELF_HARM: ["ಆತ್ಮಹತ್ಯೆ", "ಸಾಯಬೇಕು", "ಸಾಯಲು ಬಯಸುತ್ತೇನೆ"],
+        CATEGORY_ABUSE: ["ದೌರ್ಜನ್ಯ", "ಅತ್ಯಾಚಾರ", "ಕಿರುಕುಳ"],
+    },
+    "ml": {
+        CATEGORY_SELF_HARM: ["ആത്മഹത്യ", "മരിക്കണം", "മരിക്കാൻ തോന്നുന്നു"],
+        CATEGORY_ABUSE: ["പീഡനം", "ബലാത്സംഗം"],
+    },
+    "ur": {
+        CATEGORY_SELF_HARM: ["خودکشی", "مرنا چاہتا", "مرنا چاہتی", "اپنی جان لے"],
+        CATEGORY_ABUSE: ["زیادتی", "تشدد", "جنسی ہراسانی"],
+    },
+    "ar": {
+        CATEGORY_SELF_HARM: ["انتحار", "أريد أن أموت", "اريد ان اموت", "أقتل نفسي", "اقتل نفسي", "إيذاء نفسي"],
+        CATEGORY_ABUSE: ["اغتصاب", "إساءة", "اعتداء", "عنف أسري"],
+        CATEGORY_TRAUMA: ["صدمة نفسية"],
+    },
+    "es": {
+        CATEGORY_SELF_HARM: ["suicidio", "suicidarme", "matarme", "quiero morir", "quiero morirme", "hacerme daño",
+                             "autolesión", "autolesion", "no quiero vivir"],
+        CATEGORY_ABUSE: ["abusó de mí", "violación", "violada", "violado", "agresión sexual", "me pega"],
+        CATEGORY_TRAUMA: ["trauma", "traumático", "estrés postraumático", "abuso"],
+    },
+    "fr": {
+        CATEGORY_SELF_HARM: ["me suicider", "suicidaire", "me tuer", "envie de mourir", "veux mourir",
+                             "me faire du mal", "automutilation"],
+        CATEGORY_ABUSE: ["violée", "violé", "agression sexuelle", "me frappe", "violence conjugale"],
+        CATEGORY_TRAUMA: ["traumatisme", "stress post-traumatique", "abus"],
+    },
+    "de": {
+        CATEGORY_SELF_HARM: ["selbstmord", "suizid", "mich umbringen", "will sterben", "sterben will",
+                             "mir wehtun", "selbstverletzung", "nicht mehr leben"],
+        CATEGORY_ABUSE: ["missbrauch", "missbraucht", "vergewaltigt", "vergewaltigung", "schlägt mich",
+                         "häusliche gewalt"],
+        CATEGORY_TRAUMA: ["traumatisiert", "ptbs"],
+    },
+    "it": {
+        CATEGORY_SELF_HARM: ["suicidio", "uccidermi", "ammazzarmi", "voglio morire", "farmi del male", "autolesionismo"],
+        CATEGORY_ABUSE: ["abusata", "abusato", "stupro", "violentata", "violenza domestica", "mi picchia"],
+        CATEGORY_TRAUMA: ["traumatizzato", "traumatizzata", "abuso"],
+    },
+    "pt": {
+        CATEGORY_SELF_HARM: ["suicídio", "suicidio", "me matar", "quero morrer", "me machucar", "automutilação",
+                             "não quero viver"],
+        CATEGORY_ABUSE: ["abusada", "abusado", "estupro", "estuprada", "violência doméstica", "me bate"],
+        CATEGORY_TRAUMA: ["traumatizado", "traumatizada", "abuso"],
+    },
+    "ru": {
+        CATEGORY_SELF_HARM: ["самоубийство", "суицид", "покончить с собой", "убить себя", "хочу умереть",
+                             "не хочу жить", "причинить себе вред"],
+        CATEGORY_ABUSE: ["насилие", "изнасилование", "изнасиловали", "избивает"],
+        CATEGORY_TRAUMA: ["травма", "птср"],
+    },
+    "ja": {
+        CATEGORY_SELF_HARM: ["自殺", "死にたい", "消えたい", "自傷", "リストカット"],
+        CATEGORY_ABUSE: ["虐待", "暴行", "レイプ", "性被害", "暴力を受け"],
+        CATEGORY_TRAUMA: ["トラウマ", "フラッシュバック"],
+    },
+    "ko": {
+        CATEGORY_SELF_HARM: ["자살", "죽고 싶", "자해", "살고 싶지 않"],
+        CATEGORY_ABUSE: ["학대", "폭행", "성폭행", "가정폭력"],
+        CATEGORY_TRAUMA: ["트라우마"],
+    },
+    "zh": {
+        CATEGORY_SELF_HARM: ["自杀", "自殺", "想死", "不想活", "自残", "自殘", "轻生", "輕生"],
+        CATEGORY_ABUSE: ["虐待", "性侵", "强奸", "強姦", "家暴"],
+        CATEGORY_TRAUMA: ["创伤", "創傷", "闪回"],
+    },
+}
+
+# Idioms that contain a crisis term but mean nothing of the kind; they are
+# blanked out before a match is accepted
+CRISIS_IDIOMS = {
+    "en": ["kill myself laughing", "killing myself laughing", "killed myself laughing",
+           "kill myself with laughter", "die laughing", "die of laughter"],
+    "es": ["morir de risa", "morirme de risa"],
+    "fr": ["mourir de rire"],
+    "it": ["morire dal ridere"],
+    "pt": ["morrer de rir"],
+}
+
+HELPLINES = {
+    CATEGORY_SELF_HARM: (
+        "📞 India: Tele-MANAS 14416 (24/7) | Emergency: 112\n"
+        "📞 US: 988 Suicide & Crisis Lifeline | Text HOME to 741741 | Emergency: 911\n"
+        "🌍 Elsewhere: https://findahelpline.com"
+    ),
+    CATEGORY_ABUSE: (
+        "📞 India: Women Helpline 181 | Childline 1098 | Emergency: 112\n"
+        "📞 US: Sexual Assault Hotline 1-800-656-4673 | Domestic Violence Hotline 1-800-799-7233 | Emergency: 911\n"
+        "🌍 Elsewhere: https://findahelpline.com"
+    ),
+}
+
+CRISIS_MESSAGES = {
+    "en": {
+        CATEGORY_SELF_HARM: "I'm really glad you told me, and I'm taking this seriously. You don't have to go through this alone — please reach out to a crisis line right now, or to someone you trust who can be with you. If you are in immediate danger, call emergency services.",
+        CATEGORY_ABUSE: "I'm so sorry this is happening to you. It is not your fault, and you deserve to be safe. If you are in danger right now, please call emergency services; these helplines can support you confidentially.",
+    },
+    "hi": {
+        CATEGORY_SELF_HARM: "मुझे खुशी है कि आपने मुझे बताया, और मैं इसे गंभीरता से ले रहा हूं। आपको यह अकेले नहीं झेलना है — कृपया अभी किसी हेल्पलाइन या किसी भरोसेमंद व्यक्ति से संपर्क करें। अगर आप तुरंत खतरे में हैं, तो आपातकालीन सेवा को कॉल करें।",
+        CATEGORY_ABUSE: "मुझे बहुत दुख है कि आपके साथ ऐसा हो रहा है। यह आपकी गलती नहीं है, और आप सुरक्षित रहने के हकदार हैं। अगर आप अभी खतरे में हैं, तो कृपया आपातकालीन सेवा को कॉल करें; ये हेल्पलाइन गोपनीय रूप से आपकी मदद कर सकती हैं।",
+    },
+    "mr": {
+        CATEGORY_SELF_HARM: "तुम्ही मला सांगितलंत याचा मला आनंद आहे, आणि मी हे गांभीर्याने घेत आहे. तुम्हाला हे एकट्याने सहन करायची गरज नाही — कृपया आत्ताच हेल्पलाइनशी किंवा विश्वासू व्यक्तीशी संपर्क साधा. तुम्ही तात्काळ धोक्यात असाल तर आपत्कालीन सेवेला कॉल करा.",
+        CATEGORY_ABUSE: "तुमच्यासोबत असं होत आहे याचं मला खूप वाईट वाटतं. ही तुमची चूक नाही, आणि तुम्ही सुरक्षित राहण्यास पात्र आहात. तुम्ही आत्ता धोक्यात असाल तर कृपया आपत्कालीन सेवेला कॉल करा.",
+    },
+    "bn": {
+        CATEGORY_SELF_HARM: "আপনি আমাকে বলেছেন বলে আমি কৃতজ্ঞ, এবং আমি বিষয়টি গুরুত্ব দিয়ে নিচ্ছি। আপনাকে একা এর মধ্য দিয়ে যেতে হবে না — অনুগ্রহ করে এখনই একটি হেল্পলাইন বা বিশ্বস্ত কারও সঙ্গে যোগাযোগ করুন। আপনি তাৎক্ষণিক বিপদে থাকলে জরুরি পরিষেবায় ফোন করুন।",
+        CATEGORY_ABUSE: "আপনার সঙ্গে এমন হচ্ছে জেনে আমি খুবই দুঃখিত। এটি আপনার দোষ নয়, এবং আপনি নিরাপদ থাকার অধিকারী। এখন বিপদে থাকলে অনুগ্রহ করে জরুরি পরিষেবায় ফোন করুন।",
+    },
+    "ta": {
+        CATEGORY_SELF_HARM: "நீங்கள் என்னிடம் சொன்னதற்கு நன்றி, இதை நான் தீவிரமாக எடுத்துக்கொள்கிறேன். இதை நீங்கள் தனியாக எதிர்கொள்ள வேண்டியதில்லை — தயவுசெய்து இப்போதே ஒரு உதவி எண்ணையோ நம்பிக்கையான ஒருவரையோ தொடர்புகொள்ளுங்கள். உடனடி ஆபத்தில் இருந்தால் அவசர சேவையை அழைக்கவும்.",
+        CATEGORY_ABUSE: "உங்களுக்கு இப்படி நடப்பதற்கு மிகவும் வருந்துகிறேன். இது உங்கள் தவறு அல்ல, நீங்கள் பாதுகாப்பாக இருக்க தகுதியானவர். இப்போது ஆபத்தில் இருந்தால் அவசர சேவையை அழைக்கவும்.",
+    },
+    "te": {
+        CATEGORY_SELF_HARM: "మీరు నాకు చెప్పినందుకు సంతోషం, దీన్ని నేను తీవ్రంగా తీసుకుంటున్నాను. మీరు దీన్ని ఒంటరిగా ఎదుర్కోవాల్సిన అవసరం లేదు — దయచేసి ఇప్పుడే హెల్ప్‌లైన్‌ను లేదా నమ్మకమైన వ్యక్తిని సంప్రదించండి. తక్షణ ప్రమాదంలో ఉంటే అత్యవసర సేవలకు కాల్ చేయండి.",
+        CATEGORY_ABUSE: "మీకు ఇలా జరుగుతున్నందుకు చాలా బాధగా ఉంది. ఇది మీ తప్పు కాదు, మీరు సురక్షితంగా ఉండటానికి అర్హులు. ఇప్పుడు ప్రమాదంలో ఉంటే అత్యవసర సేవలకు కాల్ చేయండి.",
+    },
+    "gu": {
+        CATEGORY_SELF_HARM: "તમે મને કહ્યું તે બદલ આભાર, અને હું આને ગંભીરતાથી લઉં છું. તમારે આ એકલા સહન કરવાની જરૂર નથી — કૃપા કરીને હમણાં જ હેલ્પલાઇન અથવા વિશ્વાસુ વ્યક્તિનો સંપર્ક કરો. તાત્કાલિક જોખમમાં હો તો ઇમરજન્સી સેવાને કૉલ કરો.",
+        CATEGORY_ABUSE: "તમારી સાથે આવું થઈ રહ્યું છે તે માટે મને ખૂબ દુઃખ છે. આ તમારી ભૂલ નથી, અને તમે સુરક્ષિત રહેવાને લાયક છો. હમણાં જોખમમાં હો તો ઇમરજન્સી સેવાને કૉલ કરો.",
+    },
+    "pa": {
+        CATEGORY_SELF_HARM: "ਮੈਨੂੰ ਖੁਸ਼ੀ ਹੈ ਕਿ ਤੁਸੀਂ ਮੈਨੂੰ ਦੱਸਿਆ, ਅਤੇ ਮੈਂ ਇਸਨੂੰ ਗੰਭੀਰਤਾ ਨਾਲ ਲੈ ਰਿਹਾ ਹਾਂ। ਤੁਹਾਨੂੰ ਇਹ ਇਕੱਲੇ ਨਹੀਂ ਝੱਲਣਾ ਪਵੇਗਾ — ਕਿਰਪਾ ਕਰਕੇ ਹੁਣੇ ਹੈਲਪਲਾਈਨ ਜਾਂ ਕਿਸੇ ਭਰੋਸੇਮੰਦ ਵਿਅਕਤੀ ਨਾਲ ਸੰਪਰਕ ਕਰੋ। ਜੇ ਤੁਸੀਂ ਫੌਰੀ ਖ਼ਤਰੇ ਵਿੱਚ ਹੋ ਤਾਂ ਐਮਰਜੈਂਸੀ ਸੇਵਾ ਨੂੰ ਕਾਲ ਕਰੋ।",
+        CATEGORY_ABUSE: "ਮੈਨੂੰ ਬਹੁਤ ਦੁੱਖ ਹੈ ਕਿ ਤੁਹਾਡੇ ਨਾਲ ਇਹ ਹੋ ਰਿਹਾ ਹੈ। ਇਹ ਤੁਹਾਡੀ ਗਲਤੀ ਨਹੀਂ ਹੈ, ਅਤੇ ਤੁਸੀਂ ਸੁਰੱਖਿਅਤ ਰਹਿਣ ਦੇ ਹੱਕਦਾਰ ਹੋ। ਜੇ ਤੁਸੀਂ ਹੁਣ ਖ਼ਤਰੇ ਵਿੱਚ ਹੋ ਤਾਂ ਐਮਰਜੈਂਸੀ ਸੇਵਾ ਨੂੰ ਕਾਲ ਕਰੋ।",
+    },
+    "kn": {
+        CATEGORY_SELF_HARM: "ನೀವು ನನಗೆ ಹೇಳಿದ್ದಕ್ಕೆ ಧನ್ಯವಾದಗಳು, ನಾನು ಇದನ್ನು ಗಂಭೀರವಾಗಿ ತೆಗೆದುಕೊಳ್ಳುತ್ತೇನೆ. ನೀವು ಇದನ್ನು ಒಬ್ಬರೇ ಎದುರಿಸಬೇಕಿಲ್ಲ — ದಯವಿಟ್ಟು ಈಗಲೇ ಸಹಾಯವಾಣಿ ಅಥವಾ ನಂಬಿಕಸ್ಥರನ್ನು ಸಂಪರ್ಕಿಸಿ. ತಕ್ಷಣದ ಅಪಾಯದಲ್ಲಿದ್ದರೆ ತುರ್ತು ಸೇವೆಗೆ ಕರೆ ಮಾಡಿ.",
+        CATEGORY_ABUSE: "ನಿಮಗೆ ಹೀಗಾಗುತ್ತಿರುವುದಕ್ಕೆ ತುಂಬಾ ವಿಷಾದವಿದೆ. ಇದು ನಿಮ್ಮ ತಪ್ಪಲ್ಲ, ನೀವು ಸುರಕ್ಷಿತವಾಗಿರಲು ಅರ್ಹರು. ಈಗ ಅಪಾಯದಲ್ಲಿದ್ದರೆ ತುರ್ತು ಸೇವೆಗೆ ಕರೆ ಮಾಡಿ.",
+    },
+    "ml": {
+        CATEGORY_SELF_HARM: "നിങ്ങൾ എന്നോട് പറഞ്ഞതിൽ സന്തോഷം, ഞാൻ ഇത് ഗൗരവമായി എടുക്കുന്നു. നിങ്ങൾ ഇത് ഒറ്റയ്ക്ക് നേരിടേണ്ടതില്ല — ദയവായി ഇപ്പോൾ തന്നെ ഒരു ഹെൽപ്‌ലൈനുമായോ വിശ്വസ്തനായ ഒരാളുമായോ ബന്ധപ്പെടുക. ഉടനടി അപകടത്തിലാണെങ്കിൽ അടിയന്തര സേവനത്തെ വിളിക്കുക.",
+        CATEGORY_ABUSE: "നിങ്ങൾക്ക് ഇങ്ങനെ സംഭവിക്കുന്നതിൽ വളരെ ഖേദമുണ്ട്. ഇത് നിങ്ങളുടെ തെറ്റല്ല, നിങ്ങൾ സുരക്ഷിതരായിരിക്കാൻ അർഹരാണ്. ഇപ്പോൾ അപകടത്തിലാണെങ്കിൽ അടിയന്തര സേവനത്തെ വിളിക്കുക.",
+    },
+    "ur": {
+        CATEGORY_SELF_HARM: "مجھے خوشی ہے کہ آپ نے مجھے بتایا، اور میں اسے سنجیدگی سے لے رہا ہوں۔ آپ کو یہ اکیلے برداشت نہیں کرنا — براہ کرم ابھی کسی ہیلپ لائن یا قابلِ اعتماد شخص سے رابطہ کریں۔ اگر آپ فوری خطرے میں ہیں تو ایمرجنسی سروس کو کال کریں۔",
+        CATEGORY_ABUSE: "مجھے بہت افسوس ہے کہ آپ کے ساتھ ایسا ہو رہا ہے۔ یہ آپ کی غلطی نہیں، اور آپ محفوظ رہنے کے حقدار ہیں۔ اگر آپ ابھی خطرے میں ہیں تو براہ کرم ایمرجنسی سروس کو کال کریں۔",
+    },
+    "ar": {
+        CATEGORY_SELF_HARM: "أنا ممتن لأنك أخبرتني، وأنا آخذ الأمر بجدية. لست مضطرًا لمواجهة هذا وحدك — من فضلك تواصل الآن مع خط مساعدة أو مع شخص تثق به. إذا كنت في خطر فوري، اتصل بخدمات الطوارئ.",
+        CATEGORY_ABUSE: "أنا آسف جدًا لما يحدث لك. هذا ليس خطأك، وأنت تستحق أن تكون آمنًا. إذا كنت في خطر الآن، يرجى الاتصال بخدمات الطوارئ.",
+    },
+    "es": {
+        CATEGORY_SELF_HARM: "Me alegra mucho que me lo hayas contado, y lo tomo en serio. No tienes que pasar por esto solo/a: por favor, contacta ahora con una línea de ayuda o con alguien de confianza. Si estás en peligro inmediato, llama a emergencias.",
+        CATEGORY_ABUSE: "Siento muchísimo que te esté pasando esto. No es tu culpa y mereces estar a salvo. Si estás en peligro ahora, llama a emergencias; estas líneas pueden ayudarte de forma confidencial.",
+    },
+    "fr": {
+        CATEGORY_SELF_HARM: "Je suis vraiment content que tu m'en parles, et je le prends au sérieux. Tu n'as pas à traverser ça seul·e : contacte dès maintenant une ligne d'écoute ou une personne de confiance. Si tu es en danger immédiat, appelle les secours.",
+        CATEGORY_ABUSE: "Je suis vraiment désolé que cela t'arrive. Ce n'est pas de ta faute, et tu mérites d'être en sécurité. Si tu es en danger maintenant, appelle les secours ; ces lignes peuvent t'aider en toute confidentialité.",
+    },
+    "de": {
+        CATEGORY_SELF_HARM: "Ich bin froh, dass du es mir erzählst, und ich nehme das ernst. Du musst das nicht allein durchstehen – bitte wende dich jetzt an eine Krisenhotline oder an jemanden, dem du vertraust. Wenn du in akuter Gefahr bist, ruf den Notruf.",
+        CATEGORY_ABUSE: "Es tut mir sehr leid, dass dir das passiert. Es ist nicht deine Schuld, und du verdienst es, sicher zu sein. Wenn du gerade in Gefahr bist, ruf bitte den Notruf; diese Hotlines helfen dir vertraulich.",
+    },
+    "it": {
+        CATEGORY_SELF_HARM: "Sono davvero contento che tu me l'abbia detto, e lo prendo sul serio. Non devi affrontarlo da solo/a: per favore contatta subito una linea di aiuto o una persona di fiducia. Se sei in pericolo immediato, chiama i soccorsi.",
+        CATEGORY_ABUSE: "Mi dispiace davvero che ti stia succedendo. Non è colpa tua e meriti di essere al sicuro. Se sei in pericolo ora, chiama i soccorsi; queste linee possono aiutarti in modo riservato.",
+    },
+    "pt": {
+        CATEGORY_SELF_HARM: "Fico muito feliz que você me contou, e estou levando isso a sério. Você não precisa passar por isso sozinho(a) — por favor, procure agora uma linha de apoio ou alguém de confiança. Se estiver em perigo imediato, ligue para a emergência.",
+        CATEGORY_ABUSE: "Sinto muito que isso esteja acontecendo com você. Não é culpa sua, e você merece estar em segurança. Se estiver em perigo agora, ligue para a emergência; estas linhas podem ajudar com sigilo.",
+    },
+    "ru": {
+        CATEGORY_SELF_HARM: "Я очень рад, что ты рассказал(а) мне, и отношусь к этому серьёзно. Тебе не нужно проходить через это в одиночку — пожалуйста, прямо сейчас обратись на линию помощи или к человеку, которому доверяешь. Если ты в непосредственной опасности, звони в экстренные службы.",
+        CATEGORY_ABUSE: "Мне очень жаль, что с тобой это происходит. Это не твоя вина, и ты заслуживаешь безопасности. Если ты сейчас в опасности, позвони в экстренные службы; эти линии помогут конфиденциально.",
+    },
+    "ja": {
+        CATEGORY_SELF_HARM: "話してくれて本当にありがとう。真剣に受け止めています。一人で抱え込まなくて大丈夫です。今すぐ相談窓口か、信頼できる人に連絡してください。差し迫った危険がある場合は、緊急通報してください。",
+        CATEGORY_ABUSE: "つらい思いをしていて本当に心が痛みます。あなたのせいではありません。あなたは安全でいるべき人です。今危険な状態なら緊急通報してください。これらの窓口は秘密を守って支えてくれます。",
+    },
+    "ko": {
+        CATEGORY_SELF_HARM: "말해줘서 정말 고마워요. 진지하게 받아들이고 있어요. 혼자 견디지 않아도 돼요 — 지금 바로 상담전화나 믿을 수 있는 사람에게 연락해 주세요. 당장 위험하다면 긴급 구조를 요청하세요.",
+        CATEGORY_ABUSE: "이런 일을 겪고 있다니 정말 마음이 아파요. 당신의 잘못이 아니에요. 당신은 안전할 자격이 있어요. 지금 위험하다면 긴급 구조를 요청하세요. 이 상담전화들이 비밀을 지키며 도와줄 거예요.",
+    },
+    "zh": {
+        CATEGORY_SELF_HARM: "很高兴你愿意告诉我，我会认真对待。你不必独自面对这些——请现在就联系心理援助热线或你信任的人。如果你正处于紧急危险中，请立即拨打急救电话。",
+        CATEGORY_ABUSE: "听到你遭遇这些，我真的很难过。这不是你的错，你值得安全。如果你现在有危险，请拨打紧急电话；这些热线可以为你保密并提供帮助。",
+    },
+}
+
+# Latin-script terms need word boundaries ("rape" must not match "grapes");
+# other scripts are matched as substrings since \b is unreliable around combining marks
+_LATIN = re.compile(r"^[\x00-ɏ]+$")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, straighten apostrophes and collapse whitespace"""
+    return " ".join(text.lower().replace("’", "'").split())
+
+
+def _trie_pattern(terms) -> str:
+    """
+    Alternation arranged as a prefix trie, so the regex engine tests one
+    character class per position instead of every term in turn.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        if list(node) == [""]:
+            return ""
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        # Longer continuations are tried first, so the most specific phrase wins
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def _pattern(terms):
+    latin = [t for t in terms if _LATIN.match(t)]
+    other = [t for t in terms if not _LATIN.match(t)]
+    parts = []
+    if latin:
+        parts.append(rf"\b{_trie_pattern(latin)}\b")
+    if other:
+        parts.append(_trie_pattern(other))
+    return re.compile("|".join(parts))
+
+
+def _compile(categories):
+    terms = {}
+    for language, by_category in CRISIS_TERMS.items():
+        for category in categories:
+            for term in by_category.get(category, ()):
+                # A term shared by several languages answers in the first one listed
+                terms.setdefault(normalize_text(term), (category, language))
+    return _pattern(terms), terms
+
+
+_ACUTE_RE, _ACUTE_TERMS = _compile(ACUTE_CATEGORIES)
+_TRAUMA_RE, _TRAUMA_TERMS = _compile((CATEGORY_TRAUMA,))
+_IDIOM_RE = _pattern({normalize_text(idiom) for idioms in CRISIS_IDIOMS.values() for idiom in idioms})
+
+
+class CrisisMatch:
+    __slots__ = ("category", "term", "language")
+
+    def __init__(self, category: str, term: str, language: str):
+        self.category = category
+        self.term = term
+        self.language = language
+
+    @property
+    def acute(self) -> bool:
+        return self.category in ACUTE_CATEGORIES
+
+
+def detect_crisis(text: str) -> Optional[CrisisMatch]:
+    """Return the crisis category found in `text`, acute categories taking precedence"""
+    if not text:
+        return None
+    return detect_crisis_normalized(normalize_text(text))
+
+
+def detect_crisis_normalized(text: str) -> Optional[CrisisMatch]:
+    """detect_crisis for text already passed through normalize_text"""
+    for pattern, terms in ((_ACUTE_RE, _ACUTE_TERMS), (_TRAUMA_RE, _TRAUMA_TERMS)):
+        match = pattern.search(text)
+        if match and _IDIOM_RE.search(text):
+            # Only a hit pays for the idiom check
+            match = pattern.search(_IDIOM_RE.sub(" ", text))
+        if match:
+            category, language = terms[match.group()]
+            return CrisisMatch(category, match.group(), language)
+    return None
+
+
+def _render() -> Dict[tuple, str]:
+    return {
+        (language, category): f"{text}\n\n{HELPLINES[category]}"
+        for language, messages in CRISIS_MESSAGES.items()
+        for category, text in messages.items()
+    }
+
+
+_RESPONSES = _render()
+
+
+def crisis_response(match: CrisisMatch, language: str = None) -> Optional[str]:
+    """Pre-rendered localized reply for an acute match (None for trauma-only matches)"""
+    if not match.acute:
+        return None
+    language = language if language and language != "auto" else match.language
+    return _RESPONSES.get((language, match.category)) or _RESPONSES[("en", match.category)]
+
+
+CRISIS_FOLLOWUP = os.getenv("CRISIS_FOLLOWUP", "true").lower() in ("1", "true", "yes")
+
+_FOLLOWUP_PROMPT = (
+    "You are AUDEXA, a compassionate mental health assistant. The user may be in crisis and has already "
+    "been given helpline numbers. Reply in {language} with 2-3 short, calm sentences: acknowledge what "
+    "they said, ask one gentle question about their immediate safety, and encourage them to contact "
+    "the helpline or someone they trust. Do not repeat the phone numbers.\n\nUSER: {text}\nASSISTANT:"
+)
+
+
+def crisis_followup(text: str, language: str = "en") -> Optional[str]:
+    """Model-written follow-up for after the instant reply; None if disabled or unavailable"""
+    if not CRISIS_FOLLOWUP:
+        return None
+    from backend.gemini import gemini_configured, generate_content
+    from backend.scheduler import PRIORITY_CRISIS
+
+    if not gemini_configured():
+        return None
+    try:
+        result = generate_content(_FOLLOWUP_PROMPT.format(language=language, text=text), priority=PRIORITY_CRISIS)
+        return (getattr(result, "text", "") or "").strip() or None
+    except Exception as e:
+        log.warning("Crisis follow-up failed", error=str(e))
+        return None
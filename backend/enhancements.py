@@ -0,0 +1,129 @@
+"""
+Career and music enhancements appended to GeminiBot replies.
+Every enhancement is one entry in ENHANCEMENTS. The keywords of all entries
+are compiled once into a single keyword index, so matching a message is one
+pass over its tokens however many entries there are. Career snippets are
+rendered in English once at import and served in the user's language from
+the translated snippet catalog (built with the fallback replies, see
+backend/fallback_catalog.py), in English until it has been built; playlists
+are picked from the music catalog for each session, so nobody is sent the
+same three songs every time.
+
+Entry fields:
+  intent    unique name, also the snippet cache key
+  keywords  words or phrases that select the entry (none: always, given `requires`)
+  requires  another intent that must also match (music moods need a music request)
+  group     at most one entry per group is used, the first listed that matches
+  render    language -> snippet text (rendered in English; translations come from the catalog)
+  playlist  a mood from the music catalog (None: the mix), picked fresh for each session
+"""
+
+import os
+from typing import Optional
+
+from backend.analysis import MessageAnalysis
+from backend.career_guidance import career_guidance
+from backend.fallback_catalog import CATALOG_DIR, FallbackCatalog
+from backend.keyword_router import KeywordRouter
+from backend.music import playlist
+
+
+def _numbered(heading: str, items) -> str:
+    return f"\n\n{heading}\n" + "".join(f"{i}. {item}\n" for i, item in enumerate(items[:3], 1))
+
+
+def _industry(industry: str) -> str:
+    insights = career_guidance.get_industry_insights(industry)
+    return (
+        f"\n\n{industry.title()} — quick view:\n"
+        f"Roles: {', '.join(insights['trending_roles'][:3])}\n"
+        f"Skills: {', '.join(insights['in_demand_skills'][:3])}\n"
+        f"Pay: {insights['salary_range']}\n"
+        f"Outlook: {insights['growth_prospects']}\n"
+    )
+
+
+MUSIC_KEYWORDS = [
+    "music", "song", "songs", "playlist", "recommend music", "music recommendation", "what music",
+    "suggest music", "play music", "listen to music", "music suggestions", "recommend songs", "suggest songs",
+    "music for", "songs for", "playlist for", "music to", "songs to", "listen", "play", "audio", "soundtrack",
+    "melody", "tune", "track", "album", "artist", "band", "singer",
+]
+
+ENHANCEMENTS = [
+    {"intent": "career_assessment", "keywords": ["career assessment", "what should i do", "career path", "career choice"],
+     "render": lambda lang: _numbered("Career check-in — consider:", career_guidance.get_career_assessment_questions())},
+    {"intent": "resume", "keywords": ["resume", "cv", "curriculum vitae"],
+     "render": lambda lang: _numbered("Resume — quick tips:", career_guidance.get_career_resources("resume_tips"))},
+    {"intent": "interview", "keywords": ["interview", "interviewing", "job interview"],
+     "render": lambda lang: _numbered("Interview — do this:",
+                                      career_guidance.get_career_resources("interview_preparation"))},
+    {"intent": "job_search", "keywords": ["job search", "finding a job", "looking for work"],
+     "render": lambda lang: _numbered("Try these platforms:",
+                                      career_guidance.get_career_resources("job_search_platforms"))},
+    {"intent": "skills", "keywords": ["skills", "learning", "training", "development"],
+     "render": lambda lang: _numbered("Level up — learn here:",
+                                      career_guidance.get_career_resources("skill_development"))},
+    {"intent": "salary", "keywords": ["salary", "negotiation", "pay", "compensation"],
+     "render": lambda lang: _numbered("Negotiation — keep in mind:", career_guidance.get_salary_negotiation_tips())},
+    {"intent": "work_life_balance", "keywords": ["work life balance", "work-life balance", "burnout", "stress at work"],
+     "render": lambda lang: _numbered("Balance — quick ideas:", career_guidance.get_work_life_balance_tips())},
+    {"intent": "industry_technology", "group": "industry", "keywords": ["technology"],
+     "render": lambda lang: _industry("technology")},
+    {"intent": "industry_healthcare", "group": "industry", "keywords": ["healthcare"],
+     "render": lambda lang: _industry("healthcare")},
+    {"intent": "industry_finance", "group": "industry", "keywords": ["finance"],
+     "render": lambda lang: _industry("finance")},
+    {"intent": "industry_marketing", "group": "industry", "keywords": ["marketing"],
+     "render": lambda lang: _industry("marketing")},
+
+    {"intent": "music", "keywords": MUSIC_KEYWORDS},
+    {"intent": "music_uplifting", "requires": "music", "group": "music", "playlist": "uplifting",
+     "keywords": ["sad", "depressed", "down", "blue", "upset", "crying"]},
+    {"intent": "music_calming", "requires": "music", "group": "music", "playlist": "calming",
+     "keywords": ["stressed", "anxious", "worried", "tense", "overwhelmed"]},
+    {"intent": "music_energetic", "requires": "music", "group": "music", "playlist": "energetic",
+     "keywords": ["happy", "excited", "energetic", "pumped", "motivated"]},
+    # No mood named: one song from each mood in the mix
+    {"intent": "music_mix", "requires": "music", "group": "music", "playlist": None, "keywords": []},
+]
+
+_ENTRIES = tuple(
+    (e["intent"], bool(e["keywords"]), e.get("requires"), e.get("group"), e.get("render"), "playlist" in e,
+     e.get("playlist"))
+    for e in ENHANCEMENTS
+)
+_matcher = KeywordRouter([
+    {"intent": e["intent"], "priority": 0, "keywords": e["keywords"]} for e in ENHANCEMENTS if e["keywords"]
+])
+_renderers = {e["intent"]: e["render"] for e in ENHANCEMENTS if e.get("render")}
+
+
+# Rendered once at import, so the first request does not pay for it
+snippet_catalog = FallbackCatalog({intent: render("en") for intent, render in _renderers.items()}, None,
+                                  os.path.join(CATALOG_DIR, "snippets"))
+
+
+def snippet(intent: str, language: str = "en") -> str:
+    """The snippet in `language` when the catalog has it, in English otherwise"""
+    return snippet_catalog.get(language)[0][intent]
+
+
+def enhance(analysis: MessageAnalysis, language: str = "en", session_id: Optional[str] = None) -> Optional[str]:
+    """Snippets for every enhancement the message asks for, in registry order"""
+    matched = _matcher.matches(analysis.tokens)
+    if not matched:
+        return None
+    parts, used_groups = [], set()
+    for intent, has_keywords, requires, group, render, is_playlist, mood in _ENTRIES:
+        if not (render or is_playlist) or (has_keywords and intent not in matched):
+            continue
+        if requires and requires not in matched:
+            continue
+        if group:
+            if group in used_groups:
+                continue
+            used_groups.add(group)
+        # Playlists are picked per session so songs do not repeat; everything else is memoized
+        parts.append(playlist(mood, language, session_id) if is_playlist else snippet(intent, language))
+    return "".join(parts) or None
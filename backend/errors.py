@@ -0,0 +1,53 @@
+"""
+Typed failures of the outside services the app calls: the LLM, sentiment,
+speech-to-text and text-to-speech. Callers pick a fallback from
+failure_reason(error) instead of reading the wording of an error or answer.
+"""
+
+from backend.credentials import CredentialsExhausted, is_auth_error, is_quota_error
+from backend.scheduler import SchedulerBusy
+
+
+class UpstreamError(RuntimeError):
+    """A service call failed; `service` is the boundary (llm, sentiment, asr, tts)"""
+    reason = "error"
+
+    def __init__(self, service: str, message: str = ""):
+        super().__init__(f"{service} {self.reason}: {message}" if message else f"{service} {self.reason}")
+        self.service = service
+
+
+class ServiceNotConfigured(UpstreamError):
+    reason = "not_configured"
+
+
+class UpstreamTimeout(UpstreamError):
+    reason = "timeout"
+
+
+class MalformedResponse(UpstreamError):
+    """The service answered, but not with anything the app can use"""
+    reason = "malformed"
+
+
+class PartialResponse(UpstreamError):
+    """The response was cut off before it was complete"""
+    reason = "partial"
+
+
+def failure_reason(error: BaseException) -> str:
+    """quota, auth, busy, timeout, malformed, partial, not_configured or error"""
+    if isinstance(error, UpstreamError):
+        return error.reason
+    if isinstance(error, CredentialsExhausted):
+        return "quota"
+    if isinstance(error, SchedulerBusy):
+        return "busy"
+    # DeadlineExceeded from the Google clients carries 504
+    if isinstance(error, TimeoutError) or getattr(error, "code", None) in (408, 504):
+        return "timeout"
+    if is_quota_error(error):
+        return "quota"
+    if is_auth_error(error):
+        return "auth"
+    return "error"
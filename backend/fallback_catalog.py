@@ -0,0 +1,166 @@
+"""
+Precomputed translations of the rule-based fallback replies, and of the
+career snippets added to bot replies (backend/enhancements.py).
+The English texts are the source. An offline build step translates every
+intent into each supported language and writes one compact JSON file per
+language under backend/data/fallback/ (the snippets under snippets/ there).
+At runtime a language's file is read on first use and kept in memory, so the
+degraded path answers in the user's language without waiting on a model.
+
+Each translation records a hash of the English text it was made from. When
+the English reply changes, the stale translation is ignored (the English
+reply is served) until the catalog is rebuilt, so outdated advice or
+helpline numbers are never shown.
+
+Build or refresh the catalog (needs GEMINI_KEY / GEMINI_KEYS):
+
+    python -m backend.fallback_catalog              # every language, changed intents only
+    python -m backend.fallback_catalog hi ta --force
+
+The Docker image runs the build when it is given the keys as a build secret:
+
+    docker build --secret id=gemini_keys,env=GEMINI_KEYS .
+
+A language without a catalog file is served in English, with a warning the
+first time it is asked for.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from backend.analysis import LANGUAGE_NAMES
+
+CATALOG_VERSION = 1
+CATALOG_DIR = os.getenv(
+    "FALLBACK_CATALOG_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fallback"),
+)
+# Key of the reply used when no intent matches
+DEFAULT_INTENT = "default"
+
+
+def source_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+class FallbackCatalog:
+    def __init__(self, responses: Dict[str, str], default: Optional[str], directory: str = CATALOG_DIR):
+        # A catalog without a default reply (the enhancement snippets) has only the intents
+        self.source = dict(responses) if default is None else dict(responses, **{DEFAULT_INTENT: default})
+        self.directory = directory
+        self._languages: Dict[str, Tuple[Dict[str, str], Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, language: str) -> str:
+        return os.path.join(self.directory, f"{language}.json")
+
+    def read(self, language: str) -> dict:
+        """The raw catalog file for `language`, or an empty catalog"""
+        try:
+            with open(self.path(language), encoding="utf-8") as f:
+                catalog = json.load(f)
+        except FileNotFoundError:
+            return {"version": CATALOG_VERSION, "language": language, "responses": {}, "sources": {}}
+        if catalog.get("version") != CATALOG_VERSION:
+            print(f"⚠️ Ignoring fallback catalog {language}: version {catalog.get('version')} != {CATALOG_VERSION}")
+            return {"version": CATALOG_VERSION, "language": language, "responses": {}, "sources": {}}
+        return catalog
+
+    def _load(self, language: str) -> Tuple[Dict[str, str], Optional[str]]:
+        if language != "en" and not os.path.exists(self.path(language)):
+            print(f"⚠️ No fallback catalog for {language} in {self.directory}; serving English replies "
+                  f"(build it with: python -m backend.fallback_catalog {language})")
+        catalog = self.read(language)
+        translated, stale = {}, []
+        for intent, english in self.source.items():
+            text = catalog["responses"].get(intent)
+            if text and catalog["sources"].get(intent) == source_hash(english):
+                translated[intent] = text
+            elif text:
+                stale.append(intent)
+        if stale:
+            print(f"⚠️ Fallback catalog {language}: {len(stale)} stale intents served in English ({', '.join(stale)})")
+        merged = dict(self.source, **translated)
+        return merged, merged.pop(DEFAULT_INTENT, None)
+
+    def get(self, language: str) -> Tuple[Dict[str, str], Optional[str]]:
+        """Replies by intent and the default reply in `language`, English where untranslated"""
+        # The language comes from the client: anything else would be a file path and a cache entry
+        if language not in LANGUAGE_NAMES:
+            language = "en"
+        entry = self._languages.get(language)
+        if entry is None:
+            with self._lock:
+                entry = self._languages.get(language)
+                if entry is None:
+                    entry = self._load(language)
+                    self._languages[language] = entry
+        return entry
+
+    def build(self, language: str, translate: Callable[[str, str], str], force: bool = False) -> int:
+        """Translate new or changed intents into `language` and write the file; returns intents translated"""
+        catalog = self.read(language)
+        # Drop intents that no longer exist in the source
+        for intent in set(catalog["responses"]) - set(self.source):
+            catalog["responses"].pop(intent)
+            catalog["sources"].pop(intent, None)
+
+        translated = 0
+        try:
+            for intent, english in self.source.items():
+                digest = source_hash(english)
+                if not force and catalog["sources"].get(intent) == digest and catalog["responses"].get(intent):
+                    continue
+                catalog["responses"][intent] = translate(english, language)
+                catalog["sources"][intent] = digest
+                translated += 1
+        finally:
+            # Keep whatever was translated before a failure; the next build resumes from there
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = self.path(language) + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(catalog, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+            os.replace(tmp, self.path(language))
+            with self._lock:
+                self._languages.pop(language, None)
+        return translated
+
+
+TRANSLATION_PROMPT = """Translate the following mental health support message into {language}.
+Keep the markdown (bold markers, bullets, numbering), emoji, line breaks, phone numbers,
+URLs and organisation names exactly as they are. Return only the translation.
+
+{text}"""
+
+
+def gemini_translate(text: str, language: str) -> str:
+    from backend.gemini import generate_content, response_text
+
+    prompt = TRANSLATION_PROMPT.format(language=LANGUAGE_NAMES.get(language, language), text=text)
+    # Raises MalformedResponse for a blocked or empty answer, so nothing empty is written to the catalog
+    return response_text(generate_content(prompt, "gemini-2.0-flash")).strip()
+
+
+def main(argv: Iterable[str] = None) -> None:
+    import argparse
+
+    from backend.api import fallback_catalog
+    from backend.enhancements import snippet_catalog
+
+    parser = argparse.ArgumentParser(description="Build the translated fallback reply and snippet catalogs")
+    parser.add_argument("languages", nargs="*", help="Language codes (default: every supported language)")
+    parser.add_argument("--force", action="store_true", help="Retranslate intents that are already up to date")
+    args = parser.parse_args(argv)
+
+    languages = args.languages or [code for code in LANGUAGE_NAMES if code != "en"]
+    for language in languages:
+        for catalog in (fallback_catalog, snippet_catalog):
+            translated = catalog.build(language, gemini_translate, force=args.force)
+            print(f"✅ {language}: {translated} intents translated -> {catalog.path(language)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Fault injection at the service boundaries, for checking the fallbacks under
+load. FAULTS lists what to inject at each boundary (llm, sentiment, asr, tts):
+
+    FAULTS="llm:quota=0.2,latency=0.5,jitter=0.2;tts:malformed=0.1,partial=0.1;asr:timeout=0.05"
+
+latency and jitter are seconds added to every call. The others are the share
+of calls that fail that way:
+
+    timeout    the call hangs for FAULT_TIMEOUT_SECONDS, then raises UpstreamTimeout
+    quota      the provider's 429, so the credential pool cools the key down
+    malformed  the call goes through but returns a payload nothing can read
+    partial    the call goes through but the response is cut off (PartialResponse)
+
+With FAULTS unset every call goes straight through. For test and load-test
+environments only.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from backend.errors import PartialResponse, UpstreamTimeout
+from backend.logs import get_logger
+
+FAULTS = os.getenv("FAULTS", "")
+FAULT_TIMEOUT_SECONDS = float(os.getenv("FAULT_TIMEOUT_SECONDS", "5"))
+FAULT_SEED = os.getenv("FAULT_SEED")
+
+BOUNDARIES = ("llm", "sentiment", "asr", "tts")
+FAILURES = ("timeout", "quota", "malformed", "partial")
+
+log = get_logger(__name__)
+
+
+class InjectedQuotaError(RuntimeError):
+    """Looks like a provider 429 to is_quota_error"""
+    code = 429
+
+    def __init__(self, boundary: str):
+        super().__init__(f"429 Resource has been exhausted (injected at {boundary})")
+
+
+class Malformed:
+    """Stands in for a payload that did not parse; has none of the attributes a real response has"""
+    __slots__ = ("boundary",)
+
+    def __init__(self, boundary: str):
+        self.boundary = boundary
+
+    def __repr__(self):
+        return f"<malformed {self.boundary} payload>"
+
+
+class FaultPlan:
+    __slots__ = ("latency", "jitter") + FAILURES
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, timeout: float = 0.0, quota: float = 0.0,
+                 malformed: float = 0.0, partial: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.timeout = timeout
+        self.quota = quota
+        self.malformed = malformed
+        self.partial = partial
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def parse_faults(spec: str) -> Dict[str, FaultPlan]:
+    """Parse a spec such as "llm:quota=0.2,latency=0.5;tts:partial=0.1" into {boundary: FaultPlan}"""
+    plans = {}
+    for part in spec.split(";"):
+        if not part.strip():
+            continue
+        boundary, _, settings = part.partition(":")
+        boundary = boundary.strip()
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"Unknown fault boundary {boundary!r}, expected one of: {', '.join(BOUNDARIES)}")
+        values = {}
+        for setting in settings.split(","):
+            if not setting.strip():
+                continue
+            name, _, value = setting.partition("=")
+            name = name.strip()
+            if name not in FaultPlan.__slots__:
+                raise ValueError(f"Unknown fault {name!r} for {boundary}, expected: {', '.join(FaultPlan.__slots__)}")
+            values[name] = float(value)
+            if name in FAILURES and not 0 <= values[name] <= 1:
+                raise ValueError(f"{boundary}:{name} is a share of calls and must be between 0 and 1")
+        if sum(values.get(name, 0.0) for name in FAILURES) > 1:
+            raise ValueError(f"The failure shares for {boundary} add up to more than 1")
+        plans[boundary] = FaultPlan(**values)
+    return plans
+
+
+class FaultInjector:
+    def __init__(self, plans: Dict[str, FaultPlan], seed: Optional[int] = None,
+                 timeout_seconds: float = FAULT_TIMEOUT_SECONDS):
+        self.plans = plans
+        self.timeout_seconds = timeout_seconds
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = {boundary: 0 for boundary in plans}
+        self.injected = {boundary: dict.fromkeys(FAILURES, 0) for boundary in plans}
+
+    def _decide(self, boundary: str, plan: FaultPlan):
+        with self._lock:
+            self.calls[boundary] += 1
+            delay = plan.latency + (self._random.uniform(0, plan.jitter) if plan.jitter else 0.0)
+            roll = self._random.random()
+            for failure in FAILURES:
+                roll -= getattr(plan, failure)
+                if roll < 0:
+                    self.injected[boundary][failure] += 1
+                    return delay, failure
+        return delay, None
+
+    def call(self, boundary: str, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) through the faults planned for `boundary`"""
+        plan = self.plans.get(boundary)
+        if plan is None:
+            return fn(*args, **kwargs)
+        delay, failure = self._decide(boundary, plan)
+        if delay:
+            time.sleep(delay)
+        if failure is not None:
+            log.debug("Fault injected", boundary=boundary, fault=failure)
+        if failure == "timeout":
+            time.sleep(self.timeout_seconds)
+            raise UpstreamTimeout(boundary, f"no answer in {self.timeout_seconds:g}s (injected)")
+        if failure == "quota":
+            raise InjectedQuotaError(boundary)
+        result = fn(*args, **kwargs)
+        if failure == "malformed":
+            return Malformed(boundary)
+        if failure == "partial":
+            raise PartialResponse(boundary, "connection closed mid-response (injected)")
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {boundary: {"calls": self.calls[boundary], "plan": plan.to_dict(),
+                               "injected": dict(self.injected[boundary])}
+                    for boundary, plan in self.plans.items()}
+
+
+_injector = FaultInjector(parse_faults(FAULTS), int(FAULT_SEED) if FAULT_SEED else None)
+if _injector.plans:
+    print(f"🧪 Fault injection on: {FAULTS}")
+
+
+def configure(spec: str, seed: Optional[int] = None, timeout_seconds: float = FAULT_TIMEOUT_SECONDS) -> FaultInjector:
+    """Replace the process-wide plan; an empty spec turns injection off"""
+    global _injector
+    _injector = FaultInjector(parse_faults(spec), seed, timeout_seconds)
+    return _injector
+
+
+def inject(boundary: str, fn: Callable, *args, **kwargs):
+    return _injector.call(boundary, fn, *args, **kwargs)
+
+
+def fault_stats() -> dict:
+    return _injector.stats()
+
@@ -0,0 +1,83 @@
+"""
+Gemini gateway: every generate_content call waits for a slot from the
+priority scheduler and then goes through the credential pool.
+genai.configure() is process-global, so each key gets its own generative
+client instead, and concurrent requests on different keys never race on the
+shared configuration.
+
+GEMINI_API_ENDPOINT points the clients at another host over REST, such as the
+local stand-in used by benchmarks/loadtest.py. Calls pass through the
+fault injector (backend/faults.py) at the "llm" boundary.
+
+google.generativeai takes about a second to import, so it is imported on the
+first model call rather than at startup.
+
+The SDK has no public per-client API (genai.configure is the only way in),
+so the clients come from client._ClientManager and are set on
+GenerativeModel._client. The SDK version is pinned in requirements.txt for
+that reason, and test_sdk_internals.py fails if either attribute goes away.
+"""
+
+import os
+import threading
+from typing import Dict
+
+from backend.credentials import get_credential_pool
+from backend.errors import MalformedResponse
+from backend.faults import inject
+from backend.metrics import span
+from backend.scheduler import PRIORITY_NORMAL, get_scheduler
+
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+
+_clients: Dict[str, object] = {}
+_clients_lock = threading.Lock()
+
+
+def gemini_configured() -> bool:
+    return len(get_credential_pool("gemini")) > 0
+
+
+def _client_for(api_key: str):
+    client = _clients.get(api_key)
+    if client is None:
+        from google.generativeai import client as genai_client
+
+        with _clients_lock:
+            client = _clients.get(api_key)
+            if client is None:
+                manager = genai_client._ClientManager()
+                if GEMINI_API_ENDPOINT:
+                    manager.configure(api_key=api_key, transport="rest",
+                                      client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+                else:
+                    manager.configure(api_key=api_key)
+                client = manager.make_client("generative")
+                _clients[api_key] = client
+    return client
+
+
+def generate_content(prompt, model_name: str = "gemini-2.0-flash", priority: int = PRIORITY_NORMAL, **kwargs):
+    """Call GenerativeModel.generate_content on the healthiest key, rotating on quota errors"""
+    import google.generativeai as genai
+
+    def attempt(api_key):
+        model = genai.GenerativeModel(model_name)
+        model._client = _client_for(api_key)
+        return inject("llm", model.generate_content, prompt, **kwargs)
+
+    # Queue wait is reported by the scheduler; the span covers the model call itself
+    with get_scheduler().slot(priority), span("llm"):
+        return get_credential_pool("gemini").call(attempt)
+
+
+def response_text(response) -> str:
+    """The answer text; raises MalformedResponse for a blocked, empty or unreadable response"""
+    try:
+        # .text raises ValueError when the candidate has no parts (safety blocks, empty answers)
+        text = response.text
+    except (AttributeError, ValueError, IndexError) as e:
+        raise MalformedResponse("llm", str(e) or type(e).__name__) from e
+    if not isinstance(text, str) or not text.strip():
+        raise MalformedResponse("llm", "empty answer")
+    return text
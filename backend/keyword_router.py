@@ -0,0 +1,131 @@
+"""
+Keyword router for the rule-based fallback replies.
+One rule table is shared by the Flask API, audexa_working.py and the Netlify
+function. It is compiled into an inverted index from token to rule, so a query
+is tokenized once and routed in a single pass over its tokens. Keywords match
+whole words only ("hi" no longer fires on "this", "down" not on "download"),
+with a few common English suffixes folded away ("stressed" -> "stress"); the
+folding is done once by indexing the inflected forms of every keyword.
+Multi-word keywords such as "head pain" match as phrases.
+
+Every entry point keeps its own replies keyed by intent. An intent without a
+reply falls back to its parent (stress -> anxiety), then to the default.
+This module has no dependencies, so the Netlify function can bundle it.
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Set
+
+# Highest priority wins; ties go to the rule listed first
+FALLBACK_RULES = [
+    {"intent": "trauma", "priority": 90,
+     "keywords": ["ptsd", "trauma", "traumatic", "flashback", "flashbacks", "nightmare", "nightmares",
+                  "triggered", "abuse", "assault"]},
+    {"intent": "headache", "priority": 80, "parent": "pain",
+     "keywords": ["headache", "headaches", "migraine", "migraines", "head pain"]},
+    {"intent": "anxiety", "priority": 70,
+     "keywords": ["anxiety", "anxious", "panic", "panicking"]},
+    {"intent": "depression", "priority": 70,
+     "keywords": ["depressed", "depression", "hopeless", "empty", "worthless"]},
+    {"intent": "stress", "priority": 65, "parent": "anxiety",
+     "keywords": ["stress", "stressful", "overwhelmed"]},
+    {"intent": "worry", "priority": 65, "parent": "anxiety",
+     "keywords": ["worried", "worry", "worries", "worrying", "nervous", "fear", "afraid"]},
+    {"intent": "sadness", "priority": 65, "parent": "depression",
+     "keywords": ["sad", "down", "unhappy", "crying"]},
+    {"intent": "loneliness", "priority": 60, "parent": "sadness",
+     "keywords": ["lonely", "loneliness", "isolated", "alone", "disconnected"]},
+    {"intent": "anger", "priority": 60,
+     "keywords": ["angry", "anger", "frustrated", "irritated", "mad"]},
+    {"intent": "sleep", "priority": 55,
+     "keywords": ["sleep", "insomnia", "tired", "exhausted"]},
+    {"intent": "pain", "priority": 50,
+     "keywords": ["pain", "hurt", "hurts", "ache", "aches", "sore"]},
+    {"intent": "mental_health", "priority": 45,
+     "keywords": ["mental health", "prevention", "wellness", "coping", "therapy", "counseling", "counselling"]},
+    {"intent": "exercise", "priority": 40,
+     "keywords": ["exercise", "workout", "fitness", "physical"]},
+    {"intent": "nutrition", "priority": 40,
+     "keywords": ["diet", "nutrition", "food", "eating", "healthy"]},
+    {"intent": "health", "priority": 20,
+     "keywords": ["health", "well-being", "wellbeing"]},
+    {"intent": "help", "priority": 10, "keywords": ["help"]},
+    {"intent": "thanks", "priority": 10, "keywords": ["thank", "thanks", "thankyou"]},
+    {"intent": "greeting", "priority": 5, "keywords": ["hello", "hi", "hey", "namaste"]},
+]
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:['-][^\W_]+)*")
+_SUFFIXES = ("ing", "ed", "es", "s", "ful")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower().replace("’", "'"))
+
+
+def _surface_forms(keyword: str):
+    """
+    The keyword plus the inflected forms that fold back to it ("stress" ->
+    "stressed", "exercise" -> "exercising"). Expanding keywords once at build
+    time means a message token is matched with a single dictionary lookup.
+    """
+    yield keyword
+    for suffix in _SUFFIXES:
+        if len(keyword) >= 3:
+            yield keyword + suffix
+        if suffix in ("ing", "ed") and keyword.endswith("e") and len(keyword) - 1 >= 3:
+            yield keyword[:-1] + suffix
+
+
+class KeywordRouter:
+    def __init__(self, rules: List[dict]):
+        self.rules = rules
+        self.parents = {r["intent"]: r.get("parent") for r in rules}
+        # Once this rule matches nothing can outrank it
+        self._first_choice = min(range(len(rules)), key=lambda i: (-rules[i]["priority"], i))
+        # first token -> [(rule order, priority, intent, remaining phrase tokens)]
+        self._index: Dict[str, list] = {}
+        for order, rule in enumerate(rules):
+            for keyword in rule["keywords"]:
+                tokens = tokenize(keyword)
+                entry = (order, rule["priority"], rule["intent"], tuple(tokens[1:]))
+                for form in _surface_forms(tokens[0]):
+                    self._index.setdefault(form, []).append(entry)
+
+    def route(self, text: str) -> Optional[str]:
+        """The single best intent for `text`, or None if no keyword matches"""
+        return self.route_tokens(tokenize(text))
+
+    def _hits(self, tokens: Sequence[str]):
+        # (rule order, priority, intent) for every keyword occurrence, in token order
+        index = self._index
+        for position, token in enumerate(tokens):
+            for order, priority, intent, rest in index.get(token, ()):
+                if rest and tuple(tokens[position + 1:position + 1 + len(rest)]) != rest:
+                    continue
+                yield order, priority, intent
+
+    def route_tokens(self, tokens: Sequence[str]) -> Optional[str]:
+        """route() for text the caller has already tokenized"""
+        best = None
+        for order, priority, intent in self._hits(tokens):
+            if best is None or (priority, -order) > (best[0], -best[1]):
+                best = (priority, order, intent)
+                if order == self._first_choice:
+                    return intent
+        return best[2] if best else None
+
+    def matches(self, tokens: Sequence[str]) -> Set[str]:
+        """Every intent with a keyword in `tokens`, for tables where several rules can apply"""
+        return {intent for _, _, intent in self._hits(tokens)}
+
+    def respond(self, text: str, responses: Dict[str, str], default: str) -> str:
+        """Reply for the routed intent, walking up parent intents the caller has no reply for"""
+        return self.respond_intent(self.route(text), responses, default)
+
+    def respond_intent(self, intent: Optional[str], responses: Dict[str, str], default: str) -> str:
+        while intent is not None and intent not in responses:
+            intent = self.parents.get(intent)
+        return responses[intent] if intent is not None else default
+
+
+router = KeywordRouter(FALLBACK_RULES)
@@ -0,0 +1,231 @@
+"""
+Local knowledge base over AUDEXA's built-in guidance.
+The guides behind the rule-based fallback replies and the CareerGuidance data
+are split into one document per section and indexed as a sparse TF-IDF
+matrix held in NumPy arrays. A query only touches the postings of its own
+terms, and one bincount over them gives the cosine similarity against every
+section, so search cost follows the query rather than the corpus vocabulary.
+The best matches ground the Gemini prompt; a near-exact match is answered
+directly without a model call.
+"""
+
+import os
+import re
+import threading
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from backend.context import estimate_tokens
+from backend.keyword_router import tokenize
+from backend.logs import get_logger
+
+KNOWLEDGE_TOP_K = int(os.getenv("KNOWLEDGE_TOP_K", "3"))
+# Snippets below this similarity are not worth prompt space
+KNOWLEDGE_MIN_SCORE = float(os.getenv("KNOWLEDGE_MIN_SCORE", "0.2"))
+# At or above this the matching section is the answer (0 disables direct answers)
+KNOWLEDGE_DIRECT_SCORE = float(os.getenv("KNOWLEDGE_DIRECT_SCORE", "0.55"))
+KNOWLEDGE_SNIPPET_TOKENS = int(os.getenv("KNOWLEDGE_SNIPPET_TOKENS", "250"))
+
+_STOPWORDS = frozenset("""
+a about am an and any are as at be been but by can could do does for from get got has have how i i'm if in
+into is it it's its me my of on or our should so some than that the their them then there these they this
+to up us was we what when where which who why will with would you your
+""".split())
+# Bold heading on its own line: "**STEP 1: QUICK CALMING**", "2. **Pain Management**:"
+_HEADING = re.compile(r"^\s*(?:\d+\.\s*)?\*\*([^*\n]+?):?\*\*:?\s*$", re.MULTILINE)
+_STEP_PREFIX = re.compile(r"^step\s+\d+\s*:\s*", re.IGNORECASE)
+
+log = get_logger(__name__)
+
+
+class Document:
+    __slots__ = ("title", "text", "source")
+
+    def __init__(self, title: str, text: str, source: str):
+        self.title = title
+        self.text = text
+        self.source = source
+
+    def render(self) -> str:
+        return f"**{self.title}**\n{self.text}"
+
+
+class SearchHit:
+    __slots__ = ("score", "document")
+
+    def __init__(self, score: float, document: Document):
+        self.score = score
+        self.document = document
+
+
+def _stem(token: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+def terms(text: str, tokens: Sequence[str] = None) -> List[str]:
+    return [_stem(t) for t in (tokenize(text) if tokens is None else tokens) if t not in _STOPWORDS]
+
+
+class _TermMatrix:
+    """
+    TF-IDF matrix stored term-major in CSR form: the postings of term t are
+    doc_ids[indptr[t]:indptr[t + 1]] with their weights. Columns are
+    L2-normalised, so a dot product with a normalised query is the cosine.
+    """
+    __slots__ = ("vocab", "idf", "indptr", "doc_ids", "weights", "size")
+
+    def __init__(self, texts: List[str]):
+        self.size = len(texts)
+        self.vocab: Dict[str, int] = {}
+        rows, cols = [], []
+        for j, text in enumerate(texts):
+            for term in terms(text):
+                rows.append(self.vocab.setdefault(term, len(self.vocab)))
+                cols.append(j)
+        rows = np.array(rows, dtype=np.int64)
+        cols = np.array(cols, dtype=np.int64)
+
+        # Collapse repeated (term, doc) pairs into counts, sorted by term then doc
+        keys, counts = np.unique(rows * max(self.size, 1) + cols, return_counts=True)
+        term_ids = keys // max(self.size, 1)
+        self.doc_ids = (keys % max(self.size, 1)).astype(np.int32)
+
+        df = np.bincount(term_ids, minlength=len(self.vocab))
+        self.idf = (np.log((1.0 + self.size) / (1.0 + df)) + 1.0).astype(np.float32)
+        weights = np.log1p(counts).astype(np.float32) * self.idf[term_ids]
+        norms = np.sqrt(np.bincount(self.doc_ids, weights=weights * weights, minlength=self.size))
+        self.weights = (weights / np.where(norms > 0, norms, 1.0)[self.doc_ids]).astype(np.float32)
+        self.indptr = np.concatenate(([0], np.cumsum(df))).astype(np.int64)
+
+    def scores(self, query_terms: List[str]) -> np.ndarray:
+        """Cosine similarity of the query against every document"""
+        counts: Dict[int, int] = {}
+        for term in query_terms:
+            t = self.vocab.get(term)
+            if t is not None:
+                counts[t] = counts.get(t, 0) + 1
+        if not counts:
+            return np.zeros(self.size, dtype=np.float32)
+        ids = np.fromiter(counts, dtype=np.int64, count=len(counts))
+        q = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts))) * self.idf[ids]
+        # Unknown query terms still count towards the query norm
+        q /= np.sqrt(float(q @ q) + (len(query_terms) - sum(counts.values())))
+
+        spans = [slice(self.indptr[t], self.indptr[t + 1]) for t in ids]
+        doc_ids = np.concatenate([self.doc_ids[span] for span in spans])
+        contributions = np.concatenate([self.weights[span] * w for span, w in zip(spans, q)])
+        return np.bincount(doc_ids, weights=contributions, minlength=self.size)
+
+
+class KnowledgeIndex:
+    # Share of the score from the section title; a query naming the section scores high
+    TITLE_WEIGHT = 0.5
+
+    def __init__(self, documents: List[Document]):
+        self.documents = list(documents)
+        self._titles = _TermMatrix([d.title for d in self.documents])
+        self._bodies = _TermMatrix([f"{d.title} {d.text}" for d in self.documents])
+
+    def __len__(self):
+        return len(self.documents)
+
+    def search(self, text: str, k: int = KNOWLEDGE_TOP_K, min_score: float = KNOWLEDGE_MIN_SCORE,
+               tokens: Sequence[str] = None) -> List[SearchHit]:
+        """Top-k documents by cosine similarity, best first; pass `tokens` if `text` is already tokenized"""
+        query_terms = terms(text, tokens)
+        if not query_terms or not self.documents:
+            return []
+        scores = self.TITLE_WEIGHT * self._titles.scores(query_terms)
+        scores += (1 - self.TITLE_WEIGHT) * self._bodies.scores(query_terms)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [SearchHit(float(scores[i]), self.documents[i]) for i in top if scores[i] >= min_score]
+
+
+def _heading_title(heading: str) -> str:
+    heading = _STEP_PREFIX.sub("", heading.strip().rstrip(":"))
+    return heading.title() if heading.isupper() else heading
+
+
+def guidance_documents(responses: Dict[str, str]) -> List[Document]:
+    """One document per bold section of each fallback guide"""
+    documents = []
+    for intent, text in responses.items():
+        topic = intent.replace("_", " ").title()
+        headings = list(_HEADING.finditer(text))
+        for i, heading in enumerate(headings):
+            end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+            body = text[heading.end():end].strip()
+            if body:
+                documents.append(Document(f"{topic}: {_heading_title(heading.group(1))}", body, intent))
+    return documents
+
+
+def career_documents(guidance) -> List[Document]:
+    """Tips, resources and industry insights from CareerGuidance"""
+    def bullets(items):
+        return "\n".join(f"• {item}" for item in items)
+
+    documents = [
+        Document("Career: Self-Assessment Questions", bullets(guidance.get_career_assessment_questions()), "career"),
+        Document("Career: Salary Negotiation Tips", bullets(guidance.get_salary_negotiation_tips()), "career"),
+        Document("Career: Work-Life Balance Tips", bullets(guidance.get_work_life_balance_tips()), "career"),
+    ]
+    for resource_type in ("resume_tips", "interview_preparation", "job_search_platforms", "skill_development"):
+        title = resource_type.replace("_", " ").title()
+        documents.append(Document(f"Career: {title}", bullets(guidance.get_career_resources(resource_type)), "career"))
+    for industry in ("technology", "healthcare", "finance", "marketing"):
+        insight = guidance.get_industry_insights(industry)
+        documents.append(Document(
+            f"Career: {industry.title()} Industry Insights",
+            f"• Trending roles: {', '.join(insight['trending_roles'])}\n"
+            f"• In-demand skills: {', '.join(insight['in_demand_skills'])}\n"
+            f"• Salary range: {insight['salary_range']}\n"
+            f"• Growth prospects: {insight['growth_prospects']}",
+            "career",
+        ))
+    return documents
+
+
+def grounding_notes(hits: List[SearchHit], budget: int = KNOWLEDGE_SNIPPET_TOKENS) -> str:
+    """Best snippets as a prompt section, trimmed to the token budget"""
+    lines = []
+    for hit in hits:
+        line = f"- {hit.document.title}: {' '.join(hit.document.text.split())}"
+        if estimate_tokens("\n".join(lines + [line])) > budget:
+            break
+        lines.append(line)
+    if not lines:
+        return ""
+    return "Relevant notes from AUDEXA's guides (use them if they fit the question):\n" + "\n".join(lines)
+
+
+def direct_answer(hits: List[SearchHit], threshold: float = KNOWLEDGE_DIRECT_SCORE):
+    """The matching section when it answers the query outright, else None"""
+    if threshold > 0 and hits and hits[0].score >= threshold:
+        return hits[0].document.render()
+    return None
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_knowledge_index() -> KnowledgeIndex:
+    """Index over the fallback guides and career data, built on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                from backend.api import FALLBACK_RESPONSES
+                from backend.career_guidance import career_guidance
+
+                documents = guidance_documents(FALLBACK_RESPONSES) + career_documents(career_guidance)
+                _index = KnowledgeIndex(documents)
+                log.info("Knowledge index ready", sections=len(documents))
+    return _index
@@ -0,0 +1,319 @@
+"""
+Session store on a networked key-value server (Redis) so every Gunicorn
+worker and every node behind the load balancer sees the same conversations.
+
+Per session there are two keys sharing a hash tag (same Redis Cluster slot):
+  audexa:s:{id}:m  compact JSON metadata, including the session version
+  audexa:s:{id}:l  list of messages, one byte of role code + UTF-8 content,
+                   zlib-compressed above COMPRESS_THRESHOLD bytes
+Writes run in WATCH/MULTI/EXEC transactions on the metadata key, which gives
+optimistic concurrency per session. The log is trimmed to COMPACT_KEEP on
+every write and both keys expire after SESSION_TTL_SECONDS of inactivity.
+
+InMemoryKV implements the subset of the redis-py client used here, for
+tests and single-process runs without a Redis server.
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from backend.session_store import COMPACT_KEEP, HISTORY_LIMIT, SessionConflict, SessionStore
+
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(30 * 24 * 3600)))
+COMPRESS_THRESHOLD = 256
+# Times a summary write is retried when a concurrent turn rewrites the metadata
+SUMMARY_WRITE_ATTEMPTS = 5
+
+_ROLE_CODES = {"user": b"u", "assistant": b"a", "system": b"s"}
+_CODE_ROLES = {v[0]: k for k, v in _ROLE_CODES.items()}
+_COMPRESSED = {b"u": b"U", b"a": b"A", b"s": b"S"}
+
+
+class WatchError(Exception):
+    """A watched key changed before EXEC (mirrors redis.WatchError)"""
+
+
+def encode_message(message: dict) -> bytes:
+    code = _ROLE_CODES[message["role"]]
+    payload = message["content"].encode("utf-8")
+    if len(payload) >= COMPRESS_THRESHOLD:
+        packed = zlib.compress(payload, 6)
+        if len(packed) < len(payload):
+            return _COMPRESSED[code] + packed
+    return code + payload
+
+
+def decode_message(raw: bytes) -> dict:
+    code, payload = raw[0], raw[1:]
+    if code in (ord("U"), ord("A"), ord("S")):
+        code += 32  # lower-case role code
+        payload = zlib.decompress(payload)
+    return {"role": _CODE_ROLES[code], "content": payload.decode("utf-8")}
+
+
+def _dumps(meta: dict) -> bytes:
+    return json.dumps(meta, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(raw: bytes) -> dict:
+    return json.loads(raw)
+
+
+class KeyValueSessionStore(SessionStore):
+    shared = True
+
+    def __init__(self, client, prefix: str = "audexa:s:", ttl: int = SESSION_TTL_SECONDS, watch_errors=()):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.watch_errors = (WatchError,) + tuple(watch_errors)
+
+    def _keys(self, session_id: str):
+        base = f"{self.prefix}{{{session_id}}}"
+        return base + ":m", base + ":l"
+
+    def get_session(self, session_id: str) -> Optional[dict]:
+        raw = self.client.get(self._keys(session_id)[0])
+        if raw is None:
+            return None
+        meta = _loads(raw)
+        return {
+            "id": session_id,
+            "language": meta["l"],
+            "start": not meta["s"],
+            "message_count": meta["n"],
+            "version": meta["v"],
+            "summary": meta.get("sm", ""),
+            "summary_upto": meta.get("su", 0),
+        }
+
+    def get_version(self, session_id: str) -> Optional[int]:
+        raw = self.client.get(self._keys(session_id)[0])
+        return _loads(raw)["v"] if raw is not None else None
+
+    def create_session(self, session_id: str, language: str = "en", messages: List[dict] = None, start: bool = True) -> None:
+        meta_key, log_key = self._keys(session_id)
+        messages = messages or []
+        meta = {"l": language, "s": 0 if start else 1, "n": len(messages), "v": 0}
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(meta_key)
+                if pipe.get(meta_key) is not None:
+                    return
+                pipe.multi()
+                pipe.set(meta_key, _dumps(meta), ex=self.ttl)
+                if messages:
+                    pipe.rpush(log_key, *[encode_message(m) for m in messages[-COMPACT_KEEP:]])
+                    pipe.expire(log_key, self.ttl)
+                pipe.execute()
+            except self.watch_errors:
+                # Someone else created it first, which is all we wanted
+                return
+
+    def write_batch(self, updates: List[tuple]) -> Dict[str, Optional[int]]:
+        # Each session is its own transaction; one conflict must not abort the others
+        return {
+            session_id: self._write(session_id, messages, started, expected_version)
+            for session_id, messages, started, expected_version in updates
+        }
+
+    def _write(self, session_id: str, messages: List[dict], started: bool, expected_version: Optional[int]) -> Optional[int]:
+        meta_key, log_key = self._keys(session_id)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(meta_key)
+                raw = pipe.get(meta_key)
+                if raw is None:
+                    return None
+                meta = _loads(raw)
+                if expected_version is not None and meta["v"] != expected_version:
+                    return None
+                meta["v"] += 1
+                meta["n"] += len(messages)
+                if started:
+                    meta["s"] = 1
+
+                pipe.multi()
+                if messages:
+                    pipe.rpush(log_key, *[encode_message(m) for m in messages])
+                    pipe.ltrim(log_key, -COMPACT_KEEP, -1)
+                pipe.set(meta_key, _dumps(meta), ex=self.ttl)
+                pipe.expire(log_key, self.ttl)
+                pipe.execute()
+                return meta["v"]
+            except self.watch_errors:
+                return None
+
+    def recent_messages(self, session_id: str, limit: int = HISTORY_LIMIT) -> List[dict]:
+        return [decode_message(raw) for raw in self.client.lrange(self._keys(session_id)[1], -limit, -1)]
+
+    def compact(self, session_id: str, keep: int = COMPACT_KEEP) -> int:
+        log_key = self._keys(session_id)[1]
+        self.client.ltrim(log_key, -keep, -1)
+        return 0
+
+    def save_summary(self, session_id: str, summary: str, summary_upto: int) -> None:
+        meta_key = self._keys(session_id)[0]
+        for _ in range(SUMMARY_WRITE_ATTEMPTS):
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(meta_key)
+                    raw = pipe.get(meta_key)
+                    if raw is None:
+                        return
+                    meta = _loads(raw)
+                    if meta.get("su", 0) > summary_upto:
+                        return
+                    meta["sm"] = summary
+                    meta["su"] = summary_upto
+                    pipe.multi()
+                    pipe.set(meta_key, _dumps(meta), ex=self.ttl)
+                    pipe.execute()
+                    return
+                except self.watch_errors:
+                    # A concurrent turn rewrote the metadata; read it again and fold the summary in
+                    continue
+        # Nothing else refolds these turns, so the cache must keep the summary dirty and retry
+        raise SessionConflict(session_id)
+
+def _slice(length: int, start: int, end: int):
+    if start < 0:
+        start += length
+    if end < 0:
+        end += length
+    return max(start, 0), min(end, length - 1)
+
+
+class InMemoryKV:
+    """Thread-safe, in-process stand-in for the parts of redis.Redis used by KeyValueSessionStore"""
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._versions = {}
+        self._lock = threading.RLock()
+
+    def _alive(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            self._touch(key)
+        return key in self._data
+
+    def _touch(self, key):
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def get(self, key):
+        with self._lock:
+            return self._data[key] if self._alive(key) else None
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self._data[key] = bytes(value)
+            self._expires.pop(key, None)
+            if ex:
+                self._expires[key] = time.monotonic() + ex
+            self._touch(key)
+            return True
+
+    def rpush(self, key, *values):
+        with self._lock:
+            if not self._alive(key):
+                self._data[key] = []
+            self._data[key].extend(bytes(v) for v in values)
+            self._touch(key)
+            return len(self._data[key])
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            if not self._alive(key):
+                return []
+            items = self._data[key]
+            start, end = _slice(len(items), start, end)
+            return list(items[start:end + 1]) if start <= end else []
+
+    def ltrim(self, key, start, end):
+        with self._lock:
+            if self._alive(key):
+                items = self._data[key]
+                start, end = _slice(len(items), start, end)
+                self._data[key] = items[start:end + 1] if start <= end else []
+                self._touch(key)
+            return True
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._alive(key):
+                    del self._data[key]
+                    self._expires.pop(key, None)
+                    self._touch(key)
+                    removed += 1
+            return removed
+
+    def pipeline(self):
+        return _InMemoryPipeline(self)
+
+
+class _InMemoryPipeline:
+    """WATCH/MULTI/EXEC with redis-py semantics: commands run immediately until multi()"""
+
+    def __init__(self, kv: InMemoryKV):
+        self._kv = kv
+        self._watched = {}
+        self._queue = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.reset()
+
+    def reset(self):
+        self._watched = {}
+        self._queue = None
+
+    def watch(self, *keys):
+        with self._kv._lock:
+            for key in keys:
+                self._kv._alive(key)
+                self._watched[key] = self._kv._versions.get(key, 0)
+
+    def multi(self):
+        self._queue = []
+
+    def execute(self):
+        with self._kv._lock:
+            for key, version in self._watched.items():
+                self._kv._alive(key)
+                if self._kv._versions.get(key, 0) != version:
+                    self.reset()
+                    raise WatchError(key)
+            results = [getattr(self._kv, name)(*args, **kwargs) for name, args, kwargs in self._queue or []]
+        self.reset()
+        return results
+
+    def __getattr__(self, name):
+        command = getattr(self._kv, name)
+        if self._queue is None:
+            return command
+
+        def queued(*args, **kwargs):
+            self._queue.append((name, args, kwargs))
+            return self
+        return queued
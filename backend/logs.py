@@ -0,0 +1,181 @@
+"""
+Structured logging through a background writer.
+Request code hands log records to a bounded in-memory queue and returns; one
+listener thread formats them (JSON lines by default) and writes them out, so
+stdout never blocks a request. When the queue is full, records are dropped
+and counted rather than stalling the caller.
+
+    log = get_logger(__name__)
+    log.info("Gemini reply", chars=len(text))
+    log.debug("Transcript", text=transcript)   # sampled per message
+
+Fields that carry user content (message text, transcripts, answers) are
+replaced by their length unless LOG_USER_CONTENT is set. Debug events are
+kept for a LOG_DEBUG_SAMPLE_RATE share of messages, decided once per
+message, so a sampled message logs its whole story and the rest log none.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+LOG_USER_CONTENT = os.getenv("LOG_USER_CONTENT", "false").lower() == "true"
+
+# Field names whose values are user content
+REDACTED_FIELDS = frozenset({"text", "query", "message", "answer", "transcript", "prompt", "preview"})
+# Longest value kept for any other field
+MAX_FIELD_CHARS = 200
+
+_sampled: contextvars.ContextVar = contextvars.ContextVar("log_debug_sampled", default=None)
+
+
+def redact(name: str, value):
+    if name in REDACTED_FIELDS and not LOG_USER_CONTENT and isinstance(value, str):
+        return f"<{len(value)} chars>"
+    if isinstance(value, str) and len(value) > MAX_FIELD_CHARS:
+        return value[:MAX_FIELD_CHARS] + "…"
+    return value
+
+
+def begin_message() -> None:
+    """Start a new message: the next debug event decides whether this message is sampled"""
+    _sampled.set(None)
+
+
+def _debug_sampled() -> bool:
+    decision = _sampled.get()
+    if decision is None:
+        decision = random.random() < LOG_DEBUG_SAMPLE_RATE
+        _sampled.set(decision)
+    return decision
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Enqueues without formatting and drops (counting) instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only freeze what may change after we return; formatting happens on the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class EventLogger:
+    """log.info("event", field=value, ...): levels, redaction and debug sampling over a stdlib logger"""
+    __slots__ = ("logger",)
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def _log(self, level: int, event: str, fields: dict, exc_info=None) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        if level <= logging.DEBUG and not _debug_sampled():
+            return
+        clean = {name: redact(name, value) for name, value in fields.items()}
+        self.logger.log(level, event, exc_info=exc_info, extra={"fields": clean})
+
+    def debug(self, event: str, **fields) -> None:
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields) -> None:
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields) -> None:
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, exc_info=None, **fields) -> None:
+        self._log(logging.ERROR, event, fields, exc_info)
+
+
+_handler = None
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def _setup() -> None:
+    global _handler, _listener
+    if _handler is not None:
+        return
+    with _setup_lock:
+        if _handler is not None:
+            return
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+        _listener.start()
+        # Everything under backend.* goes through the queue, once
+        root = logging.getLogger("backend")
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+        handler = _QueueHandler(log_queue)
+        root.addHandler(handler)
+        atexit.register(_listener.stop)
+
+        from backend.metrics import register_collector
+        register_collector(lambda: [("audexa_log_dropped_total", "counter", "Log records dropped on a full queue",
+                                     [({}, handler.dropped)])])
+        _handler = handler
+
+
+def get_logger(name: str) -> EventLogger:
+    """Structured logger for a backend module; starts the writer thread on first use"""
+    _setup()
+    return EventLogger(logging.getLogger(name if name.startswith("backend") else f"backend.{name}"))
+
+
+def log_stats() -> dict:
+    _setup()
+    return {"queued": _handler.queue.qsize(), "dropped": _handler.dropped}
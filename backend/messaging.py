@@ -5,16 +5,25 @@ Supports voice messages, multilingual responses, and text-to-speech
 
 import os
 import json
+import asyncio
+import contextvars
+import threading
 import requests
 import tempfile
 from typing import Optional, Dict, Any
-from twilio.rest import Client
-from twilio.twiml.messaging_response import MessagingResponse, Message
 from telegram import Update, Bot
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 import logging
 from backend.wbot import GeminiBot, get_welcome_message
 from backend.api import get_gemini_response, get_fallback_response
+from backend.errors import failure_reason
+from backend.scheduler import classify_priority
+from backend.crisis import crisis_followup, crisis_response
+from backend.analysis import analyze_message
+from backend.metrics import bind_labels, metric_labels
+from backend.logs import begin_message
+from backend.asr import whisper_available, transcribe_async
+from backend.tts import voice_cache, voice_supported
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -32,9 +41,14 @@ class MessagingBot:
         
         # Telegram configuration
         self.telegram_token = os.getenv("TELEGRAM_BOT_TOKEN")
+        # Another Bot API host (a local stand-in under load tests); None keeps api.telegram.org
+        self.telegram_api_url = os.getenv("TELEGRAM_API_URL")
         
         # Initialize Twilio client
         if self.twilio_account_sid and self.twilio_auth_token:
+            # Imported only when WhatsApp is configured
+            from twilio.rest import Client
+
             self.twilio_client = Client(self.twilio_account_sid, self.twilio_auth_token)
         else:
             self.twilio_client = None
@@ -42,62 +56,41 @@ class MessagingBot:
         
         # Initialize Telegram bot
         if self.telegram_token:
-            self.telegram_bot = Bot(token=self.telegram_token)
+            if self.telegram_api_url:
+                self.telegram_bot = Bot(token=self.telegram_token, base_url=f"{self.telegram_api_url.rstrip('/')}/bot")
+            else:
+                self.telegram_bot = Bot(token=self.telegram_token)
         else:
             self.telegram_bot = None
             logger.warning("Telegram bot token not configured")
     
     def detect_language(self, text: str) -> str:
         """Enhanced language detection from text"""
-        # Simple language detection based on script
-        if any('\u0900' <= char <= '\u097F' for char in text):  # Devanagari
-            return 'hi'
-        elif any('\u0980' <= char <= '\u09FF' for char in text):  # Bengali
-            return 'bn'
-        elif any('\u0B80' <= char <= '\u0BFF' for char in text):  # Tamil
-            return 'ta'
-        elif any('\u0C00' <= char <= '\u0C7F' for char in text):  # Telugu
-            return 'te'
-        elif any('\u0A80' <= char <= '\u0AFF' for char in text):  # Gujarati
-            return 'gu'
-        elif any('\u0A00' <= char <= '\u0A7F' for char in text):  # Gurmukhi (Punjabi)
-            return 'pa'
-        elif any('\u0C80' <= char <= '\u0CFF' for char in text):  # Kannada
-            return 'kn'
-        elif any('\u0D00' <= char <= '\u0D7F' for char in text):  # Malayalam
-            return 'ml'
-        elif any('\u0600' <= char <= '\u06FF' for char in text):  # Arabic/Persian/Urdu
-            return 'ur'
-        elif any('\u4E00' <= char <= '\u9FFF' for char in text):  # Chinese
-            return 'zh'
-        elif any('\u3040' <= char <= '\u309F' or '\u30A0' <= char <= '\u30FF' for char in text):  # Japanese
-            return 'ja'
-        elif any('\uAC00' <= char <= '\uD7AF' for char in text):  # Korean
-            return 'ko'
-        elif any('\u0400' <= char <= '\u04FF' for char in text):  # Cyrillic (Russian)
-            return 'ru'
-        elif any('\u1E00' <= char <= '\u1EFF' for char in text):  # Latin Extended (Spanish, French, etc.)
-            # Check for common Spanish words
-            spanish_words = ['hola', 'gracias', 'por favor', 'sí', 'no', 'buenos', 'días', 'noche', 'cómo', 'estás']
-            if any(word in text.lower() for word in spanish_words):
-                return 'es'
-            # Check for common French words
-            french_words = ['bonjour', 'merci', 's\'il vous plaît', 'oui', 'non', 'comment', 'allez-vous']
-            if any(word in text.lower() for word in french_words):
-                return 'fr'
-            # Check for common German words
-            german_words = ['hallo', 'danke', 'bitte', 'ja', 'nein', 'wie', 'geht', 'es']
-            if any(word in text.lower() for word in german_words):
-                return 'de'
-            return 'es'  # Default to Spanish for Latin extended
-        else:
-            return 'en'  # Default to English
+        return analyze_message(text).language
     
     def get_ai_response(self, message: str, user_id: str, platform: str = "whatsapp") -> Dict[str, Any]:
         """Get AI response with language detection and voice support"""
+        begin_message()
+        # Runs on pooled threads, so the labels are bound for this call only
+        with metric_labels(route=platform, channel=platform, language=analyze_message(message).language):
+            return self._ai_response(message, user_id, platform)
+
+    def _ai_response(self, message: str, user_id: str, platform: str) -> Dict[str, Any]:
         try:
-            # Detect language
-            detected_lang = self.detect_language(message)
+            analysis = analyze_message(message)
+            detected_lang = analysis.language
+
+            # Crisis fast path: instant localized helplines, model follow-up sent separately
+            crisis = analysis.crisis
+            if crisis and crisis.acute:
+                logger.info(f"Crisis fast path ({crisis.category}, {crisis.language}) on {platform}")
+                return {
+                    "text": crisis_response(crisis),
+                    "language": crisis.language,
+                    "platform": platform,
+                    "user_id": user_id,
+                    "crisis": crisis.category
+                }
             
             # Create conversation history
             messages = [
@@ -107,8 +100,13 @@ class MessagingBot:
                 }
             ]
             
-            # Get AI response
-            response_text = get_gemini_response(message, messages)
+            # Get AI response; distressed users jump the queue for model capacity
+            priority = classify_priority(analysis)
+            try:
+                response_text = get_gemini_response(message, messages, priority=priority)
+            except Exception as e:
+                logger.warning(f"AI model failed ({failure_reason(e)}), using fallback response: {e}")
+                response_text = get_fallback_response(message, detected_lang, analysis)
             
             return {
                 "text": response_text,
@@ -126,6 +124,11 @@ class MessagingBot:
                 "user_id": user_id
             }
     
+    def send_whatsapp_crisis_followup(self, to: str, text: str, language: str) -> None:
+        followup = crisis_followup(text, language)
+        if followup and to:
+            self.send_whatsapp_message(to, followup)
+
     def send_whatsapp_message(self, to: str, message: str, media_url: Optional[str] = None) -> bool:
         """Send WhatsApp message via Twilio"""
         if not self.twilio_client:
@@ -170,65 +173,10 @@ class MessagingBot:
             logger.error(f"Error sending Telegram message: {e}")
             return False
     
-    def generate_voice_response(self, text: str, language: str = "en") -> Optional[str]:
-        """Optimized voice generation with faster response times"""
-        try:
-            from gtts import gTTS
-            import tempfile
-            import time
-            
-            start_time = time.time()
-            
-            # Optimized language mapping
-            language_map = {
-                'hi': 'hi', 'bn': 'bn', 'ta': 'ta', 'te': 'te', 'gu': 'gu', 'pa': 'pa',
-                'kn': 'kn', 'ml': 'ml', 'ur': 'ur', 'zh': 'zh', 'ja': 'ja', 'ko': 'ko',
-                'ru': 'ru', 'es': 'es', 'fr': 'fr', 'de': 'de', 'it': 'it', 'pt': 'pt',
-                'ar': 'ar', 'en': 'en'
-            }
-            
-            tts_lang = language_map.get(language, 'en')
-            
-            # For faster response, limit text length
-            if len(text) > 300:
-                logger.warning(f"Long text detected ({len(text)} chars), truncating for faster TTS")
-                text = text[:300] + "..."
-            
-            # Create TTS with optimized settings for speed
-            tts = gTTS(
-                text=text, 
-                lang=tts_lang, 
-                slow=False,  # Fast speech
-                tld='com'    # Use faster server
-            )
-            
-            # Save to temporary file
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-            tts.save(temp_file.name)
-            temp_file.close()
-            
-            generation_time = time.time() - start_time
-            logger.info(f"⚡ Voice generated in {generation_time:.2f}s ({tts_lang}): {text[:30]}...")
-            return temp_file.name
-            
-        except Exception as e:
-            logger.error(f"Error generating voice for language {language}: {e}")
-            # Fast fallback to English
-            try:
-                tts = gTTS(text=text[:300], lang='en', slow=False, tld='com')
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-                tts.save(temp_file.name)
-                temp_file.close()
-                
-                generation_time = time.time() - start_time
-                logger.info(f"⚡ Fallback voice in {generation_time:.2f}s: {text[:30]}...")
-                return temp_file.name
-            except Exception as fallback_error:
-                logger.error(f"Fallback TTS also failed: {fallback_error}")
-                return None
-    
     def process_whatsapp_webhook(self, request_data: Dict[str, Any]) -> str:
         """Process WhatsApp webhook"""
+        from twilio.twiml.messaging_response import MessagingResponse
+
         try:
             # Extract message data
             wa_id = request_data.get('WaId', '')
@@ -246,14 +194,19 @@ class MessagingBot:
             resp = MessagingResponse()
             msg = resp.message()
             msg.body(response_text)
+
+            if response_data.get("crisis") and self.twilio_client:
+                # The webhook reply goes out now; the follow-up is pushed once the model answers
+                threading.Thread(
+                    target=self.send_whatsapp_crisis_followup,
+                    args=(request_data.get('From', '').replace('whatsapp:', ''), body, response_data["language"]),
+                    daemon=True,
+                ).start()
             
-            # If user requested voice response, generate and send
-            if "voice" in body.lower() or "speak" in body.lower():
-                voice_file = self.generate_voice_response(response_text, response_data["language"])
-                if voice_file:
-                    # Upload to a temporary URL (in production, use cloud storage)
-                    # For now, we'll just mention voice is available
-                    msg.body(f"{response_text}\n\n🎤 Voice response available - say 'voice' to hear it!")
+            # If user requested voice response, mention it; WhatsApp replies do not carry audio yet,
+            # so nothing is synthesized just to find out whether it could be
+            if ("voice" in body.lower() or "speak" in body.lower()) and voice_supported(response_data["language"]):
+                msg.body(f"{response_text}\n\n🎤 Voice response available - say 'voice' to hear it!")
             
             return str(resp)
             
@@ -265,6 +218,7 @@ class MessagingBot:
     
     async def process_telegram_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Process Telegram message"""
+        bind_labels(route="telegram", channel="telegram")
         try:
             message = update.message
             chat_id = str(message.chat_id)
@@ -272,40 +226,82 @@ class MessagingBot:
             
             # Handle text messages
             if message.text:
-                response_data = self.get_ai_response(message.text, user_id, "telegram")
+                # The model call may queue behind higher-priority users; keep the event loop free
+                loop = asyncio.get_running_loop()
+                response_data = await loop.run_in_executor(None, self.get_ai_response, message.text, user_id, "telegram")
                 response_text = response_data["text"]
                 
                 # Send text response
                 await context.bot.send_message(chat_id=chat_id, text=response_text)
+                if response_data.get("crisis"):
+                    await self.send_crisis_followup(context.bot, chat_id, message.text, response_data["language"])
                 
                 # If user requested voice, generate and send
                 if "voice" in message.text.lower() or "speak" in message.text.lower():
-                    voice_file = self.generate_voice_response(response_text, response_data["language"])
-                    if voice_file:
-                        with open(voice_file, 'rb') as voice:
-                            await context.bot.send_voice(chat_id=chat_id, voice=voice, caption="AUDEXA's voice response")
-                        os.unlink(voice_file)  # Clean up temp file
+                    await self.send_telegram_voice(context.bot, chat_id, response_text, response_data["language"])
             
             # Handle voice messages
             elif message.voice:
-                # Download voice file
+                if not whisper_available():
+                    await context.bot.send_message(chat_id=chat_id, text="I received your voice message, but speech-to-text is not available right now. Please send text messages.")
+                    return
+                
+                # Download the OGG/Opus note into memory; decoding and Whisper run on the ASR workers
                 voice_file = await context.bot.get_file(message.voice.file_id)
-                voice_path = f"temp_voice_{user_id}.ogg"
-                await voice_file.download_to_drive(voice_path)
+                voice_bytes = await voice_file.download_as_bytearray()
+                result = await transcribe_async(
+                    bytes(voice_bytes),
+                    task="transcribe",
+                    condition_on_previous_text=False,
+                    temperature=0.0,
+                    no_speech_threshold=0.3
+                )
+                transcribed_text = result.get("text", "").strip()
                 
-                # Process voice with Whisper (you'd need to implement this)
-                # For now, send a text response
-                response_text = "I received your voice message! Voice processing is coming soon. For now, please send text messages."
-                await context.bot.send_message(chat_id=chat_id, text=response_text)
+                if not transcribed_text:
+                    await context.bot.send_message(chat_id=chat_id, text="I couldn't detect any speech in your voice message. Could you try again a little closer to the microphone?")
+                    return
+                
+                logger.info(f"Telegram voice note transcribed ({len(transcribed_text)} chars)")
                 
-                # Clean up
-                if os.path.exists(voice_path):
-                    os.unlink(voice_path)
+                # Feed the transcript into the normal response pipeline without blocking the event loop
+                loop = asyncio.get_running_loop()
+                response_data = await loop.run_in_executor(None, self.get_ai_response, transcribed_text, user_id, "telegram")
+                await context.bot.send_message(chat_id=chat_id, text=response_data["text"])
+                if response_data.get("crisis"):
+                    await self.send_crisis_followup(context.bot, chat_id, transcribed_text, response_data["language"])
             
         except Exception as e:
             logger.error(f"Error processing Telegram message: {e}")
             await context.bot.send_message(chat_id=chat_id, text="Sorry, I'm having trouble right now. Please try again later.")
     
+    async def send_crisis_followup(self, bot: Bot, chat_id: str, text: str, language: str) -> None:
+        """Send a model-written follow-up after the instant crisis reply"""
+        loop = asyncio.get_running_loop()
+        followup = await loop.run_in_executor(None, crisis_followup, text, language)
+        if followup:
+            await bot.send_message(chat_id=chat_id, text=followup)
+
+    async def send_telegram_voice(self, bot: Bot, chat_id: str, text: str, language: str = "en", caption: str = "AUDEXA's voice response") -> bool:
+        """Send a native OGG/Opus voice note, reusing Telegram's file_id for clips already uploaded"""
+        try:
+            loop = asyncio.get_running_loop()
+            note = await loop.run_in_executor(None, contextvars.copy_context().run, voice_cache.get_or_create, text, language)
+            
+            if note.file_id:
+                # Already on Telegram's servers - no upload needed
+                await bot.send_voice(chat_id=chat_id, voice=note.file_id, caption=caption)
+                return True
+            
+            sent = await bot.send_voice(chat_id=chat_id, voice=note.ogg or note.mp3, caption=caption)
+            if sent.voice:
+                voice_cache.remember_file_id(note.key, sent.voice.file_id)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error sending Telegram voice note: {e}")
+            return False
+    
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /start command"""
         # Get language from context or default to English
@@ -341,7 +337,11 @@ Just send me a message and I'll help you!"""
         
         try:
             # Create application
-            application = Application.builder().token(self.telegram_token).build()
+            # Concurrent updates so one user's voice note doesn't queue everyone else behind it
+            builder = Application.builder().token(self.telegram_token).concurrent_updates(True)
+            if self.telegram_api_url:
+                builder = builder.base_url(f"{self.telegram_api_url.rstrip('/')}/bot")
+            application = builder.build()
             
             # Add handlers
             application.add_handler(CommandHandler("start", self.start_command))
@@ -0,0 +1,355 @@
+"""
+Process-wide metrics in the Prometheus text format.
+Counters, gauges and histograms live in memory; recording a value is a dict
+lookup and a few integer updates under a per-metric lock, so timing a stage
+costs a few microseconds. /metrics renders everything on demand,
+together with the session cache, credential pool and scheduler stats, which
+are read from their own counters at scrape time.
+
+Pipeline stages are timed with span("llm"), either as a context manager or a
+decorator. Spans are labelled with the route, channel (web/telegram/whatsapp)
+and language bound to the current request by metric_labels(); the labels
+live in a context variable, so concurrent requests and asyncio tasks never
+see each other's.
+"""
+
+import bisect
+import contextvars
+import os
+import re
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.logs import get_logger
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() != "false"
+# Seconds; covers a cached lookup through a slow model call
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Label values outside this shape are reported as "other" to keep series bounded
+_LABEL_VALUE = re.compile(r"^[A-Za-z0-9_./<>:-]{1,128}$")
+
+Labels = Tuple[str, ...]
+
+log = get_logger(__name__)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._values: Dict[Labels, object] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+    def _render_samples(self, items) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), value: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), value: float = 1) -> None:
+        self.inc(labels, -value)
+
+    def set(self, labels: Labels, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: Labels, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), then sum and count
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, labels: Labels = ()) -> int:
+        state = self._values.get(labels)
+        return state[2] if state else 0
+
+    def _render_samples(self, items) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+# Collectors return (name, kind, help, [(labels dict, value), ...]) read at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[dict, float]]]]]
+_metrics: List[_Metric] = []
+_collectors: List[Collector] = []
+
+
+def register(metric: _Metric) -> _Metric:
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(collector: Collector) -> None:
+    _collectors.append(collector)
+
+
+STAGE_LABELS = ("stage", "route", "channel", "language")
+STAGE_SECONDS = register(Histogram(
+    "audexa_stage_seconds", "Time spent in each pipeline stage", STAGE_LABELS))
+STAGE_ERRORS = register(Counter(
+    "audexa_stage_errors_total", "Pipeline stages that raised", STAGE_LABELS + ("error",)))
+STAGE_IN_FLIGHT = register(Gauge(
+    "audexa_stage_in_flight", "Pipeline stages currently running", ("stage",)))
+HTTP_SECONDS = register(Histogram(
+    "audexa_http_request_seconds", "HTTP request latency", ("route", "method", "status")))
+HTTP_IN_FLIGHT = register(Gauge(
+    "audexa_http_requests_in_flight", "HTTP requests being served", ("route",)))
+
+_context: contextvars.ContextVar = contextvars.ContextVar("metric_labels", default=("none", "none", "none"))
+
+
+def _clean(value: Optional[str]) -> str:
+    if not value:
+        return "none"
+    return value if _LABEL_VALUE.match(value) else "other"
+
+
+def label_in(value: Optional[str], allowed) -> str:
+    """`value` if it is one of `allowed`, else "other"; for labels taken from client input"""
+    if not value:
+        return "none"
+    return value if value in allowed else "other"
+
+
+def bind_labels(route: str = None, channel: str = None, language: str = None) -> contextvars.Token:
+    """Set labels for spans in the current context; unspecified labels keep their value"""
+    current_route, current_channel, current_language = _context.get()
+    return _context.set((
+        _clean(route) if route is not None else current_route,
+        _clean(channel) if channel is not None else current_channel,
+        _clean(language) if language is not None else current_language,
+    ))
+
+
+def reset_labels(token: contextvars.Token) -> None:
+    _context.reset(token)
+
+
+class metric_labels:
+    """with metric_labels(channel="telegram", language="hi"): ... labels every span inside"""
+    __slots__ = ("labels", "token")
+
+    def __init__(self, **labels):
+        self.labels = labels
+
+    def __enter__(self):
+        self.token = bind_labels(**self.labels)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        reset_labels(self.token)
+        return False
+
+
+class span:
+    """Time a stage: `with span("tts"):` or `@span("tts")`; `language` overrides the bound label"""
+    __slots__ = ("stage", "language", "labels", "start")
+
+    def __init__(self, stage: str, language: str = None):
+        self.stage = stage
+        self.language = language
+
+    def __enter__(self):
+        if METRICS_ENABLED:
+            route, channel, language = _context.get()
+            if self.language is not None:
+                language = _clean(self.language)
+            self.labels = (self.stage, route, channel, language)
+            STAGE_IN_FLIGHT.inc((self.stage,))
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if METRICS_ENABLED:
+            STAGE_SECONDS.observe(self.labels, time.perf_counter() - self.start)
+            STAGE_IN_FLIGHT.dec((self.stage,))
+            if exc_type is not None:
+                STAGE_ERRORS.inc(self.labels + (exc_type.__name__,))
+        return False
+
+    def __call__(self, func):
+        stage, language = self.stage, self.language
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            # A fresh span per call; the decorator's own instance is shared between threads
+            with span(stage, language):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def render() -> str:
+    """Every metric and collector in the Prometheus text format"""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        try:
+            families = list(collector())
+        except Exception as e:
+            log.warning("Metrics collector failed", collector=getattr(collector, "__name__", repr(collector)),
+                        error=str(e))
+            continue
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# -- stats of existing components, read at scrape time ----------------------
+
+def session_cache_metrics():
+    from backend.session_cache import get_session_cache
+
+    stats = get_session_cache().stats()
+    for key in ("hits", "misses", "evictions", "conflicts", "flushes", "flushed_messages"):
+        yield f"audexa_session_cache_{key}_total", "counter", f"Session cache {key.replace('_', ' ')}", [({}, stats[key])]
+    for key in ("sessions", "bytes", "max_bytes", "dirty", "hit_rate", "last_flush_seconds", "max_flush_seconds",
+                "avg_flush_seconds"):
+        yield f"audexa_session_cache_{key}", "gauge", f"Session cache {key.replace('_', ' ')}", [({}, stats[key])]
+
+
+def credential_metrics():
+    from backend.credentials import credential_stats
+
+    keys = [(provider, entry) for provider, entries in credential_stats().items() for entry in entries]
+    for field in ("requests", "successes", "failures", "quota_errors", "auth_errors"):
+        yield (f"audexa_credential_{field}_total", "counter", f"API key {field.replace('_', ' ')}",
+               [({"provider": p, "key": e["key"]}, e[field]) for p, e in keys])
+    for field in ("in_flight", "cooldown_seconds", "available"):
+        yield (f"audexa_credential_{field}", "gauge", f"API key {field.replace('_', ' ')}",
+               [({"provider": p, "key": e["key"]}, float(e[field])) for p, e in keys])
+
+
+def scheduler_metrics():
+    from backend.scheduler import get_scheduler
+
+    stats = get_scheduler().stats()
+    for key in ("in_flight", "max_in_flight", "queued"):
+        yield f"audexa_llm_{key}", "gauge", f"LLM scheduler {key.replace('_', ' ')}", [({}, stats[key])]
+    priorities = stats["priorities"]
+    for field in ("submitted", "rejected", "timeouts"):
+        yield (f"audexa_llm_{field}_total", "counter", f"LLM requests {field} by priority",
+               [({"priority": name}, s[field]) for name, s in priorities.items()])
+    for field in ("p50_wait_seconds", "p95_wait_seconds", "p99_wait_seconds", "max_wait_seconds"):
+        yield (f"audexa_llm_{field}", "gauge", f"LLM queue wait ({field.split('_')[0]}) by priority",
+               [({"priority": name}, s[field]) for name, s in priorities.items()])
+
+
+def fault_metrics():
+    from backend.faults import fault_stats
+
+    stats = fault_stats()
+    yield ("audexa_faults_injected_total", "counter", "Faults injected by boundary and kind",
+           [({"boundary": b, "fault": f}, n) for b, s in stats.items() for f, n in s["injected"].items()])
+
+
+def install(app) -> None:
+    """Per-route request metrics, span labels for every request, and GET /metrics"""
+    from flask import Response, g, request
+
+    for collector in (session_cache_metrics, credential_metrics, scheduler_metrics, fault_metrics):
+        if collector not in _collectors:
+            register_collector(collector)
+
+    @app.before_request
+    def _start_request_metrics():
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        g.metrics_route = route
+        g.metrics_token = bind_labels(route=route, channel="web")
+        g.metrics_start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc((route,))
+
+    @app.after_request
+    def _record_request_metrics(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            HTTP_SECONDS.observe((g.metrics_route, request.method, str(response.status_code)),
+                                 time.perf_counter() - start)
+        return response
+
+    @app.teardown_request
+    def _end_request_metrics(exc):
+        token = g.pop("metrics_token", None)
+        if token is not None:
+            HTTP_IN_FLIGHT.dec((g.metrics_route,))
+            try:
+                reset_labels(token)
+            except ValueError:
+                # Bound in another context (streamed responses); nothing to undo here
+                pass
+
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics():
+        """Prometheus scrape endpoint"""
+        return Response(render(), mimetype="text/plain; version=0.0.4")
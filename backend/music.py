@@ -0,0 +1,240 @@
+"""
+Music recommendation catalog.
+Tracks live in backend/data/music.json, a versioned file loaded once. Every
+track is filed under each (mood, language, energy) it fits, plus the wider
+buckets with language or energy left open, so a request goes straight to its
+bucket instead of filtering the catalog.
+
+Picks are random within the bucket, and a small per-session seen-set keeps a
+session from hearing the same song twice. Each pick is a few random probes,
+so the cost does not grow with the catalog. Once a session has heard everything
+that fits, its seen-set for that bucket is forgotten and songs come round again.
+"""
+
+import json
+import os
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote_plus
+
+MUSIC_DATA_VERSION = 1
+MUSIC_DATA_PATH = os.getenv(
+    "MUSIC_DATA_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "music.json"),
+)
+MUSIC_TRACKS_PER_PICK = int(os.getenv("MUSIC_TRACKS_PER_PICK", "3"))
+# Tracks remembered per session, and sessions remembered at all (least recently active go first)
+MUSIC_SEEN_PER_SESSION = int(os.getenv("MUSIC_SEEN_PER_SESSION", "30"))
+MUSIC_SEEN_SESSIONS = int(os.getenv("MUSIC_SEEN_SESSIONS", "10000"))
+
+# Random probes per pick before walking the bucket in order
+_PROBES = 8
+
+
+class Track:
+    __slots__ = ("id", "title", "artist", "language", "energy", "moods", "spotify", "youtube")
+
+    def __init__(self, id: str, title: str, artist: str, language: str, energy: str, moods: Sequence[str],
+                 spotify: Optional[str] = None, youtube: Optional[str] = None):
+        self.id = id
+        self.title = title
+        self.artist = artist
+        self.language = language
+        self.energy = energy
+        self.moods = tuple(moods)
+        self.spotify = spotify
+        self.youtube = youtube
+
+    @property
+    def spotify_url(self) -> str:
+        if self.spotify:
+            return f"https://open.spotify.com/track/{self.spotify}"
+        return f"https://open.spotify.com/search/{quote_plus(f'{self.title} {self.artist}')}"
+
+    @property
+    def youtube_url(self) -> str:
+        if self.youtube:
+            return f"https://youtube.com/watch?v={self.youtube}"
+        return f"https://www.youtube.com/results?search_query={quote_plus(f'{self.title} {self.artist}')}"
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "artist": self.artist,
+            "language": self.language,
+            "energy": self.energy,
+            "moods": list(self.moods),
+            "spotify_url": self.spotify_url,
+            "youtube_url": self.youtube_url,
+        }
+
+
+def load_music_data(path: str = MUSIC_DATA_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != MUSIC_DATA_VERSION:
+        raise ValueError(f"{path}: music data version {data.get('version')} != {MUSIC_DATA_VERSION}")
+    return data
+
+
+class MusicCatalog:
+    def __init__(self, tracks: Sequence[Track], moods: Dict[str, dict], mix: dict,
+                 energy_levels: Sequence[str] = ("low", "medium", "high"), seed: Optional[int] = None):
+        self.tracks = tuple(tracks)
+        self.moods = moods
+        self.mix_moods = tuple(mix["moods"])
+        self.mix_heading = mix["heading"]
+        self.mix_closing = mix["closing"]
+        self.energy_levels = tuple(energy_levels)
+        self.languages = tuple(sorted({t.language for t in self.tracks}))
+
+        buckets: Dict[Tuple[str, Optional[str], Optional[str]], list] = {}
+        for track in self.tracks:
+            for mood in track.moods:
+                for key in ((mood, track.language, track.energy), (mood, track.language, None),
+                            (mood, None, track.energy), (mood, None, None)):
+                    buckets.setdefault(key, []).append(track)
+        self._buckets = {key: tuple(bucket) for key, bucket in buckets.items()}
+
+        self._random = random.Random(seed)
+        self._seen: "OrderedDict[str, OrderedDict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str = MUSIC_DATA_PATH) -> "MusicCatalog":
+        data = load_music_data(path)
+        tracks = [Track(t["id"], t["title"], t["artist"], t["language"], t["energy"], t["moods"],
+                        t.get("spotify"), t.get("youtube")) for t in data["tracks"]]
+        return cls(tracks, data["moods"], data["mix"], data["energy_levels"])
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def _bucket_keys(self, mood: str, language: Optional[str], energy: Optional[str]):
+        """Most specific first: the user's language and energy, then either left open"""
+        keys = [(mood, language, energy), (mood, language, None), (mood, None, energy), (mood, None, None)]
+        return list(OrderedDict.fromkeys(keys))
+
+    def _pick(self, bucket: Tuple[Track, ...], avoid) -> Optional[Track]:
+        for _ in range(_PROBES):
+            track = bucket[self._random.randrange(len(bucket))]
+            if track.id not in avoid:
+                return track
+        # Mostly heard already; walk the rest from a random point
+        start = self._random.randrange(len(bucket))
+        for i in range(len(bucket)):
+            track = bucket[(start + i) % len(bucket)]
+            if track.id not in avoid:
+                return track
+        return None
+
+    def _seen_for(self, session_id: Optional[str]) -> "OrderedDict":
+        if session_id is None:
+            return OrderedDict()
+        seen = self._seen.get(session_id)
+        if seen is None:
+            seen = self._seen[session_id] = OrderedDict()
+            if len(self._seen) > MUSIC_SEEN_SESSIONS:
+                self._seen.popitem(last=False)
+        else:
+            self._seen.move_to_end(session_id)
+        return seen
+
+    def _select(self, mood: str, language: Optional[str], energy: Optional[str], seen: "OrderedDict",
+                picked: List[Track]) -> Optional[Track]:
+        taken = {t.id for t in picked}
+        buckets = [self._buckets[key] for key in self._bucket_keys(mood, language, energy) if key in self._buckets]
+        avoid = seen.keys() | taken if seen else taken
+        for bucket in buckets:
+            track = self._pick(bucket, avoid)
+            if track is not None:
+                return track
+        if not seen or not buckets:
+            return None
+        # The session has heard everything that fits (so the bucket is no bigger than the
+        # seen-set): let these come round again
+        for track in buckets[-1]:
+            seen.pop(track.id, None)
+        for bucket in buckets:
+            track = self._pick(bucket, taken)
+            if track is not None:
+                return track
+        return None
+
+    def _remember(self, seen: "OrderedDict", tracks: List[Track]) -> None:
+        for track in tracks:
+            seen[track.id] = None
+            seen.move_to_end(track.id)
+        while len(seen) > MUSIC_SEEN_PER_SESSION:
+            seen.popitem(last=False)
+
+    def recommend(self, mood: str, language: Optional[str] = None, energy: Optional[str] = None,
+                  session_id: Optional[str] = None, k: int = MUSIC_TRACKS_PER_PICK) -> List[Track]:
+        """Up to k tracks for the mood, preferring the language and energy, none the session has heard lately"""
+        if mood not in self.moods:
+            raise ValueError(f"Unknown mood {mood!r}, expected one of: {', '.join(self.moods)}")
+        with self._lock:
+            seen = self._seen_for(session_id)
+            picked: List[Track] = []
+            while len(picked) < k:
+                track = self._select(mood, language, energy, seen, picked)
+                if track is None:
+                    break
+                picked.append(track)
+            self._remember(seen, picked)
+        return picked
+
+    def mix(self, language: Optional[str] = None, session_id: Optional[str] = None) -> List[Tuple[Track, str]]:
+        """One track from each mix mood, with its note ("for relaxation")"""
+        with self._lock:
+            seen = self._seen_for(session_id)
+            picked: List[Track] = []
+            notes = []
+            for mood in self.mix_moods:
+                track = self._select(mood, language, None, seen, picked)
+                if track is not None:
+                    picked.append(track)
+                    notes.append(self.moods[mood]["mix_note"])
+            self._remember(seen, picked)
+        return list(zip(picked, notes))
+
+
+def render_playlist(heading: str, tracks: Sequence[Track], closing: str, notes: Sequence[str] = ()) -> str:
+    lines = [f"\n\n{heading}\n\n"]
+    for i, track in enumerate(tracks, 1):
+        note = notes[i - 1] if i <= len(notes) else None
+        lines.append(f"{i}. '{track.title}' by {track.artist}{f' ({note})' if note else ''}\n"
+                     f"   Spotify: {track.spotify_url}\n"
+                     f"   YouTube: {track.youtube_url}\n\n")
+    lines.append(closing)
+    return "".join(lines)
+
+
+def playlist(mood: Optional[str], language: Optional[str] = None, session_id: Optional[str] = None) -> str:
+    """A rendered pick for the mood, or the mix when mood is None"""
+    catalog = get_music_catalog()
+    if mood is None:
+        picks = catalog.mix(language, session_id)
+        return render_playlist(catalog.mix_heading, [t for t, _ in picks], catalog.mix_closing,
+                               [note for _, note in picks])
+    mood_text = catalog.moods[mood]
+    return render_playlist(mood_text["heading"], catalog.recommend(mood, language, session_id=session_id),
+                           mood_text["closing"])
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_music_catalog() -> MusicCatalog:
+    """Catalog from MUSIC_DATA_PATH, loaded on first use"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = MusicCatalog.from_file()
+                print(f"🎵 Music catalog ready ({len(_catalog)} tracks)")
+    return _catalog
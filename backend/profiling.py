@@ -0,0 +1,211 @@
+"""
+Opt-in per-request profiling.
+A request is profiled when it carries `X-Profile-Token: <PROFILE_TOKEN>`, or
+when it is picked by PROFILE_SAMPLE_RATE on one of the PROFILE_ROUTES. The
+request thread runs under cProfile and the result is written as a .pstats
+file to PROFILE_DIR, which keeps the newest PROFILE_MAX_FILES profiles.
+
+    GET /profiles              recent profiles, newest first (needs the token)
+    GET /profiles/<name>       one profile, for `python -m pstats` or snakeviz
+
+With neither a token nor a sample rate configured no hooks are installed, so
+profiling costs nothing. One request is profiled at a time (cProfile cannot
+run twice at once); others that ask meanwhile are counted as skipped. Work
+handed to other threads, such as the Whisper executor, shows up as the wait
+for its result.
+"""
+
+import cProfile
+import hmac
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+from backend.logs import get_logger
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_ROUTES = tuple(r.strip() for r in os.getenv(
+    "PROFILE_ROUTES", "/home/api/response,/home/api/voice,/home/api/conversations/<conversation_id>/messages"
+).split(",") if r.strip())
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+PROFILE_HEADER = "X-Profile-Token"
+
+# <UTC time>-<ms>ms-<method>-<route>-<id>.pstats
+_NAME = re.compile(r"^(\d{8}T\d{6})-(\d+)ms-([A-Z]+)-([a-z0-9_]+)-([0-9a-f]{8})\.pstats$")
+
+log = get_logger(__name__)
+
+
+def _slug(route: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", route.lower()).strip("_")[:60] or "root"
+
+
+def enabled() -> bool:
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def token_ok(token: Optional[str]) -> bool:
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+class ProfileStore:
+    """The profile directory, trimmed to the newest `max_files` profiles"""
+
+    def __init__(self, directory: str = PROFILE_DIR, max_files: int = PROFILE_MAX_FILES):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def save(self, profiler: cProfile.Profile, method: str, route: str, seconds: float) -> str:
+        name = (f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{int(seconds * 1000)}ms-{method.upper()}-"
+                f"{_slug(route)}-{uuid.uuid4().hex[:8]}.pstats")
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.directory, name))
+        self._trim()
+        return name
+
+    def _names(self) -> List[str]:
+        try:
+            names = [n for n in os.listdir(self.directory) if _NAME.match(n)]
+        except FileNotFoundError:
+            return []
+        # Timestamps sort as text; the mtime breaks ties within a second
+        return sorted(names, key=lambda n: (n[:15], self._mtime(n)), reverse=True)
+
+    def _mtime(self, name: str) -> float:
+        try:
+            return os.path.getmtime(os.path.join(self.directory, name))
+        except OSError:
+            return 0.0
+
+    def _trim(self) -> None:
+        with self._lock:
+            for name in self._names()[self.max_files:]:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def index(self) -> List[dict]:
+        entries = []
+        for name in self._names():
+            created, ms, method, route, _ = _NAME.match(name).groups()
+            try:
+                size = os.path.getsize(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append({"name": name, "created": created, "duration_ms": int(ms), "method": method,
+                            "route": route, "bytes": size})
+        return entries
+
+    def path(self, name: str) -> Optional[str]:
+        if not _NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+class Profiler:
+    """Decides which requests to profile and profiles one at a time"""
+
+    def __init__(self, store: ProfileStore, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 routes=PROFILE_ROUTES):
+        self.store = store
+        self.sample_rate = sample_rate
+        self.routes = frozenset(routes)
+        self._busy = threading.Lock()
+        self.profiled = 0
+        self.skipped = 0
+
+    def wanted(self, route: str, token: Optional[str]) -> bool:
+        if token is not None and token_ok(token):
+            return True
+        return self.sample_rate > 0 and route in self.routes and random.random() < self.sample_rate
+
+    def start(self) -> Optional[cProfile.Profile]:
+        if not self._busy.acquire(blocking=False):
+            self.skipped += 1
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (a debugger, or one started outside this module) is active
+            self._busy.release()
+            self.skipped += 1
+            return None
+        return profiler
+
+    def finish(self, profiler: cProfile.Profile, method: str, route: str, seconds: float) -> Optional[str]:
+        profiler.disable()
+        try:
+            name = self.store.save(profiler, method, route, seconds)
+            self.profiled += 1
+            return name
+        except OSError as e:
+            log.warning("Profile not saved", route=route, error=str(e))
+            return None
+        finally:
+            self._busy.release()
+
+    def stats(self) -> dict:
+        return {"profiled": self.profiled, "skipped": self.skipped, "sample_rate": self.sample_rate,
+                "max_files": self.store.max_files}
+
+
+def install(app, profiler: Optional[Profiler] = None) -> Optional[Profiler]:
+    """Profile opted-in requests and serve GET /profiles; does nothing unless profiling is configured"""
+    if profiler is None:
+        if not enabled():
+            return None
+        profiler = Profiler(ProfileStore())
+
+    from flask import abort, g, jsonify, request, send_file
+
+    @app.before_request
+    def _start_profile():
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        if route.startswith("/profiles") or not profiler.wanted(route, request.headers.get(PROFILE_HEADER)):
+            return
+        active = profiler.start()
+        if active is not None:
+            g.profile = (active, route, time.perf_counter())
+
+    @app.teardown_request
+    def _finish_profile(exc):
+        started = g.pop("profile", None)
+        if started is not None:
+            active, route, start = started
+            name = profiler.finish(active, request.method, route, time.perf_counter() - start)
+            if name:
+                log.info("Request profiled", route=route, profile=name)
+
+    def _authorized():
+        if not token_ok(request.headers.get(PROFILE_HEADER)):
+            abort(404)
+
+    @app.route("/profiles", methods=["GET"])
+    def profile_index():
+        """Recent request profiles, newest first"""
+        _authorized()
+        return jsonify({"profiles": profiler.store.index(), **profiler.stats()})
+
+    @app.route("/profiles/<name>", methods=["GET"])
+    def profile_download(name):
+        """One profile in pstats format"""
+        _authorized()
+        path = profiler.store.path(name)
+        if path is None:
+            abort(404)
+        return send_file(os.path.abspath(path), mimetype="application/octet-stream", as_attachment=True,
+                         download_name=name)
+
+    print(f"🔬 Request profiling on (sample rate {profiler.sample_rate}, "
+          f"token {'set' if PROFILE_TOKEN else 'not set'}, {profiler.store.directory})")
+    return profiler
@@ -0,0 +1,182 @@
+"""
+Priority scheduler in front of the Gemini gateway.
+At most LLM_MAX_IN_FLIGHT model calls run at once across the web API,
+Telegram and WhatsApp. When every slot is busy, waiting calls are admitted
+by priority (crisis, then negative sentiment, then everything else). A
+waiter's rank improves by one level every LLM_AGING_SECONDS, so routine
+questions are delayed under load but never starved. Queue wait is recorded
+per priority for /metrics/scheduler.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional, Union
+
+from backend.analysis import MessageAnalysis, analyze_message
+
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+# Waiting calls beyond this are rejected, except crisis traffic which is always queued
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "200"))
+LLM_AGING_SECONDS = float(os.getenv("LLM_AGING_SECONDS", "5"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+
+PRIORITY_CRISIS = 0
+PRIORITY_NEGATIVE = 1
+PRIORITY_NORMAL = 2
+PRIORITY_NAMES = {PRIORITY_CRISIS: "crisis", PRIORITY_NEGATIVE: "negative", PRIORITY_NORMAL: "normal"}
+
+# Recent waits kept per priority for percentiles
+_WAIT_SAMPLES = 1024
+
+
+class SchedulerBusy(RuntimeError):
+    """The call was not admitted: the queue is full or the wait timed out"""
+
+
+def classify_priority(message: Union[str, MessageAnalysis], sentiment: Optional[str] = None) -> int:
+    """Rank a message by the signals the pipeline already computes; `sentiment` defaults to the fast estimate"""
+    analysis = message if isinstance(message, MessageAnalysis) else analyze_message(message)
+    if analysis.crisis:
+        return PRIORITY_CRISIS
+    if (sentiment or analysis.sentiment) == "negative":
+        return PRIORITY_NEGATIVE
+    return PRIORITY_NORMAL
+
+
+class _Waiter:
+    __slots__ = ("priority", "enqueued", "sequence", "granted")
+
+    def __init__(self, priority: int, enqueued: float, sequence: int):
+        self.priority = priority
+        self.enqueued = enqueued
+        self.sequence = sequence
+        self.granted = False
+
+
+class _PriorityStats:
+    __slots__ = ("submitted", "rejected", "timeouts", "waits", "total_wait", "max_wait")
+
+    def __init__(self):
+        self.submitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.waits = deque(maxlen=_WAIT_SAMPLES)
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def snapshot(self) -> dict:
+        waits = sorted(self.waits)
+
+        def pct(p):
+            return waits[min(int(p * len(waits)), len(waits) - 1)] if waits else 0.0
+
+        admitted = self.submitted - self.rejected - self.timeouts
+        return {
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "avg_wait_seconds": self.total_wait / admitted if admitted else 0.0,
+            "max_wait_seconds": self.max_wait,
+            "p50_wait_seconds": pct(0.50),
+            "p95_wait_seconds": pct(0.95),
+            "p99_wait_seconds": pct(0.99),
+        }
+
+
+class LLMScheduler:
+    def __init__(self, max_in_flight: int = LLM_MAX_IN_FLIGHT, max_queue: int = LLM_MAX_QUEUE,
+                 aging_seconds: float = LLM_AGING_SECONDS, queue_timeout: float = LLM_QUEUE_TIMEOUT):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.aging_seconds = aging_seconds
+        self.queue_timeout = queue_timeout
+
+        self.in_flight = 0
+        self._waiting = []
+        self._sequence = 0
+        self._cond = threading.Condition()
+        self._stats = {p: _PriorityStats() for p in PRIORITY_NAMES}
+
+    def _rank(self, waiter: _Waiter, now: float):
+        aged = waiter.priority - (now - waiter.enqueued) / self.aging_seconds
+        return aged, waiter.sequence
+
+    def _dispatch(self) -> None:
+        # Caller holds the condition
+        now = time.monotonic()
+        while self._waiting and self.in_flight < self.max_in_flight:
+            best = min(self._waiting, key=lambda w: self._rank(w, now))
+            self._waiting.remove(best)
+            best.granted = True
+            self.in_flight += 1
+        self._cond.notify_all()
+
+    def acquire(self, priority: int = PRIORITY_NORMAL, timeout: float = None) -> float:
+        """Block until a slot is free; returns the time spent waiting"""
+        timeout = self.queue_timeout if timeout is None else timeout
+        start = time.monotonic()
+        with self._cond:
+            stats = self._stats[priority]
+            stats.submitted += 1
+            if self.in_flight < self.max_in_flight and not self._waiting:
+                self.in_flight += 1
+                waited = 0.0
+            else:
+                if len(self._waiting) >= self.max_queue and priority != PRIORITY_CRISIS:
+                    stats.rejected += 1
+                    raise SchedulerBusy(f"LLM queue is full ({len(self._waiting)} waiting)")
+                self._sequence += 1
+                waiter = _Waiter(priority, start, self._sequence)
+                self._waiting.append(waiter)
+                deadline = start + timeout
+                while not waiter.granted:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiting.remove(waiter)
+                        stats.timeouts += 1
+                        raise SchedulerBusy(f"LLM queue wait exceeded {timeout:.0f}s")
+                    self._cond.wait(remaining)
+                waited = time.monotonic() - start
+            stats.waits.append(waited)
+            stats.total_wait += waited
+            stats.max_wait = max(stats.max_wait, waited)
+            return waited
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority: int = PRIORITY_NORMAL):
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "queued": len(self._waiting),
+                "priorities": {PRIORITY_NAMES[p]: s.snapshot() for p, s in self._stats.items()},
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """Process-wide scheduler shared by every channel"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler()
+    return _scheduler
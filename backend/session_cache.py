@@ -0,0 +1,397 @@
+"""
+In-process session cache in front of the session store.
+Hot sessions stay in memory between turns; new messages are marked dirty and
+written behind in batches by a background thread. With a shared backend
+(Redis) writes go through immediately, so any worker can serve any turn.
+Cache hits without unsaved work are validated against the stored session
+version on every backend, so several processes can also share one SQLite
+file. Sessions idle for longer than SESSION_IDLE_SECONDS, or least recently
+used ones once the memory budget is exceeded, are flushed and evicted. An
+atexit hook flushes everything that is still dirty on shutdown.
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from backend.logs import get_logger
+from backend.metrics import span
+from backend.session_store import HISTORY_LIMIT, get_session_store
+
+SESSION_CACHE_BYTES = int(os.getenv("SESSION_CACHE_BYTES", str(64 * 1024 * 1024)))
+# Most sessions are chatty for a few minutes and then go silent
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "300"))
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "1.0"))
+# Optimistic-concurrency retries per flush before giving the work back
+FLUSH_ATTEMPTS = 3
+
+log = get_logger(__name__)
+
+# Rough per-message bookkeeping overhead on top of the content itself
+_MESSAGE_OVERHEAD = 120
+
+
+class CachedSession:
+    __slots__ = ("id", "language", "start", "log", "version", "total", "summary", "summary_upto",
+                 "pending", "started_dirty", "summary_dirty", "last_access", "size")
+
+    def __init__(self, session_id: str, language: str, start: bool, log: List[dict], version: int,
+                 total: int = None, summary: str = "", summary_upto: int = 0):
+        self.id = session_id
+        self.language = language
+        self.start = start
+        self.log = log
+        self.version = version
+        # Messages ever written to the session; log[0] sits at position total - len(log)
+        self.total = len(log) if total is None else total
+        self.summary = summary
+        self.summary_upto = summary_upto
+        self.pending = []
+        self.started_dirty = False
+        self.summary_dirty = False
+        self.last_access = time.monotonic()
+        self.size = sum(len(m["content"]) + _MESSAGE_OVERHEAD for m in log) + len(summary)
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.pending) or self.started_dirty or self.summary_dirty
+
+    @property
+    def first_index(self) -> int:
+        return self.total - len(self.log)
+
+
+class SessionCache:
+    def __init__(self, store=None, max_bytes: int = SESSION_CACHE_BYTES,
+                 idle_seconds: float = SESSION_IDLE_SECONDS, flush_interval: float = SESSION_FLUSH_INTERVAL):
+        self.store = store or get_session_store()
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.flush_interval = flush_interval
+
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        # Serializes flushes so the background thread and callers never write the same batch twice
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.conflicts = 0
+        self.flushes = 0
+        self.flushed_messages = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    # -- lifecycle -------------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="session-flusher", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """Stop the background writer and flush every dirty session"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                self.evict_idle()
+            except Exception as e:
+                log.warning("Session flush failed", error=str(e))
+
+    # -- access ----------------------------------------------------------
+
+    def get(self, session_id: str, language: str = "en", welcome: str = None, create: bool = True) -> Optional[CachedSession]:
+        """Return the cached session, loading or creating it on a miss (None if missing and not `create`)"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self.hits += 1
+                self._sessions.move_to_end(session_id)
+                entry.last_access = time.monotonic()
+                if entry.dirty:
+                    return entry
+
+        if entry is not None:
+            # Another worker (or, with SQLite, another process on this node) may have served a turn
+            # since we cached it; a version read is cheap
+            if self.store.get_version(session_id) != entry.version:
+                self._refresh(entry)
+            return entry
+
+        with self._lock:
+            self.misses += 1
+
+        with span("session_read"):
+            stored = self.store.get_session(session_id)
+            if stored is None and not create:
+                return None
+            if stored is None:
+                # Carry over conversations saved by the old per-user JSON files
+                if not self.store.import_legacy_json(session_id, f"{session_id}.json", language):
+                    opening = [{"role": "assistant", "content": welcome}] if welcome else []
+                    self.store.create_session(session_id, language, opening)
+                stored = self.store.get_session(session_id)
+            entry = CachedSession(session_id, stored["language"], stored["start"],
+                                  self.store.recent_messages(session_id), stored["version"],
+                                  stored["message_count"], stored["summary"], stored["summary_upto"])
+
+        with self._lock:
+            # Another thread may have loaded it while we were reading the store
+            existing = self._sessions.get(session_id)
+            if existing is not None:
+                return existing
+            self._sessions[session_id] = entry
+            self._bytes += entry.size
+        self._enforce_budget()
+        return entry
+
+    def _attach(self, entry: CachedSession) -> CachedSession:
+        # The caller may hold an entry that was evicted since it was fetched
+        current = self._sessions.get(entry.id)
+        if current is None:
+            self._sessions[entry.id] = entry
+            self._bytes += entry.size
+            return entry
+        self._sessions.move_to_end(entry.id)
+        return current
+
+    def append(self, entry: CachedSession, messages: List[dict]) -> None:
+        with self._lock:
+            entry = self._attach(entry)
+            entry.log.extend(messages)
+            entry.pending.extend(messages)
+            entry.total += len(messages)
+            added = sum(len(m["content"]) + _MESSAGE_OVERHEAD for m in messages)
+            # History beyond the read limit is only needed on disk
+            if len(entry.log) > HISTORY_LIMIT:
+                dropped = entry.log[:-HISTORY_LIMIT]
+                del entry.log[:-HISTORY_LIMIT]
+                added -= sum(len(m["content"]) + _MESSAGE_OVERHEAD for m in dropped)
+            entry.size += added
+            self._bytes += added
+            entry.last_access = time.monotonic()
+        if self.store.shared:
+            # Write through so the next turn can be served by any worker
+            self._flush_or_defer([entry.id])
+        self._enforce_budget()
+
+    def mark_started(self, entry: CachedSession) -> None:
+        entry.start = False
+        with self._lock:
+            entry = self._attach(entry)
+            entry.start = False
+            entry.started_dirty = True
+        if self.store.shared:
+            self._flush_or_defer([entry.id])
+
+    def update_summary(self, entry: CachedSession, summary: str, summary_upto: int) -> None:
+        """Cache a new rolling summary; it is written behind like messages"""
+        if summary_upto <= entry.summary_upto:
+            return
+        with self._lock:
+            entry = self._attach(entry)
+            added = len(summary) - len(entry.summary)
+            entry.summary = summary
+            entry.summary_upto = summary_upto
+            entry.summary_dirty = True
+            entry.size += added
+            self._bytes += added
+        if self.store.shared:
+            self._flush_or_defer([entry.id])
+
+    # -- write-behind ----------------------------------------------------
+
+    def _flush_or_defer(self, session_ids: List[str]) -> None:
+        """Flush for a caller that must not fail; unsaved work stays dirty for the background writer"""
+        try:
+            self.flush(session_ids)
+        except Exception as e:
+            log.warning("Session write deferred", sessions=len(session_ids), error=str(e))
+
+    def flush(self, session_ids=None) -> int:
+        """Write pending messages of dirty sessions to the store in one batch"""
+        with self._flush_lock:
+            with self._lock:
+                candidates = self._sessions.values() if session_ids is None else [
+                    self._sessions[s] for s in session_ids if s in self._sessions
+                ]
+                batch = []
+                summaries = []
+                for entry in candidates:
+                    if entry.summary_dirty:
+                        summaries.append((entry, entry.summary, entry.summary_upto))
+                    if entry.pending or entry.started_dirty:
+                        batch.append((entry, entry.pending, entry.started_dirty))
+                        entry.pending = []
+                        entry.started_dirty = False
+            for entry, summary, summary_upto in summaries:
+                try:
+                    with span("session_write"):
+                        self.store.save_summary(entry.id, summary, summary_upto)
+                except Exception as e:
+                    # Still dirty, so the next flush retries; the messages below are written regardless
+                    log.warning("Session summary write failed", session=entry.id, error=str(e))
+                    continue
+                with self._lock:
+                    # A newer summary cached meanwhile stays dirty
+                    if entry.summary_upto == summary_upto:
+                        entry.summary_dirty = False
+            if not batch:
+                return len(summaries)
+
+            start = time.perf_counter()
+            remaining = batch
+            try:
+                for _ in range(FLUSH_ATTEMPTS):
+                    with span("session_write"):
+                        versions = self.store.write_batch([
+                            (e.id, pending, started, e.version) for e, pending, started in remaining
+                        ])
+                    conflicts = []
+                    for entry, pending, started in remaining:
+                        version = versions.get(entry.id)
+                        if version is None:
+                            conflicts.append((entry, pending, started))
+                        else:
+                            entry.version = version
+                    if not conflicts:
+                        break
+                    with self._lock:
+                        self.conflicts += len(conflicts)
+                    # Someone else wrote these sessions; catch up, then append on top of their turns
+                    for entry, pending, _ in conflicts:
+                        self._refresh(entry, pending)
+                    remaining = conflicts
+                else:
+                    raise RuntimeError(f"{len(remaining)} sessions still conflicting after {FLUSH_ATTEMPTS} attempts")
+            except Exception:
+                # Put the unsaved work back so the next flush retries it in order
+                with self._lock:
+                    for entry, pending, started in remaining:
+                        entry.pending = pending + entry.pending
+                        entry.started_dirty = entry.started_dirty or started
+                raise
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.flushes += 1
+                self.flushed_messages += sum(len(p) for _, p, _ in batch)
+                self.last_flush_seconds = elapsed
+                self.total_flush_seconds += elapsed
+                self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            return len(batch)
+
+    def _refresh(self, entry: CachedSession, pending: List[dict] = ()) -> None:
+        """Reload an entry from the store, keeping messages that are not stored yet"""
+        stored = self.store.get_session(entry.id)
+        if stored is None:
+            # Expired from the shared store while we still held it
+            self.store.create_session(entry.id, entry.language)
+            stored = self.store.get_session(entry.id)
+        log = self.store.recent_messages(entry.id)
+        with self._lock:
+            unsaved = list(pending) + entry.pending
+            log = (log + unsaved)[-HISTORY_LIMIT:]
+            if stored["summary_upto"] > entry.summary_upto:
+                entry.summary = stored["summary"]
+                entry.summary_upto = stored["summary_upto"]
+            size = sum(len(m["content"]) + _MESSAGE_OVERHEAD for m in log) + len(entry.summary)
+            if self._sessions.get(entry.id) is entry:
+                self._bytes += size - entry.size
+            entry.log = log
+            entry.size = size
+            entry.version = stored["version"]
+            entry.total = stored["message_count"] + len(unsaved)
+            entry.start = entry.start and stored["start"]
+
+    # -- eviction --------------------------------------------------------
+
+    def evict_idle(self) -> int:
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [s for s, e in self._sessions.items() if e.last_access < cutoff]
+        return self._evict(idle)
+
+    def _enforce_budget(self) -> None:
+        with self._lock:
+            if self._bytes <= self.max_bytes:
+                return
+            victims = []
+            freed = 0
+            # OrderedDict iterates least recently used first
+            for session_id, entry in self._sessions.items():
+                if self._bytes - freed <= self.max_bytes:
+                    break
+                victims.append(session_id)
+                freed += entry.size
+        self._evict(victims)
+
+    def _evict(self, session_ids: List[str]) -> int:
+        if not session_ids:
+            return 0
+        # Never drop unsaved messages: sessions whose flush failed are still dirty and stay cached
+        self._flush_or_defer(session_ids)
+        evicted = 0
+        with self._lock:
+            for session_id in session_ids:
+                entry = self._sessions.get(session_id)
+                if entry is None or entry.dirty:
+                    continue
+                del self._sessions[session_id]
+                self._bytes -= entry.size
+                evicted += 1
+            self.evictions += evicted
+        return evicted
+
+    # -- metrics ---------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "dirty": sum(1 for e in self._sessions.values() if e.dirty),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "conflicts": self.conflicts,
+                "flushes": self.flushes,
+                "flushed_messages": self.flushed_messages,
+                "last_flush_seconds": self.last_flush_seconds,
+                "max_flush_seconds": self.max_flush_seconds,
+                "avg_flush_seconds": self.total_flush_seconds / self.flushes if self.flushes else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_session_cache() -> SessionCache:
+    """Process-wide cache; the flusher thread starts on first use (after any fork)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SessionCache()
+                _cache.start()
+                atexit.register(_cache.close)
+    return _cache
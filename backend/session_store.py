@@ -0,0 +1,278 @@
+"""
+Transactional conversation store for GeminiBot.
+Sessions live in a single SQLite database in WAL mode: every turn appends
+rows inside one transaction, history is read with a bounded query, and old
+messages are compacted away so per-turn cost stays flat as chats grow.
+
+Every session carries a version that is bumped on each write. Writers pass
+the version they last saw and get a SessionConflict back if another worker
+wrote in between, so stale caches refresh instead of silently diverging.
+SESSION_BACKEND selects the implementation: "sqlite" (default, single node),
+"redis" (shared by every worker and node) or "memory" (in-process stand-in
+for the networked store).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from backend.config import Config
+
+# Messages returned to the prompt builder per session
+HISTORY_LIMIT = int(os.getenv("SESSION_HISTORY_LIMIT", "50"))
+# Messages kept on disk per session once compaction runs
+COMPACT_KEEP = int(os.getenv("SESSION_COMPACT_KEEP", "500"))
+# Compact a session after this many appended messages
+COMPACT_EVERY = int(os.getenv("SESSION_COMPACT_EVERY", "200"))
+
+
+class SessionConflict(Exception):
+    """Raised when a session was written by someone else since it was read"""
+
+    def __init__(self, session_id: str):
+        super().__init__(f"session {session_id} was modified concurrently")
+        self.session_id = session_id
+
+
+class SessionStore(ABC):
+    """Operations shared by every backend; subclasses implement the storage primitives"""
+
+    # True when other processes or nodes may write the same sessions
+    shared = False
+
+    @abstractmethod
+    def get_session(self, session_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def get_version(self, session_id: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def create_session(self, session_id: str, language: str = "en", messages: List[dict] = None, start: bool = True) -> None:
+        ...
+
+    @abstractmethod
+    def recent_messages(self, session_id: str, limit: int = HISTORY_LIMIT) -> List[dict]:
+        ...
+
+    @abstractmethod
+    def write_batch(self, updates: List[tuple]) -> Dict[str, Optional[int]]:
+        """
+        Apply `(session_id, messages, started, expected_version)` updates.
+        Returns the new version per session, or None where the expected
+        version no longer matched and the update was not applied.
+        """
+
+    @abstractmethod
+    def compact(self, session_id: str, keep: int = COMPACT_KEEP) -> int:
+        ...
+
+    @abstractmethod
+    def save_summary(self, session_id: str, summary: str, summary_upto: int) -> None:
+        """Persist the rolling summary of messages before absolute position `summary_upto`; raises if it was not written"""
+
+    def append_messages(self, session_id: str, messages: List[dict], expected_version: int = None) -> int:
+        """Atomically append messages; raises SessionConflict on a version mismatch"""
+        version = self.write_batch([(session_id, messages, False, expected_version)])[session_id]
+        if version is None:
+            raise SessionConflict(session_id)
+        return version
+
+    def mark_started(self, session_id: str) -> None:
+        self.write_batch([(session_id, [], True, None)])
+
+    def import_legacy_json(self, session_id: str, file_name: str, language: str = "en") -> bool:
+        """Migrate a pre-store `{id}.json` session file"""
+        try:
+            with open(file_name) as infile:
+                data = json.load(infile)
+        except (OSError, ValueError):
+            return False
+
+        log = [m for m in data.get("log", []) if m.get("role") in ("user", "assistant")]
+        self.create_session(session_id, language, log[-COMPACT_KEEP:], start=data.get("start", True))
+        os.replace(file_name, file_name + ".migrated")
+        return True
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    language TEXT NOT NULL DEFAULT 'en',
+    started INTEGER NOT NULL DEFAULT 1,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0,
+    summary TEXT NOT NULL DEFAULT '',
+    summary_upto INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+"""
+
+
+class SQLiteSessionStore(SessionStore):
+    def __init__(self, path: str = None, compact_every: int = COMPACT_EVERY):
+        self.path = path or Config.SESSION_DB_PATH
+        # 0 turns the automatic compaction off; compact() still works
+        self.compact_every = compact_every
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(sessions)")}
+            # Databases created before rolling summaries existed
+            if "summary" not in columns:
+                conn.execute("ALTER TABLE sessions ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+                conn.execute("ALTER TABLE sessions ADD COLUMN summary_upto INTEGER NOT NULL DEFAULT 0")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shareable across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    def get_session(self, session_id: str) -> Optional[dict]:
+        row = self._connect().execute(
+            "SELECT id, language, started, message_count, version, summary, summary_upto FROM sessions WHERE id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "language": row["language"],
+            "start": not row["started"],
+            "message_count": row["message_count"],
+            "version": row["version"],
+            "summary": row["summary"],
+            "summary_upto": row["summary_upto"],
+        }
+
+    def get_version(self, session_id: str) -> Optional[int]:
+        row = self._connect().execute("SELECT version FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return row["version"] if row else None
+
+    def create_session(self, session_id: str, language: str = "en", messages: List[dict] = None, start: bool = True) -> None:
+        """Create a session with its opening messages; a no-op if it already exists"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO sessions (id, language, started, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, language, 0 if start else 1, now, now),
+            )
+            if cur.rowcount and messages:
+                self._insert_messages(conn, session_id, messages, now)
+
+    def write_batch(self, updates: List[tuple]) -> Dict[str, Optional[int]]:
+        now = time.time()
+        conn = self._connect()
+        versions = {}
+        to_compact = []
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for session_id, messages, started, expected_version in updates:
+                row = conn.execute("SELECT version FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                if row is None or (expected_version is not None and row["version"] != expected_version):
+                    versions[session_id] = None
+                    continue
+                if started:
+                    conn.execute("UPDATE sessions SET started = 1 WHERE id = ?", (session_id,))
+                count = self._insert_messages(conn, session_id, messages, now)
+                if messages and self.compact_every and count % self.compact_every < len(messages):
+                    to_compact.append(session_id)
+                versions[session_id] = row["version"] + 1
+        for session_id in to_compact:
+            self.compact(session_id)
+        return versions
+
+    def _insert_messages(self, conn: sqlite3.Connection, session_id: str, messages: List[dict], now: float) -> int:
+        if messages:
+            conn.executemany(
+                "INSERT INTO messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                [(session_id, m["role"], m["content"], now) for m in messages],
+            )
+        conn.execute(
+            "UPDATE sessions SET message_count = message_count + ?, version = version + 1, updated_at = ? WHERE id = ?",
+            (len(messages), now, session_id),
+        )
+        row = conn.execute("SELECT message_count FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return row["message_count"] if row else 0
+
+    def recent_messages(self, session_id: str, limit: int = HISTORY_LIMIT) -> List[dict]:
+        """Return the newest `limit` messages in chronological order"""
+        rows = self._connect().execute(
+            "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, limit),
+        ).fetchall()
+        return [{"role": r["role"], "content": r["content"]} for r in reversed(rows)]
+
+    def compact(self, session_id: str, keep: int = COMPACT_KEEP) -> int:
+        """Drop all but the newest `keep` messages of a session"""
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.execute(
+                """DELETE FROM messages WHERE session_id = ? AND id < (
+                       SELECT COALESCE(MIN(id), 0) FROM (
+                           SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?
+                       )
+                   )""",
+                (session_id, session_id, keep),
+            )
+        return cur.rowcount
+
+    def save_summary(self, session_id: str, summary: str, summary_upto: int) -> None:
+        # Derived data: no version bump, so it never conflicts with message writes
+        self._connect().execute(
+            "UPDATE sessions SET summary = ?, summary_upto = ? WHERE id = ? AND summary_upto <= ?",
+            (summary, summary_upto, session_id, summary_upto),
+        )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def create_session_store(backend: str = None) -> SessionStore:
+    backend = (backend or Config.SESSION_BACKEND).lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+
+    from backend.kv_session_store import InMemoryKV, KeyValueSessionStore
+    if backend == "redis":
+        import redis  # type: ignore
+
+        return KeyValueSessionStore(redis.Redis.from_url(Config.REDIS_URL), watch_errors=(redis.WatchError,))
+    if backend == "memory":
+        return KeyValueSessionStore(InMemoryKV())
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+
+def get_session_store() -> SessionStore:
+    """Process-wide store, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_session_store()
+    return _store
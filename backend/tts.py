@@ -0,0 +1,165 @@
+"""
+Text-to-speech voice notes for the messaging channels.
+Synthesized MP3 and its OGG/Opus transcode are cached together, along with
+the Telegram file_id once a clip has been uploaded, so repeat sends of the
+same reply skip synthesis, transcoding and the upload itself.
+"""
+
+import hashlib
+import importlib.util
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from backend.audio import AudioDecodeError, encode_opus
+from backend.errors import MalformedResponse
+from backend.faults import inject
+from backend.metrics import label_in, span
+
+logger = logging.getLogger(__name__)
+
+TTS_LANGUAGES = {
+    'hi', 'bn', 'ta', 'te', 'gu', 'pa', 'kn', 'ml', 'ur', 'zh', 'ja', 'ko',
+    'ru', 'es', 'fr', 'de', 'it', 'pt', 'ar', 'en'
+}
+
+# Messaging voice replies are truncated to keep synthesis fast
+MAX_VOICE_CHARS = 300
+VOICE_CACHE_BYTES = int(os.getenv("VOICE_CACHE_BYTES", str(32 * 1024 * 1024)))
+GTTS_BASE_URL = os.getenv("GTTS_BASE_URL")
+
+
+def use_gtts_host(base_url: str) -> None:
+    """Point gTTS (here and in the /text_to_speech route) at base_url instead of translate.google.com"""
+    import gtts.tts
+
+    base_url = base_url.rstrip("/")
+    # gTTS has no public option for the host; the version is pinned for this (see test_sdk_internals.py)
+    gtts.tts._translate_url = lambda tld="com", path="": f"{base_url}/{path}"
+
+
+if GTTS_BASE_URL:
+    use_gtts_host(GTTS_BASE_URL)
+
+
+def _render(text: str, language: str) -> bytes:
+    from gtts import gTTS
+
+    buf = io.BytesIO()
+    with span("tts", language=label_in(language, TTS_LANGUAGES)):
+        gTTS(text=text, lang=language, slow=False, tld='com').write_to_fp(buf)
+    return buf.getvalue()
+
+
+def _checked_mp3(audio) -> bytes:
+    # An ID3 tag or an MPEG frame sync (11 set bits); anything else would play as noise or not at all
+    if not isinstance(audio, bytes) or len(audio) < 4:
+        raise MalformedResponse("tts", "no audio")
+    if not (audio.startswith(b"ID3") or (audio[0] == 0xFF and audio[1] & 0xE0 == 0xE0)):
+        raise MalformedResponse("tts", "not MP3 audio")
+    return audio
+
+
+def voice_supported(language: str) -> bool:
+    """Whether a voice note in `language` can be synthesized, without synthesizing one"""
+    return language in TTS_LANGUAGES and importlib.util.find_spec("gtts") is not None
+
+
+def synthesize_mp3(text: str, language: str = "en") -> Tuple[bytes, str]:
+    """Synthesize text with gTTS straight into memory, falling back to English; returns (mp3, language used)"""
+    # Raised before any attempt, so callers can switch to browser TTS
+    import gtts  # noqa: F401
+
+    tts_lang = language if language in TTS_LANGUAGES else 'en'
+    try:
+        return _checked_mp3(inject("tts", _render, text, tts_lang)), tts_lang
+    except Exception as e:
+        if tts_lang == 'en':
+            raise
+        logger.error(f"TTS failed for {tts_lang}, retrying in English: {e}")
+        return _checked_mp3(inject("tts", _render, text, "en")), "en"
+
+
+class VoiceNote:
+    __slots__ = ("key", "mp3", "ogg", "language", "file_id")
+
+    def __init__(self, key: str, mp3: bytes, ogg: Optional[bytes], language: str = "en"):
+        self.key = key
+        self.mp3 = mp3
+        self.ogg = ogg
+        # The language actually spoken, English when synthesis in the requested one failed
+        self.language = language
+        self.file_id = None
+
+    @property
+    def size(self) -> int:
+        return len(self.mp3) + len(self.ogg or b"")
+
+
+class VoiceNoteCache:
+    """Byte-bounded LRU of synthesized voice notes keyed by language and text"""
+
+    def __init__(self, max_bytes: int = VOICE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text: str, language: str) -> str:
+        return hashlib.sha1(f"{language}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[VoiceNote]:
+        with self._lock:
+            note = self._entries.get(key)
+            if note is not None:
+                self._entries.move_to_end(key)
+            return note
+
+    def put(self, note: VoiceNote) -> None:
+        with self._lock:
+            old = self._entries.pop(note.key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[note.key] = note
+            self._bytes += note.size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def remember_file_id(self, key: str, file_id: str) -> None:
+        with self._lock:
+            note = self._entries.get(key)
+            if note is not None:
+                note.file_id = file_id
+
+    def get_or_create(self, text: str, language: str = "en") -> VoiceNote:
+        """Return the cached voice note, synthesizing and transcoding on a miss"""
+        text = text if len(text) <= MAX_VOICE_CHARS else text[:MAX_VOICE_CHARS] + "..."
+        key = self.make_key(text, language)
+        note = self.get(key)
+        if note is not None:
+            return note
+
+        start_time = time.time()
+        mp3, spoken = synthesize_mp3(text, language)
+        try:
+            ogg = encode_opus(mp3)
+        except AudioDecodeError as e:
+            # Without ffmpeg we still have a playable clip, just not a native voice note
+            logger.warning(f"Opus transcode unavailable, sending MP3: {e}")
+            ogg = None
+
+        note = VoiceNote(key, mp3, ogg, spoken)
+        if spoken == language or language not in TTS_LANGUAGES:
+            self.put(note)
+        # else an English stand-in after a failure: not cached, so the next send tries the language again
+        logger.info(f"⚡ Voice note ready in {time.time() - start_time:.2f}s ({spoken}, {note.size} bytes)")
+        return note
+
+
+voice_cache = VoiceNoteCache()
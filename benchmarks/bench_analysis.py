@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-message text analysis done for one chat request.
+"separate scans" repeats what the pipeline did before MessageAnalysis: each
+stage lowercases and scans the raw text on its own (sentiment split,
+language detection twice, crisis normalization, keyword routing, knowledge
+tokenization and the career/music enhancer lowercasing). "single pass" is
+analyze_message() with the cache bypassed, "cached" is a repeat of the same
+message. Run from the repository root:
+
+    python -m benchmarks.bench_analysis
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.analysis import (  # noqa: E402
+    LANGUAGE_INDICATORS, NEGATIVE_WORDS, POSITIVE_WORDS, SCRIPT_RANGES, analyze_message,
+)
+from backend.crisis import detect_crisis  # noqa: E402
+from backend.keyword_router import router  # noqa: E402
+from backend.knowledge import terms  # noqa: E402
+
+ITERATIONS = 5_000
+MESSAGES = [
+    "I've been feeling stressed about my exams and can't sleep well. Any tips for a better routine?",
+    "What career suits someone who loves biology but hates hospitals?",
+    "Can you recommend some calm music for studying late at night?",
+    "मुझे बहुत तनाव है और नींद नहीं आती, मैं क्या करूं?",
+    "Estoy muy cansado del trabajo y necesito ayuda",
+    "I'm happy today! Finished my project and feeling great about the interview next week. " * 6,
+]
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _legacy_language(text):
+    text_lower = text.lower()
+    for language, indicators in LANGUAGE_INDICATORS.items():
+        if any(indicator in text_lower for indicator in indicators):
+            return language
+    for language, _, first, last in SCRIPT_RANGES:
+        if any(first <= ch <= last for ch in text):
+            return language
+    return "en"
+
+
+def separate_scans(text):
+    words = set(text.lower().split())
+    len(words & NEGATIVE_WORDS), len(words & POSITIVE_WORDS)
+    _legacy_language(text)
+    _legacy_language(text)
+    detect_crisis(text)
+    router.route(text)
+    terms(text)
+    text.lower(), text.lower()
+
+
+def single_pass(text):
+    analyze_message.__wrapped__(text)
+
+
+def cached(text):
+    analyze_message(text)
+
+
+def _measure(fn):
+    samples = []
+    for i in range(ITERATIONS):
+        text = MESSAGES[i % len(MESSAGES)]
+        start = time.perf_counter()
+        fn(text)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return samples
+
+
+def main():
+    print(f"Per-message analysis over {ITERATIONS} messages, microseconds")
+    print(f"{'':>16}{'p50':>10}{'p95':>10}{'p99':>10}{'mean':>10}")
+    means = {}
+    for name, fn in (("separate scans", separate_scans), ("single pass", single_pass), ("cached", cached)):
+        samples = _measure(fn)
+        means[name] = statistics.mean(samples)
+        print(f"{name:>16}{statistics.median(samples):>10.1f}{_percentile(samples, 95):>10.1f}"
+              f"{_percentile(samples, 99):>10.1f}{means[name]:>10.1f}")
+    saved = means["separate scans"] - means["single pass"]
+    print(f"CPU saved per request: {saved:.1f} µs ({saved / means['separate scans']:.0%}) uncached, "
+          f"{means['separate scans'] - means['cached']:.1f} µs on a cache hit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark career role search as the dataset grows. The roles in
+backend/data/career.json are padded with synthetic roles whose titles and
+skills are drawn from a larger vocabulary, then a mix of exact, prefix,
+misspelled and filtered queries is run against each size.
+Run from the repository root:
+
+    python -m benchmarks.bench_career
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.career_guidance import CareerIndex, Role, career_guidance, roles_from_data  # noqa: E402
+
+SIZES = [1_000, 10_000, 50_000]
+QUERIES_PER_SIZE = 2_000
+QUERIES = [
+    ("data scientist", {}),
+    ("data sci", {}),
+    ("pyhton developer", {}),
+    ("marketing manager", {"band": "5-10"}),
+    ("cloud", {"skill": "devops"}),
+    ("analyst", {"industry": "finance"}),
+    ("", {"industry": "healthcare", "band": "20+"}),
+    ("senior machine learning engineer remote", {}),
+]
+SENIORITY = ["Junior", "Senior", "Lead", "Principal", "Associate", "Chief", "Staff", "Head of"]
+DOMAINS = [
+    "Data", "Cloud", "Security", "Product", "Marketing", "Finance", "Clinical", "Research", "Platform", "Mobile",
+    "Growth", "Content", "Risk", "Payments", "Brand", "Network", "Quality", "Operations", "Sales", "Design",
+]
+FUNCTIONS = [
+    "Engineer", "Analyst", "Manager", "Scientist", "Architect", "Specialist", "Consultant", "Strategist",
+    "Developer", "Designer", "Coordinator", "Officer", "Administrator", "Researcher", "Technician",
+]
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _roles(size, base, rng):
+    skills = sorted({s for r in base for s in r.skills}) + [f"Skill {i}" for i in range(500)]
+    industries = sorted({r.industry for r in base}) + [f"industry{i}" for i in range(40)]
+    bands = career_guidance.data["salary_bands"]
+    roles = list(base)
+    while len(roles) < size:
+        low = rng.randint(2, 30)
+        high = low + rng.randint(2, 20)
+        tags = [b["band"] for b in bands if (b["max"] is None or low < b["max"]) and high > b["min"]]
+        title = f"{rng.choice(SENIORITY)} {rng.choice(DOMAINS)} {rng.choice(FUNCTIONS)} {len(roles)}"
+        roles.append(Role(title, rng.choice(industries), rng.sample(skills, 4), low, high, tags))
+    return roles
+
+
+def main():
+    rng = random.Random(42)
+    base = roles_from_data(career_guidance.data)
+    print(f"Career role search, {QUERIES_PER_SIZE} queries per dataset size, milliseconds")
+    print(f"{'roles':>10}{'build':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for size in SIZES:
+        roles = _roles(size, base, rng)
+        start = time.perf_counter()
+        index = CareerIndex(roles)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        samples = []
+        for i in range(QUERIES_PER_SIZE):
+            query, filters = QUERIES[i % len(QUERIES)]
+            start = time.perf_counter()
+            index.search(query, **filters)
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"{len(index):>10}{build_ms:>10.1f}{statistics.median(samples):>10.4f}"
+              f"{_percentile(samples, 95):>10.4f}{_percentile(samples, 99):>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
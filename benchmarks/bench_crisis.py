@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark crisis detection on a mix of everyday and crisis messages in the
+supported languages. The fast path is only worth having if screening every
+message stays well under a millisecond; exits non-zero if p99 >= 1 ms.
+Run from the repository root:
+
+    python -m benchmarks.bench_crisis
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.crisis import crisis_response, detect_crisis  # noqa: E402
+
+ITERATIONS = 20_000
+P99_BUDGET_MS = 1.0
+MESSAGES = [
+    "I've been feeling stressed about my exams and can't sleep well. Any tips for a better routine?",
+    "What career suits someone who loves biology but hates hospitals?",
+    "Can you recommend some calm music for studying late at night?",
+    "I don't want to live anymore, nothing matters",
+    "my partner hits me when he is angry and I am scared to go home",
+    "मुझे बहुत तनाव है और नींद नहीं आती, मैं क्या करूं?",
+    "मैं आत्महत्या के बारे में सोच रहा हूं",
+    "Estoy muy cansado del trabajo, quiero morir",
+    "最近とても疲れていて、死にたいと思うことがある",
+    "I keep having flashbacks since the accident. " * 4,
+    "I'm happy today! Finished my project and feeling great about the interview next week. " * 6,
+]
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    samples = []
+    hits = 0
+    for i in range(ITERATIONS):
+        text = MESSAGES[i % len(MESSAGES)]
+        start = time.perf_counter()
+        match = detect_crisis(text)
+        if match is not None and match.acute:
+            crisis_response(match)
+        samples.append(time.perf_counter() - start)
+        hits += match is not None
+
+    samples_ms = [s * 1000 for s in samples]
+    p99 = _percentile(samples_ms, 99)
+    print(f"Crisis detection over {ITERATIONS} messages ({hits} hits), milliseconds")
+    print(f"{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    print(f"{statistics.median(samples_ms):>10.4f}{_percentile(samples_ms, 95):>10.4f}{p99:>10.4f}{max(samples_ms):>10.4f}")
+    if p99 >= P99_BUDGET_MS:
+        print(f"❌ p99 {p99:.4f} ms exceeds the {P99_BUDGET_MS} ms budget")
+        sys.exit(1)
+    print(f"✅ p99 within the {P99_BUDGET_MS} ms budget")
+
+
+if __name__ == "__main__":
+    main()
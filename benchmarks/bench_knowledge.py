@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark knowledge base search as the corpus grows. The built-in guide and
+career sections are padded with synthetic sections drawn from the same
+vocabulary, then a mix of user questions is searched against each size.
+Run from the repository root:
+
+    python -m benchmarks.bench_knowledge
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.career_guidance import career_guidance  # noqa: E402
+from backend.knowledge import (  # noqa: E402
+    Document, KnowledgeIndex, career_documents, guidance_documents, terms,
+)
+from backend.api import FALLBACK_RESPONSES  # noqa: E402
+
+SIZES = [100, 1_000, 5_000, 20_000]
+QUERIES_PER_SIZE = 2_000
+QUERIES = [
+    "give me some resume tips",
+    "quick calming techniques for anxiety",
+    "how can I sleep better at night?",
+    "I have a headache that won't go away, what should I do",
+    "what skills are in demand in the technology industry",
+    "I've been feeling stressed about my exams and can't sleep well. Any tips for a better routine?",
+    "hello",
+]
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _corpus(size, base, rng):
+    vocabulary = sorted({t for d in base for t in terms(f"{d.title} {d.text}")})
+    documents = list(base)
+    while len(documents) < size:
+        words = rng.choices(vocabulary, k=rng.randint(20, 80))
+        documents.append(Document(f"Synthetic: {' '.join(words[:3])}", " ".join(words), "synthetic"))
+    return documents
+
+
+def main():
+    rng = random.Random(42)
+    base = guidance_documents(FALLBACK_RESPONSES) + career_documents(career_guidance)
+    print(f"Knowledge search, {QUERIES_PER_SIZE} queries per corpus size, milliseconds")
+    print(f"{'sections':>10}{'build':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for size in SIZES:
+        documents = _corpus(size, base, rng)
+        start = time.perf_counter()
+        index = KnowledgeIndex(documents)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        samples = []
+        for i in range(QUERIES_PER_SIZE):
+            start = time.perf_counter()
+            index.search(QUERIES[i % len(QUERIES)])
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"{len(index):>10}{build_ms:>10.1f}{statistics.median(samples):>10.4f}"
+              f"{_percentile(samples, 95):>10.4f}{_percentile(samples, 99):>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
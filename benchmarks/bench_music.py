@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark music recommendations as the catalog grows. Synthetic tracks are
+spread over the catalog's moods, energy levels and a handful of languages,
+then picks are made for a rotating set of sessions so their seen-sets fill
+up the way they would in production.
+Run from the repository root:
+
+    python -m benchmarks.bench_music
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.music import MusicCatalog, Track, load_music_data  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000]
+PICKS_PER_SIZE = 5_000
+SESSIONS = 500
+LANGUAGES = ["en", "hi", "ta", "te", "bn", "es", "fr"]
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _tracks(size, data, rng):
+    moods = list(data["moods"])
+    return [
+        Track(f"s{i}", f"Song {i}", f"Artist {i % 997}", rng.choice(LANGUAGES), rng.choice(data["energy_levels"]),
+              rng.sample(moods, rng.randint(1, 2)))
+        for i in range(size)
+    ]
+
+
+def main():
+    rng = random.Random(42)
+    data = load_music_data()
+    moods = list(data["moods"])
+    print(f"Music picks (3 tracks), {PICKS_PER_SIZE} picks over {SESSIONS} sessions per catalog size, milliseconds")
+    print(f"{'tracks':>10}{'build':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for size in SIZES:
+        tracks = _tracks(size, data, rng)
+        start = time.perf_counter()
+        catalog = MusicCatalog(tracks, data["moods"], data["mix"], data["energy_levels"], seed=1)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        samples = []
+        for i in range(PICKS_PER_SIZE):
+            mood, language = moods[i % len(moods)], LANGUAGES[i % len(LANGUAGES)]
+            energy = data["energy_levels"][i % 4] if i % 4 < 3 else None
+            start = time.perf_counter()
+            catalog.recommend(mood, language, energy, session_id=f"session-{i % SESSIONS}")
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"{len(catalog):>10}{build_ms:>10.1f}{statistics.median(samples):>10.4f}"
+              f"{_percentile(samples, 95):>10.4f}{_percentile(samples, 99):>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
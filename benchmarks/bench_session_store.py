@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-turn session I/O at different conversation lengths.
+Compares the SQLite session store with the old rewrite-the-whole-JSON-file
+approach. Automatic compaction is off while turns are timed, so every row
+reads and writes a session of the size it names; the cost of one compaction
+is reported separately. Run from the repository root:
+
+    python -m benchmarks.bench_session_store
+"""
+
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.session_store import COMPACT_EVERY, COMPACT_KEEP, SQLiteSessionStore  # noqa: E402
+
+SIZES = (10, 1_000, 10_000)
+TURNS = 200
+MESSAGE = "I've been feeling stressed about my exams and can't sleep well. " * 3
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _prefilled_store(workdir, name, size):
+    # Compaction off, so the session keeps all `size` messages (plus the ones appended while timing)
+    store = SQLiteSessionStore(os.path.join(workdir, f"{name}.db"), compact_every=0)
+    batch = [{"role": "user" if i % 2 else "assistant", "content": MESSAGE} for i in range(size)]
+    store.create_session(name, "en", batch)
+    return store
+
+
+def bench_sqlite(workdir, size):
+    session_id = f"user-{size}"
+    store = _prefilled_store(workdir, session_id, size)
+
+    samples = []
+    for _ in range(TURNS):
+        start = time.perf_counter()
+        store.recent_messages(session_id)
+        store.append_messages(session_id, [
+            {"role": "user", "content": MESSAGE},
+            {"role": "assistant", "content": MESSAGE},
+        ])
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_compaction(workdir, size):
+    """Seconds for the compaction that runs every COMPACT_EVERY appended messages, and the rows it deleted"""
+    session_id = f"compact-{size}"
+    store = _prefilled_store(workdir, session_id, size)
+    start = time.perf_counter()
+    deleted = store.compact(session_id)
+    return time.perf_counter() - start, deleted
+
+
+def bench_legacy_json(workdir, size):
+    path = os.path.join(workdir, f"bench_{size}.json")
+    session = {"start": False, "data": "", "log": []}
+    for i in range(size):
+        session["log"].append({"role": "user" if i % 2 else "assistant", "content": MESSAGE})
+        session["data"] += MESSAGE + " \n "
+    with open(path, "w") as f:
+        json.dump(session, f)
+
+    samples = []
+    for _ in range(TURNS):
+        start = time.perf_counter()
+        with open(path) as f:
+            session = json.load(f)
+        session["log"].append({"role": "user", "content": MESSAGE})
+        session["log"].append({"role": "assistant", "content": MESSAGE})
+        session["data"] += MESSAGE + " \n "
+        with open(path, "w") as f:
+            json.dump(session, f)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    print(f"Turn latency over {TURNS} turns (milliseconds)")
+    print(f"{'backend':<12}{'messages':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in SIZES:
+            for name, fn in (("sqlite", bench_sqlite), ("json", bench_legacy_json)):
+                samples = [s * 1000 for s in fn(workdir, size)]
+                print(f"{name:<12}{size:>10}{statistics.median(samples):>10.3f}"
+                      f"{_percentile(samples, 95):>10.3f}{_percentile(samples, 99):>10.3f}")
+
+        print(f"\nSQLite compaction (keeps {COMPACT_KEEP} messages; milliseconds)")
+        print(f"{'messages':>10}{'deleted':>10}{'ms':>10}")
+        for size in SIZES:
+            seconds, deleted = bench_compaction(workdir, size)
+            print(f"{size:>10}{deleted:>10}{seconds * 1000:>10.3f}")
+        # In steady state a session is compacted each time it grows COMPACT_EVERY past COMPACT_KEEP,
+        # and a turn appends two messages
+        seconds, _ = bench_compaction(workdir, COMPACT_KEEP + COMPACT_EVERY)
+        print(f"steady state: {seconds * 1000:.3f} ms every {COMPACT_EVERY // 2} turns, "
+              f"{seconds * 1000 / (COMPACT_EVERY / 2):.4f} ms per turn")
+
+if __name__ == "__main__":
+    main()
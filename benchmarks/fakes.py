@@ -0,0 +1,262 @@
+"""
+Local stand-ins for the services the app calls, for load tests.
+Each fake is a threaded HTTP server on 127.0.0.1 that answers the endpoints
+the app uses with canned payloads after a configurable delay, and fails a
+configurable share of requests with the status the real service would send
+(429 for quota on Gemini and Cohere, 500 elsewhere).
+
+    with start_fakes(FakeConfig(latency=0.3, error_rate=0.05)) as fakes:
+        env = fakes.env()   # GEMINI_API_ENDPOINT, CO_API_URL, GTTS_BASE_URL, ...
+
+Run directly to keep them up for manual testing:
+
+    python -m benchmarks.fakes --latency 0.2
+"""
+
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+GEMINI_REPLY = (
+    "It sounds like a lot is on your mind right now. Try a slow breath in for four counts and out for six, "
+    "and tell me a little more about what has been weighing on you today."
+)
+# An ID3 header and one silent MPEG frame: enough for send_file and clients that sniff the bytes
+FAKE_MP3 = b"ID3\x03\x00\x00\x00\x00\x00\x00" + b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+class FakeConfig:
+    __slots__ = ("latency", "jitter", "error_rate", "error_status")
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_status: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def to_dict(self) -> dict:
+        return {"latency": self.latency, "jitter": self.jitter, "error_rate": self.error_rate,
+                "error_status": self.error_status}
+
+
+class FakeService:
+    """One fake server; subclasses answer in respond() with (status, content type, body)"""
+    name = ""
+    default_error_status = 500
+
+    def __init__(self, config: FakeConfig, seed: Optional[int] = None):
+        self.config = config
+        self.error_status = config.error_status or self.default_error_status
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name=f"fake-{self.name}", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeService":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "errors_injected": self.errors, **self.config.to_dict()}
+
+    def respond(self, method: str, path: str, body: bytes):
+        raise NotImplementedError
+
+    def error_body(self, status: int) -> bytes:
+        return json.dumps({"error": {"code": status, "message": "Injected failure"}}).encode()
+
+    def _decide(self):
+        with self._lock:
+            self.requests += 1
+            delay = self.config.latency + (self._random.uniform(0, self.config.jitter) if self.config.jitter else 0)
+            fail = self._random.random() < self.config.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+    def _handler_class(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                delay, fail = service._decide()
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    status, content_type, payload = service.error_status, "application/json", \
+                        service.error_body(service.error_status)
+                else:
+                    status, content_type, payload = service.respond(self.command, self.path, body)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _json(payload, status: int = 200):
+    return status, "application/json", json.dumps(payload).encode()
+
+
+class FakeGemini(FakeService):
+    """generateContent over REST, as google-generativeai sends it with transport="rest" """
+    name = "gemini"
+    default_error_status = 429
+
+    def error_body(self, status: int) -> bytes:
+        message = "Resource has been exhausted (e.g. check quota)." if status == 429 else "Internal error"
+        state = "RESOURCE_EXHAUSTED" if status == 429 else "INTERNAL"
+        return json.dumps({"error": {"code": status, "message": message, "status": state}}).encode()
+
+    def respond(self, method, path, body):
+        if ":generateContent" not in path:
+            return _json({"error": {"code": 404, "message": path, "status": "NOT_FOUND"}}, 404)
+        return _json({
+            "candidates": [{"content": {"parts": [{"text": GEMINI_REPLY}], "role": "model"},
+                            "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {"promptTokenCount": len(body) // 4, "candidatesTokenCount": len(GEMINI_REPLY) // 4,
+                              "totalTokenCount": (len(body) + len(GEMINI_REPLY)) // 4},
+        })
+
+
+class FakeCohere(FakeService):
+    """classify and the key check the v4 client makes on construction"""
+    name = "cohere"
+    default_error_status = 429
+
+    def error_body(self, status: int) -> bytes:
+        return json.dumps({"message": "You are using a Trial key, which is limited" if status == 429
+                           else "internal server error"}).encode()
+
+    def respond(self, method, path, body):
+        if "check-api-key" in path:
+            return _json({"valid": True})
+        if "classify" not in path:
+            return _json({"message": path}, 404)
+        inputs = json.loads(body or b"{}").get("inputs") or [""]
+        return _json({
+            "id": "fake",
+            "classifications": [{
+                "id": f"fake-{i}", "input": text, "prediction": "negative", "predictions": ["negative"],
+                "confidence": 0.9, "confidences": [0.9],
+                "labels": {"negative": {"confidence": 0.9}, "neutral": {"confidence": 0.05},
+                           "positive": {"confidence": 0.05}},
+                "classification_type": "single-label",
+            } for i, text in enumerate(inputs)],
+            "meta": {"api_version": {"version": "1"}},
+        })
+
+
+class FakeTTS(FakeService):
+    """The Google Translate batchexecute RPC gTTS reads its audio from"""
+    name = "gtts"
+
+    def respond(self, method, path, body):
+        audio = base64.b64encode(FAKE_MP3).decode("ascii")
+        line = json.dumps([["wrb.fr", "jQ1olc", json.dumps([audio]), None, None, None, "generic"]],
+                          separators=(",", ":"))
+        return 200, "application/json", f")]}}'\n\n{len(line)}\n{line}\n".encode()
+
+
+class FakeTelegram(FakeService):
+    """Bot API methods the app calls; every call succeeds with a minimal result"""
+    name = "telegram"
+
+    def __init__(self, config: FakeConfig, seed: Optional[int] = None):
+        super().__init__(config, seed)
+        self._message_id = 0
+
+    def respond(self, method, path, body):
+        api_method = path.rsplit("/", 1)[-1].split("?")[0]
+        if api_method == "getMe":
+            return _json({"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Audexa",
+                                                 "username": "audexa_fake_bot"}})
+        with self._lock:
+            self._message_id += 1
+            message_id = self._message_id
+        return _json({"ok": True, "result": {"message_id": message_id, "date": int(time.time()),
+                                             "chat": {"id": 1, "type": "private"}}})
+
+
+SERVICES = (FakeGemini, FakeCohere, FakeTTS, FakeTelegram)
+
+
+class Fakes:
+    def __init__(self, services: Dict[str, FakeService]):
+        self.services = services
+
+    def env(self) -> Dict[str, str]:
+        """Environment for the app process: every service pointed at its fake"""
+        s = self.services
+        return {
+            "GEMINI_KEY": "fake-gemini-key",
+            "GEMINI_API_ENDPOINT": s["gemini"].url,
+            "COHERE_API_KEY": "fake-cohere-key",
+            "CO_API_URL": s["cohere"].url,
+            "GTTS_BASE_URL": s["gtts"].url,
+            "TELEGRAM_BOT_TOKEN": "123456:fake-telegram-token",
+            "TELEGRAM_API_URL": s["telegram"].url,
+        }
+
+    def stats(self) -> dict:
+        return {name: service.stats() for name, service in self.services.items()}
+
+
+@contextmanager
+def start_fakes(default: FakeConfig = None, overrides: Dict[str, FakeConfig] = None, seed: Optional[int] = None):
+    """Start one fake per service; `overrides` sets latency/errors for single services by name"""
+    default = default or FakeConfig()
+    overrides = overrides or {}
+    services = {}
+    try:
+        for cls in SERVICES:
+            services[cls.name] = cls(overrides.get(cls.name, default), seed).start()
+        yield Fakes(services)
+    finally:
+        for service in services.values():
+            service.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before every reply")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail")
+    args = parser.parse_args()
+    with start_fakes(FakeConfig(args.latency, args.jitter, args.error_rate)) as fakes:
+        for name, value in fakes.env().items():
+            print(f"{name}={value}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
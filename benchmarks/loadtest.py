@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test. Starts local fakes for Gemini, Cohere, gTTS and
+Telegram (benchmarks/fakes.py), runs the Flask app against them in a
+subprocess, and drives a weighted mix of /response, /voice and
+/text_to_speech from concurrent clients. Reports throughput, error counts
+and p50/p95/p99 latency per route as JSON, so runs on two commits can be
+diffed. Injected 429s put the single fake Gemini key into its quota
+cooldown, so an error rate shows up as fallback answers, as it would in
+production. --faults turns on the app's own fault injection (backend/faults.py)
+at the LLM, sentiment, ASR and TTS boundaries; the report counts the
+fallbacks each route served, by reason. Run from the repository root:
+
+    python -m benchmarks.loadtest --duration 30 --concurrency 16 --latency 0.3 --jitter 0.2
+    python -m benchmarks.loadtest --mix response=1 --gemini-error-rate 0.1 --output before.json
+    python -m benchmarks.loadtest --faults "llm:quota=0.1,malformed=0.05,partial=0.05;tts:timeout=0.1"
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from typing import Dict, List, Tuple
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import SERVICES, FakeConfig, start_fakes  # noqa: E402
+
+MESSAGES = [
+    ("I've been feeling really stressed about my exams and can't sleep", "en"),
+    ("My manager keeps piling work on me and I feel burnt out", "en"),
+    ("Can you suggest some music? I'm feeling sad today", "en"),
+    ("How do I prepare for a job interview next week?", "en"),
+    ("I had a good day today, just wanted to share", "en"),
+    ("मुझे बहुत चिंता हो रही है, नींद नहीं आती", "hi"),
+    ("मेरे करियर के बारे में कुछ सलाह दो", "hi"),
+    ("What are some ways to calm down when I feel anxious?", "en"),
+]
+TTS_TEXTS = [
+    ("Take a slow breath in for four counts, and out for six.", "en"),
+    ("You are doing better than you think. One step at a time.", "en"),
+    ("धीरे से सांस लें और खुद पर भरोसा रखें।", "hi"),
+]
+DEFAULT_MIX = "response=6,voice=1,tts=3"
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _voice_clip(seconds: float = 1.5, rate: int = 16000) -> bytes:
+    """A mono 16 kHz WAV of a soft tone, well above the route's too-short threshold"""
+    frames = bytearray()
+    for i in range(int(seconds * rate)):
+        sample = int(6000 * math.sin(2 * math.pi * 220 * i / rate))
+        frames += sample.to_bytes(2, "little", signed=True)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(frames))
+    return buf.getvalue()
+
+
+class Route:
+    """One kind of request in the mix"""
+
+    def __init__(self, name: str, weight: float):
+        self.name = name
+        self.weight = weight
+
+    def send(self, session: requests.Session, base: str, rng: random.Random) -> requests.Response:
+        raise NotImplementedError
+
+    def outcome(self, response: requests.Response) -> str:
+        """Why a successful response is a fallback, or "" for a normal answer"""
+        return ""
+
+
+class ResponseRoute(Route):
+    def send(self, session, base, rng):
+        message, lang = rng.choice(MESSAGES)
+        return session.get(f"{base}/home/api/response",
+                           params={"msg": message, "questions": "", "answers": "", "lang": lang}, timeout=120)
+
+    def outcome(self, response):
+        try:
+            return response.json().get("fallback") or ""
+        except ValueError:
+            return "unreadable"
+
+
+class VoiceRoute(Route):
+    clip = None
+
+    def send(self, session, base, rng):
+        if VoiceRoute.clip is None:
+            VoiceRoute.clip = _voice_clip()
+        return session.post(f"{base}/home/api/voice", timeout=120,
+                            files={"audio_data": ("clip.wav", VoiceRoute.clip, "audio/wav")})
+
+
+class TTSRoute(Route):
+    def send(self, session, base, rng):
+        text, lang = rng.choice(TTS_TEXTS)
+        return session.post(f"{base}/home/api/text_to_speech", json={"text": text, "language": lang}, timeout=120)
+
+    def outcome(self, response):
+        # Audio when the server synthesized it, JSON when the browser has to
+        return "browser_tts" if response.headers.get("Content-Type", "").startswith("application/json") else ""
+
+
+ROUTES = {"response": ResponseRoute, "voice": VoiceRoute, "tts": TTSRoute}
+
+
+def parse_mix(spec: str) -> List[Route]:
+    routes = []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise ValueError(f"Unknown route {name!r} in --mix, expected: {', '.join(ROUTES)}")
+        routes.append(ROUTES[name](name, float(weight or 1)))
+    if not any(r.weight > 0 for r in routes):
+        raise ValueError("--mix needs at least one route with a positive weight")
+    return routes
+
+
+class AppServer:
+    """The Flask app in a subprocess, with its environment pointed at the fakes"""
+
+    def __init__(self, env: Dict[str, str], workdir: str):
+        self.port = _free_port()
+        self.base = f"http://127.0.0.1:{self.port}"
+        self.log_path = os.path.join(workdir, "app.log")
+        self.env = dict(os.environ, **env, PYTHONPATH=ROOT, SESSION_DB_PATH=os.path.join(workdir, "sessions.db"),
+                        PROFILE_DIR=os.path.join(workdir, "profiles"))
+        self.env.setdefault("LOG_LEVEL", "WARNING")
+        self.workdir = workdir
+        self.process = None
+
+    def start(self, timeout: float = 120) -> None:
+        code = (f"from app import app; app.run(host='127.0.0.1', port={self.port}, threaded=True, "
+                f"debug=False, use_reloader=False)")
+        self._log = open(self.log_path, "wb")
+        self.process = subprocess.Popen([sys.executable, "-c", code], cwd=self.workdir, env=self.env,
+                                        stdout=self._log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"App exited with {self.process.returncode}, see {self.log_path}")
+            try:
+                if requests.get(f"{self.base}/home/api/test_mic", timeout=1).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"App did not come up in {timeout:.0f}s, see {self.log_path}")
+
+    def stop(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.process is not None:
+            self._log.close()
+
+
+def _worker(base: str, routes: List[Route], seed: int, start_at: float, record_from: float, stop_at: float,
+            results: List[Tuple[str, float, int, str, str]]):
+    rng = random.Random(seed)
+    weights = [r.weight for r in routes]
+    session = requests.Session()
+    while time.monotonic() < start_at:
+        time.sleep(0.001)
+    while time.monotonic() < stop_at:
+        route = rng.choices(routes, weights)[0]
+        began = time.monotonic()
+        try:
+            response = route.send(session, base, rng)
+            status, error = response.status_code, ""
+            fallback = route.outcome(response) if response.ok else ""
+        except requests.RequestException as e:
+            status, error, fallback = 0, type(e).__name__, ""
+        ended = time.monotonic()
+        if began >= record_from and ended <= stop_at:
+            results.append((route.name, ended - began, status, error, fallback))
+
+
+def summarize(results, seconds: float) -> dict:
+    by_route: Dict[str, list] = {}
+    for name, *sample in results:
+        by_route.setdefault(name, []).append(sample)
+    report = {}
+    for name, samples in sorted(by_route.items()) + [("all", [s[1:] for s in results])]:
+        latencies = [s[0] * 1000 for s in samples]
+        statuses: Dict[str, int] = {}
+        fallbacks: Dict[str, int] = {}
+        for _, status, error, fallback in samples:
+            key = error or str(status)
+            statuses[key] = statuses.get(key, 0) + 1
+            if fallback:
+                fallbacks[fallback] = fallbacks.get(fallback, 0) + 1
+        errors = sum(1 for _, status, error, _ in samples if error or status >= 500)
+        report[name] = {
+            "requests": len(samples),
+            "errors": errors,
+            "throughput_rps": round(len(samples) / seconds, 2),
+            "p50_ms": round(_percentile(latencies, 50), 2),
+            "p95_ms": round(_percentile(latencies, 95), 2),
+            "p99_ms": round(_percentile(latencies, 99), 2),
+            "max_ms": round(max(latencies), 2),
+            "status": statuses,
+            "fallbacks": fallbacks,
+        }
+    return report
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def run(args) -> dict:
+    routes = parse_mix(args.mix)
+    default = FakeConfig(args.latency, args.jitter, args.error_rate)
+    overrides = {}
+    for cls in SERVICES:
+        latency = getattr(args, f"{cls.name}_latency")
+        error_rate = getattr(args, f"{cls.name}_error_rate")
+        if latency is not None or error_rate is not None:
+            overrides[cls.name] = FakeConfig(args.latency if latency is None else latency, args.jitter,
+                                             args.error_rate if error_rate is None else error_rate)
+
+    with tempfile.TemporaryDirectory(prefix="audexa-load-") as workdir, \
+            start_fakes(default, overrides, seed=args.seed) as fakes:
+        env = fakes.env()
+        if args.faults:
+            env.update(FAULTS=args.faults, FAULT_SEED=str(args.seed), FAULT_TIMEOUT_SECONDS=str(args.fault_timeout))
+        app = AppServer(env, workdir)
+        app.start()
+        try:
+            results: List[Tuple[str, float, int, str, str]] = []
+            start_at = time.monotonic() + 0.2
+            record_from = start_at + args.warmup
+            stop_at = record_from + args.duration
+            threads = [threading.Thread(target=_worker, args=(app.base, routes, args.seed + i, start_at,
+                                                              record_from, stop_at, results), daemon=True)
+                       for i in range(args.concurrency)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                # In-flight requests finish after stop_at; they are not counted
+                t.join(stop_at - time.monotonic() + 130)
+            fake_stats = fakes.stats()
+        finally:
+            app.stop()
+
+    if not results:
+        raise RuntimeError("No requests completed in the measured window")
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {"duration": args.duration, "warmup": args.warmup, "concurrency": args.concurrency,
+                   "mix": {r.name: r.weight for r in routes}, "seed": args.seed, "faults": args.faults},
+        "routes": summarize(results, args.duration),
+        "fakes": fake_stats,
+    }
+
+
+def print_table(report: dict, out=sys.stderr) -> None:
+    print(f"Load test {report['commit']}: {report['config']['concurrency']} clients for "
+          f"{report['config']['duration']:g}s, milliseconds", file=out)
+    print(f"{'route':>10}{'requests':>10}{'errors':>8}{'fallback':>10}{'rps':>9}{'p50':>10}{'p95':>10}{'p99':>10}",
+          file=out)
+    for name, r in report["routes"].items():
+        print(f"{name:>10}{r['requests']:>10}{r['errors']:>8}{sum(r['fallbacks'].values()):>10}"
+              f"{r['throughput_rps']:>9.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end load test against local service fakes")
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds of traffic before measuring")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"route weights (default {DEFAULT_MIX})")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds every fake waits before replying")
+    parser.add_argument("--jitter", type=float, default=0.1, help="extra random delay, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake replies that fail")
+    for cls in SERVICES:
+        parser.add_argument(f"--{cls.name}-latency", type=float, help=f"latency for the {cls.name} fake only")
+        parser.add_argument(f"--{cls.name}-error-rate", type=float, help=f"error rate for the {cls.name} fake only")
+    parser.add_argument("--faults", default="", help='fault injection inside the app, e.g. "llm:quota=0.1;tts:partial=0.1"')
+    parser.add_argument("--fault-timeout", type=float, default=5.0,
+                        help="seconds an injected timeout hangs before failing")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_table(report)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
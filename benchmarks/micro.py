@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the pure-Python functions that run on every message.
+Each function is timed over a multilingual corpus (short and long messages,
+and one for every script the app detects) and reported in ns/op, with the
+allocation cost of one call: the peak of memory traced while it runs
+(tracemalloc), and the blocks still held afterwards, which catches caches
+that grow per call.
+
+Results can be stored as a baseline and later runs compared against it. The
+baseline is only meaningful on the machine that recorded it. Run from the
+repository root:
+
+    python -m benchmarks.micro                  # table
+    python -m benchmarks.micro --save           # record benchmarks/micro_baseline.json
+    python -m benchmarks.micro --compare        # against the baseline; exit 1 on a regression
+    python -m benchmarks.micro --only voice --json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "micro_baseline.json")
+# Slower than the baseline by more than this share counts as a regression
+DEFAULT_THRESHOLD = 0.3
+REPEATS = 7
+# Each repeat runs the corpus often enough to take at least this long
+MIN_REPEAT_SECONDS = 0.05
+
+CORPUS: List[Tuple[str, str]] = [
+    ("short_en", "hi"),
+    ("short_en_negative", "I feel so sad and lonely"),
+    ("question_en", "How do I prepare for a job interview next week?"),
+    ("music_en", "Can you recommend some calm music? I'm stressed about exams"),
+    ("career_en", "What career path suits me? I like technology and my salary is low"),
+    ("crisis_en", "I don't want to live anymore, everything feels hopeless"),
+    ("long_en", "I've been feeling stressed about my exams and can't sleep well. My parents expect a lot and "
+                "I keep comparing myself with my friends. Some days I'm fine, other days I can't get out of "
+                "bed. I tried making a routine but it falls apart by Wednesday. " * 4),
+    ("hi", "मुझे बहुत तनाव है और नींद नहीं आती, मैं क्या करूं?"),
+    ("bn", "আমি খুব একা অনুভব করছি, আমি কি করব?"),
+    ("ta", "நான் மிகவும் கவலையாக இருக்கிறேன், என்ன செய்வது?"),
+    ("te", "నేను చాలా ఒత్తిడిలో ఉన్నాను, ఏమి చేయాలి?"),
+    ("gu", "હું ખૂબ ચિંતિત છું, હું શું કરું?"),
+    ("pa", "ਮੈਂ ਬਹੁਤ ਪਰੇਸ਼ਾਨ ਹਾਂ, ਮੈਂ ਕੀ ਕਰਾਂ?"),
+    ("kn", "ನಾನು ತುಂಬಾ ಒತ್ತಡದಲ್ಲಿದ್ದೇನೆ, ಏನು ಮಾಡಲಿ?"),
+    ("ml", "ഞാൻ വളരെ സമ്മർദ്ദത്തിലാണ്, എന്ത് ചെയ്യണം?"),
+    ("ur", "میں بہت پریشان ہوں، میں کیا کروں؟"),
+    ("ar", "أنا حزين جدا، كيف يمكنني المساعدة؟"),
+    ("ru", "Привет, мне очень грустно, нужно помощь"),
+    ("zh", "你好，我最近压力很大，需要帮助"),
+    ("ja", "こんにちは、最近とても疲れています"),
+    ("ko", "안녕하세요, 요즘 너무 힘들어요 도움이 필요해요"),
+    ("es", "Hola, estoy muy cansado del trabajo y necesito ayuda"),
+    ("fr", "Bonjour, je suis très stressé, j'ai besoin d'aide"),
+    ("de", "Hallo, ich bin sehr müde und ich brauche hilfe"),
+    ("mixed", "yaar I'm so tired, मुझे नींद नहीं आती 😞"),
+]
+
+VOICE_TEXTS = [
+    "Take a slow breath.",
+    "It sounds like a lot is on your mind. Try breathing in for four counts and out for six. "
+    "When you're ready, tell me what has been weighing on you today, and we can look at it together. "
+    "You don't have to sort it all out at once.",
+]
+
+
+def _benchmarks() -> Dict[str, Tuple[Callable, list]]:
+    """name -> (function of one argument, its inputs)"""
+    from backend.analysis import analyze_message
+    from backend.api import analyze_sentiment_fast, detect_language_from_text, get_fallback_response, \
+        optimize_for_voice
+    from backend.enhancements import enhance
+    from backend.messaging import messaging_bot
+
+    texts = [text for _, text in CORPUS]
+    analyses = [analyze_message(text) for text in texts]
+    # lru_cache over the span decorator over the function itself
+    analyze_uncached = analyze_message.__wrapped__.__wrapped__
+
+    def cold(func: Callable) -> Callable:
+        # These read analyze_message, which would otherwise answer every call after the first from its cache
+        def call(text):
+            analyze_message.cache_clear()
+            return func(text)
+        return call
+
+    return {
+        "analyze_message": (analyze_uncached, texts),
+        "analyze_message_cached": (analyze_message, texts),
+        "analyze_sentiment_fast": (cold(analyze_sentiment_fast), texts),
+        "detect_language_from_text": (cold(detect_language_from_text), texts),
+        "MessagingBot.detect_language": (cold(messaging_bot.detect_language), texts),
+        "optimize_for_voice": (optimize_for_voice, VOICE_TEXTS * (len(texts) // 2)),
+        "get_fallback_response": (lambda a: get_fallback_response(a.text, a.language, a), analyses),
+        # The career and music enhancers, since merged into one keyword pass
+        "enhance": (lambda a: enhance(a, a.language, "bench-session"), analyses),
+    }
+
+
+def _time_once(func: Callable, inputs: list, loops: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(loops):
+        for item in inputs:
+            func(item)
+    return (time.perf_counter_ns() - start) / (loops * len(inputs))
+
+
+def measure(func: Callable, inputs: list) -> dict:
+    for item in inputs:
+        func(item)
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        _time_once(func, inputs, loops)
+        if time.perf_counter() - start >= MIN_REPEAT_SECONDS or loops >= 1 << 20:
+            break
+        loops *= 2
+    samples = [_time_once(func, inputs, loops) for _ in range(REPEATS)]
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for item in inputs:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            func(item)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        start_blocks = sys.getallocatedblocks()
+        for _ in range(10):
+            for item in inputs:
+                func(item)
+        retained = (sys.getallocatedblocks() - start_blocks) / (10 * len(inputs))
+    finally:
+        tracemalloc.stop()
+    return {
+        "ns_per_op": round(statistics.median(samples), 1),
+        "min_ns_per_op": round(min(samples), 1),
+        "peak_bytes_per_op": round(statistics.mean(peaks)),
+        "retained_blocks_per_op": round(retained, 2),
+        "ops": loops * len(inputs) * REPEATS,
+    }
+
+
+def run(only: Optional[str] = None) -> dict:
+    results = {}
+    for name, (func, inputs) in _benchmarks().items():
+        if only and only.lower() not in name.lower():
+            continue
+        results[name] = measure(func, inputs)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "corpus": len(CORPUS),
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """Per function: baseline and current best-of-repeats ns/op, the change, and whether it is a regression
+
+    The fastest repeat is compared rather than the median: it is the run least disturbed by the rest
+    of the machine, so it moves much less between runs.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            rows.append({"name": name, "baseline": None, "current": result["min_ns_per_op"], "change": None,
+                         "regression": False})
+            continue
+        change = result["min_ns_per_op"] / base["min_ns_per_op"] - 1 if base["min_ns_per_op"] else 0.0
+        rows.append({"name": name, "baseline": base["min_ns_per_op"], "current": result["min_ns_per_op"],
+                     "change": round(change, 3), "regression": change > threshold})
+    return rows
+
+
+def print_results(report: dict) -> None:
+    print(f"Per-message functions over {report['corpus']} corpus messages (Python {report['python']})")
+    print(f"{'function':<30}{'ns/op':>12}{'min':>12}{'peak B/op':>12}{'kept/op':>10}")
+    for name, r in report["results"].items():
+        print(f"{name:<30}{r['ns_per_op']:>12,.0f}{r['min_ns_per_op']:>12,.0f}{r['peak_bytes_per_op']:>12,}"
+              f"{r['retained_blocks_per_op']:>10.2f}")
+
+
+def print_comparison(rows: List[dict], threshold: float) -> None:
+    print(f"Best ns/op against the baseline (regression: more than {threshold:.0%} slower)")
+    print(f"{'function':<30}{'baseline':>12}{'now':>12}{'change':>10}")
+    for row in rows:
+        if row["baseline"] is None:
+            print(f"{row['name']:<30}{'-':>12}{row['current']:>12,.0f}{'new':>10}")
+            continue
+        flag = "  << slower" if row["regression"] else ""
+        print(f"{row['name']:<30}{row['baseline']:>12,.0f}{row['current']:>12,.0f}{row['change']:>+10.1%}{flag}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the per-message hot functions")
+    parser.add_argument("--only", help="run the benchmarks whose name contains this")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline, exit 1 on a regression")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"allowed slowdown before --compare fails (default {DEFAULT_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    report = run(args.only)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_results(report)
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+    if args.compare:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.threshold)
+        print()
+        print_comparison(rows, args.threshold)
+        return 1 if any(row["regression"] for row in rows) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
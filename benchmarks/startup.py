@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Cold-start report for the web process. Imports the app in fresh interpreters
+under `python -X importtime`, and reports the wall time to a ready app object
+and the modules that cost the most to import, both including their own
+imports (cumulative) and by top-level package. Optional integrations
+(Gemini, Cohere, Telegram, Twilio, Whisper) should load on first use; any of
+them imported at startup is listed. Run from the repository root:
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 5 --top 30 --json
+    python -m benchmarks.startup --budget 1.0     # exit 1 when startup is slower
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use by the code that needs them, never while the app starts
+LAZY_MODULES = ("google.generativeai", "cohere", "telegram", "twilio", "whisper", "torch")
+# Cold-start budget enforced by test_startup.py (STARTUP_BUDGET_SECONDS overrides it)
+DEFAULT_BUDGET_SECONDS = 1.5
+
+# Prints how long importing the app (and so create_app) takes, and which lazy modules got loaded
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import app
+ready = time.perf_counter() - start
+lazy = sorted(name for name in {lazy!r} if name in sys.modules)
+print("STARTUP", ready, ",".join(lazy))
+"""
+
+
+def _parse_importtime(stderr: str) -> List[dict]:
+    """`import time: self [us] | cumulative | name` lines, in import order"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        modules.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return modules
+
+
+def measure_once(workdir: str) -> dict:
+    """Import the app in a fresh interpreter; its session store and profiles go to workdir"""
+    env = dict(os.environ, PYTHONPATH=ROOT, SESSION_DB_PATH=os.path.join(workdir, "sessions.db"),
+               PROFILE_DIR=os.path.join(workdir, "profiles"))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _PROBE.format(lazy=LAZY_MODULES)],
+                          cwd=workdir, env=env, capture_output=True, text=True, timeout=300)
+    marker = [line for line in proc.stdout.splitlines() if line.startswith("STARTUP ")]
+    if proc.returncode != 0 or not marker:
+        raise RuntimeError(f"Importing the app failed ({proc.returncode}):\n{proc.stderr[-2000:]}")
+    _, seconds, lazy = (marker[-1].split(" ", 2) + [""])[:3]
+    return {"seconds": float(seconds), "lazy_loaded": [m for m in lazy.split(",") if m],
+            "modules": _parse_importtime(proc.stderr)}
+
+
+def _by_package(modules: List[dict]) -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    for m in modules:
+        package = m["module"].split(".")[0]
+        totals[package] = totals.get(package, 0) + m["self_us"]
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def run(runs: int = 3, top: int = 20) -> dict:
+    with tempfile.TemporaryDirectory(prefix="audexa-startup-") as workdir:
+        samples = [measure_once(workdir) for _ in range(runs)]
+    # The fastest run is the one least disturbed by the rest of the machine
+    best = min(samples, key=lambda s: s["seconds"])
+    app_import = next((m for m in best["modules"] if m["module"] == "app"), None)
+    return {
+        "python": sys.version.split()[0],
+        "runs": runs,
+        "seconds": round(best["seconds"], 4),
+        "median_seconds": round(statistics.median(s["seconds"] for s in samples), 4),
+        "app_import_ms": round(app_import["cumulative_us"] / 1000, 1) if app_import else None,
+        "lazy_loaded": best["lazy_loaded"],
+        "slowest_modules": [
+            {"module": m["module"], "cumulative_ms": round(m["cumulative_us"] / 1000, 1),
+             "self_ms": round(m["self_us"] / 1000, 1)}
+            for m in sorted(best["modules"], key=lambda m: -m["cumulative_us"])[:top]
+        ],
+        "packages_ms": {name: round(us / 1000, 1) for name, us in list(_by_package(best["modules"]).items())[:top]},
+    }
+
+
+def print_report(report: dict, out=sys.stdout) -> None:
+    print(f"App ready in {report['seconds'] * 1000:.0f} ms (best of {report['runs']}, "
+          f"median {report['median_seconds'] * 1000:.0f} ms, Python {report['python']})", file=out)
+    if report["lazy_loaded"]:
+        print(f"Loaded at startup but meant to be lazy: {', '.join(report['lazy_loaded'])}", file=out)
+    print(f"\n{'module (with its imports)':<60}{'ms':>10}{'self ms':>10}", file=out)
+    for m in report["slowest_modules"]:
+        print(f"{m['module']:<60}{m['cumulative_ms']:>10.1f}{m['self_ms']:>10.1f}", file=out)
+    print(f"\n{'package':<60}{'self ms':>10}", file=out)
+    for name, ms in report["packages_ms"].items():
+        print(f"{name:<60}{ms:>10.1f}", file=out)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import time per module for a cold start of the web app")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to start; the fastest is reported")
+    parser.add_argument("--top", type=int, default=20, help="modules and packages to list")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--budget", type=float, help="fail when startup takes longer than this many seconds, "
+                                                     "or loads an integration that should be lazy")
+    args = parser.parse_args(argv)
+
+    report = run(args.runs, args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    if args.budget is not None and (report["seconds"] > args.budget or report["lazy_loaded"]):
+        print(f"\nOver budget: {report['seconds']:.2f}s against {args.budget:.2f}s"
+              f"{', lazy modules loaded' if report['lazy_loaded'] else ''}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass message analysis.
+Run with: python -m pytest test_analysis.py
+"""
+
+import pytest
+
+from backend.analysis import analyze_message
+
+
+@pytest.mark.parametrize("text, language, script", [
+    ("give me some resume tips", "en", "latin"),
+    ("I know it is not easy", "en", "latin"),
+    ("hola, necesito ayuda", "es", "latin"),
+    ("je suis triste", "fr", "latin"),
+    ("मुझे नींद नहीं आती", "hi", "devanagari"),
+    ("こんにちは", "ja", "kana"),
+    ("Привет", "ru", "cyrillic"),
+])
+def test_language_and_script(text, language, script):
+    analysis = analyze_message(text)
+    assert (analysis.language, analysis.script) == (language, script)
+
+
+@pytest.mark.parametrize("text", [
+    # Indicators match whole words only ("es" in "stress", "no" in "know")
+    "I'm so stressed about my exams",
+    # Single ambiguous indicators are not evidence
+    "My sim card stopped working",
+    "ja I think so",
+    "ho ho ho, merry christmas",
+    "Can I leave a comment on your post?",
+    "Is soy milk healthy?",
+])
+def test_short_english_messages_stay_english(text):
+    assert analyze_message(text).language == "en"
+
+
+@pytest.mark.parametrize("text, language", [
+    ("ja, es tut mir leid", "de"),
+    ("sim, tenho medo", "pt"),
+    ("non merci", "fr"),
+    ("ho bisogno di aiuto", "it"),
+    ("hola", "es"),
+    ("danke", "de"),
+])
+def test_ambiguous_indicators_need_company(text, language):
+    assert analyze_message(text).language == language
+
+
+def test_signals_come_from_one_tokenization():
+    analysis = analyze_message("I’m  SO stressed. Feeling sad!")
+    assert analysis.normalized == "i'm so stressed. feeling sad!"
+    assert analysis.tokens == ("i'm", "so", "stressed", "feeling", "sad")
+    # Punctuation no longer hides sentiment words
+    assert analysis.sentiment == "negative"
+    assert analysis.intent == "stress"
+    assert analysis.crisis is None
+    assert analyze_message("I want to kill myself").crisis.category == "self_harm"
+
+
+def test_immutable_and_cached():
+    analysis = analyze_message("hello there")
+    with pytest.raises(AttributeError):
+        analysis.language = "fr"
+    with pytest.raises(AttributeError):
+        analysis.extra = 1
+    assert analyze_message("hello there") is analysis
+
+
+def test_empty_message():
+    analysis = analyze_message("")
+    assert (analysis.tokens, analysis.language, analysis.sentiment, analysis.crisis, analysis.intent) == \
+        ((), "en", "neutral", None, None)
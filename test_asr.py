@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared speech-to-text service with a stubbed Whisper model and
+a stubbed ffmpeg, so neither needs to be installed.
+Run with: python -m pytest test_asr.py
+"""
+
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from backend import asr, audio
+from backend.audio import AudioDecodeError
+from backend.errors import MalformedResponse
+from backend.metrics import metric_labels
+
+
+class FakeModel:
+    """Whisper stand-in that fails if two threads ever share one replica"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.busy = threading.Lock()
+        self.calls = []
+
+    def transcribe(self, pcm, **options):
+        assert self.busy.acquire(blocking=False), "one model replica used by two threads at once"
+        try:
+            time.sleep(self.delay)
+            from backend import metrics
+            self.calls.append((threading.current_thread().name, metrics._context.get()))
+            return {"text": f"{len(pcm)} samples", "language": options.get("language"), "segments": []}
+        finally:
+            self.busy.release()
+
+
+@pytest.fixture
+def models(monkeypatch):
+    """Stub whisper module; returns the replicas it loaded"""
+    loaded = []
+
+    def load_model(name, device):
+        model = FakeModel(delay=0.02)
+        loaded.append(model)
+        return model
+
+    monkeypatch.setitem(sys.modules, "whisper", types.SimpleNamespace(load_model=load_model))
+    monkeypatch.setattr(asr, "_local", threading.local())
+    return loaded
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    """Stub ffmpeg: decodes any input to 0.1 s of 16 kHz s16le silence; records what it was given"""
+    runs = []
+
+    def run(cmd, input=None, capture_output=False, check=False):
+        runs.append((cmd, input))
+        if input.startswith(b"BAD"):
+            return subprocess.CompletedProcess(cmd, 1, b"", b"Invalid data found when processing input")
+        return subprocess.CompletedProcess(cmd, 0, np.zeros(1600, np.int16).tobytes(), b"")
+
+    monkeypatch.setattr(audio.subprocess, "run", run)
+    return runs
+
+
+def test_downloaded_bytes_are_decoded_in_memory(models, ffmpeg):
+    result = asr.transcribe(bytearray(b"OggS voice note"), language="hi")
+    assert result == {"text": "1600 samples", "language": "hi", "segments": []}
+    # Piped through stdin and stdout; nothing was written to disk
+    cmd, data = ffmpeg[0]
+    assert cmd[cmd.index("-i") + 1] == "pipe:0" and cmd[-1] == "pipe:1" and data == b"OggS voice note"
+    # The model runs on an ASR worker, not the caller's thread
+    assert models[0].calls[0][0].startswith("asr")
+
+
+def test_decode_failures_are_reported(models, ffmpeg, monkeypatch):
+    with pytest.raises(AudioDecodeError, match="Invalid data"):
+        asr.transcribe(b"BAD bytes")
+
+    def missing(*args, **kwargs):
+        raise FileNotFoundError("ffmpeg")
+
+    monkeypatch.setattr(audio.subprocess, "run", missing)
+    with pytest.raises(AudioDecodeError, match="not installed"):
+        asr.transcribe(b"OggS")
+    # Nothing reached the model
+    assert all(not model.calls for model in models)
+
+
+def test_unreadable_transcriptions_are_typed(models, ffmpeg, monkeypatch):
+    monkeypatch.setattr(FakeModel, "transcribe", lambda self, pcm, **options: None)
+    with pytest.raises(MalformedResponse):
+        asr.transcribe(np.zeros(160, np.float32))
+
+
+def test_concurrent_submissions_share_the_asr_workers(models, ffmpeg, monkeypatch):
+    monkeypatch.setattr(asr, "_executor", ThreadPoolExecutor(max_workers=2, thread_name_prefix="asr"))
+    ticks = []
+
+    async def heartbeat():
+        # Keeps running while transcriptions are in flight: the event loop is never blocked
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        with metric_labels(channel="telegram"):
+            return await asyncio.gather(heartbeat(), *(asr.transcribe_async(b"OggS clip") for _ in range(8)))
+
+    try:
+        results = asyncio.run(main())[1:]
+    finally:
+        asr._executor.shutdown()
+
+    assert [r["text"] for r in results] == ["1600 samples"] * 8
+    assert len(ticks) == 5
+    # One replica per worker thread, each loaded once and reused
+    assert len(models) == 2 and sum(len(m.calls) for m in models) == 8
+    threads = {name for model in models for name, _ in model.calls}
+    assert len(threads) == 2
+    # The caller's metric labels ride along to the worker
+    assert all(labels[1] == "telegram" for model in models for _, labels in model.calls)
+
+
+def test_whisper_available_reflects_the_import(models, monkeypatch):
+    assert asr.whisper_available()
+    monkeypatch.setitem(sys.modules, "whisper", None)
+    assert not asr.whisper_available()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the career data file and role search.
+Run with: python -m pytest test_career_guidance.py
+"""
+
+import json
+
+import pytest
+
+from backend.career_guidance import (
+    CAREER_DATA_VERSION, CareerGuidance, CareerIndex, Role, career_guidance, edit_distance, load_career_data,
+)
+
+ROLES = [
+    Role("Data Scientist", "technology", ["Python", "Statistics"], 8, 30, ["5-10", "10-20", "20+"]),
+    Role("Data Engineer", "technology", ["SQL", "Cloud Computing"], 6, 20, ["5-10", "10-20"]),
+    Role("Financial Analyst", "finance", ["Excel", "Data Analysis"], 5, 18, ["5-10", "10-20"]),
+    Role("Nurse Practitioner", "healthcare", ["Patient Care"], 4, 12, ["0-5", "5-10", "10-20"]),
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return CareerIndex(ROLES)
+
+
+def titles(matches):
+    return [m.role.title for m in matches]
+
+
+def test_data_file_is_frozen_and_keeps_the_old_getters():
+    assert career_guidance.get_career_resources("resume_tips")[0] == "Use action verbs to describe achievements."
+    assert career_guidance.get_career_resources("nope") == ()
+    assert career_guidance.get_industry_insights("Technology")["salary_range"] == "₹6 LPA - ₹30 LPA+"
+    assert "message" in career_guidance.get_industry_insights("farming")
+    with pytest.raises(TypeError):
+        career_guidance.data["industries"]["technology"]["salary_range"] = "x"
+
+
+def test_other_data_versions_are_rejected(tmp_path):
+    path = tmp_path / "career.json"
+    path.write_text(json.dumps({"version": CAREER_DATA_VERSION + 1}))
+    with pytest.raises(ValueError):
+        load_career_data(str(path))
+
+
+def test_roles_are_tagged_with_overlapping_salary_bands():
+    roles = {r.title: r for r in CareerGuidance().index.roles}
+    assert roles["Nurse Practitioner"].bands == ("0-5", "5-10", "10-20")
+    assert roles["Investment Banker"].bands == ("10-20", "20+")
+
+
+def test_exact_words_rank_title_hits_first(index):
+    assert titles(index.search("data")) == ["Data Scientist", "Data Engineer", "Financial Analyst"]
+    assert titles(index.search("data scientist"))[0] == "Data Scientist"
+
+
+def test_prefix_and_typo_matching(index):
+    assert titles(index.search("data sci"))[0] == "Data Scientist"
+    assert titles(index.search("pyhton")) == ["Data Scientist"]
+    assert titles(index.search("nurse practicioner")) == ["Nurse Practitioner"]
+    assert titles(index.search("sq")) == ["Data Engineer"]
+    # Short words are not corrected
+    assert index.search("sqk") == []
+    assert index.search("xyz") == []
+
+
+def test_filters_narrow_results(index):
+    assert titles(index.search("data", industry="Finance")) == ["Financial Analyst"]
+    assert titles(index.search("", band="0-5")) == ["Nurse Practitioner"]
+    assert titles(index.search("", skill="python", band="20+")) == ["Data Scientist"]
+    assert index.search("data", industry="farming") == []
+    assert index.search("") == []
+
+
+def test_edit_distance():
+    assert edit_distance("python", "pyhton") == 1
+    assert edit_distance("engneer", "engineer") == 1
+    assert edit_distance("cat", "dog", limit=1) == 2
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the token-budgeted prompt builder and its rolling summary.
+Run with: python -m pytest test_context.py
+"""
+
+from backend.context import CONTEXT_MIN_HISTORY_TOKENS, build_context, estimate_tokens, fold_into_summary
+from backend.kv_session_store import InMemoryKV, KeyValueSessionStore
+from backend.session_cache import SessionCache
+
+
+def _turns(count):
+    messages = []
+    for i in range(count):
+        messages.append({"role": "user", "content": f"Question {i}. " + "detail " * 40})
+        messages.append({"role": "assistant", "content": f"Answer {i}. " + "advice " * 40})
+    return messages
+
+
+def test_prompt_stays_within_budget():
+    history = _turns(100)
+    context = build_context("You are AUDEXA.", history, "How do I sleep better?", budget=800)
+
+    assert context.tokens <= 800
+    assert 0 < context.history_messages < len(history)
+    assert context.prompt.endswith("USER: How do I sleep better?\nASSISTANT:")
+    assert "Answer 99." in context.prompt
+    assert context.summary_upto == len(history) - context.history_messages
+
+
+def _notes(count):
+    return "Relevant notes:\n" + "\n".join(f"- Guide {i}: " + "breathe slowly " * 30 for i in range(count))
+
+
+def test_notes_are_trimmed_before_history():
+    history = _turns(20)
+    roomy = build_context("sys", history, "next", budget=6000, notes=_notes(3))
+    assert "- Guide 2:" in roomy.prompt
+
+    tight = build_context("sys", history, "next", budget=1200, notes=_notes(10))
+    assert tight.tokens <= 1200
+    history_lines = tight.prompt.split("\n\n")[-2].split("\n")
+    longest = max(estimate_tokens(f"ASSISTANT: {m['content']}") + 1 for m in history)
+    # The floor, short of at most the one message that did not fit
+    assert sum(estimate_tokens(line) + 1 for line in history_lines) > CONTEXT_MIN_HISTORY_TOKENS - longest
+    # The best notes survive, the rest go; a heading on its own is dropped
+    assert "- Guide 0:" in tight.prompt and "- Guide 9:" not in tight.prompt
+    cramped = build_context("sys", history, "next", budget=780, notes=_notes(10))
+    assert "Relevant notes" not in cramped.prompt and "Answer 19." in cramped.prompt
+
+
+def test_history_survives_a_crowded_budget():
+    # The system prompt and query alone take more than the whole budget
+    context = build_context("rules " * 1500, _turns(5), "help " * 800, budget=2000, notes=_notes(3))
+    assert context.history_messages > 0 and "Answer 4." in context.prompt
+    assert "Relevant notes" not in context.prompt
+
+
+def test_summary_folds_each_message_once():
+    history = _turns(10)
+    first = build_context("sys", history, "next", budget=600)
+    again = build_context("sys", history, "next", first.summary, first.summary_upto, budget=600)
+    assert again.summary == first.summary
+
+    more = history + _turns(2)
+    later = build_context("sys", more, "next", first.summary, first.summary_upto, budget=600)
+    assert later.summary_upto > first.summary_upto
+    assert later.summary.count("\n") >= first.summary.count("\n")
+
+
+def test_summary_is_bounded():
+    summary = fold_into_summary("", _turns(200), budget=100)
+    assert estimate_tokens(summary) <= 100
+    assert summary.endswith("AUDEXA: Answer 199.")
+
+
+def test_summary_survives_cache_reload():
+    store = KeyValueSessionStore(InMemoryKV())
+    cache = SessionCache(store)
+    session = cache.get("u1", "en")
+    cache.append(session, _turns(5))
+    cache.update_summary(session, "User: Question 0.", 2)
+    cache.flush()
+
+    reloaded = SessionCache(store).get("u1")
+    assert reloaded.summary == "User: Question 0."
+    assert reloaded.summary_upto == 2
+    assert reloaded.first_index == 0 and reloaded.total == 10
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the server-side conversation endpoints.
+Run with: python -m pytest test_conversations.py
+"""
+
+import pytest
+from flask import Flask
+
+import backend.api as api
+from backend.metrics import install
+from backend.session_cache import SessionCache
+from backend.session_store import SQLiteSessionStore
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = SessionCache(SQLiteSessionStore(str(tmp_path / "sessions.db")), flush_interval=60)
+    monkeypatch.setattr(api, "get_session_cache", lambda: cache)
+    # Answered by the rule-based fallback, without a model call
+    monkeypatch.setattr(api, "gemini_configured", lambda: False)
+    return cache
+
+
+@pytest.fixture
+def client(cache):
+    app = Flask(__name__)
+    app.register_blueprint(api.api, url_prefix="/home/api")
+    # Unbinds the metric labels each request sets
+    install(app)
+    return app.test_client()
+
+
+def test_create_then_append(client, cache):
+    created = client.post("/home/api/conversations", json={"language": "en"})
+    assert created.status_code == 201
+    conversation_id = created.get_json()["conversation_id"]
+    assert api.CONVERSATION_ID_RE.match(conversation_id)
+
+    for message in ("How can I sleep better?", "And what about stress before exams?"):
+        response = client.post(f"/home/api/conversations/{conversation_id}/messages", json={"msg": message})
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["conversation_id"] == conversation_id and body["answer"]
+
+    log = list(cache.get(conversation_id, create=False).log)
+    assert [m["role"] for m in log] == ["user", "assistant", "user", "assistant"]
+    assert log[2]["content"] == "And what about stress before exams?"
+
+
+def test_unknown_conversation_is_404(client):
+    response = client.post(f"/home/api/conversations/{api.WEB_CONVERSATION_PREFIX}{'0' * 32}/messages",
+                           json={"msg": "hello"})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("conversation_id", [
+    "123456789",  # a Telegram chat id
+    "whatsapp-session-1",
+    "web-not-hex-not-hex-not-hex-not-hex",
+    f"web-{'a' * 31}",
+])
+def test_ids_not_issued_by_the_server_are_rejected(client, cache, conversation_id):
+    # Even an existing bot session cannot be reached through the web API
+    cache.get(conversation_id)
+    response = client.post(f"/home/api/conversations/{conversation_id}/messages", json={"msg": "hello"})
+    assert response.status_code == 400
+
+
+def test_empty_and_oversized_messages(client):
+    conversation_id = client.post("/home/api/conversations", json={}).get_json()["conversation_id"]
+    url = f"/home/api/conversations/{conversation_id}/messages"
+    assert client.post(url, json={"msg": "  "}).status_code == 400
+    assert client.post(url, json={"msg": "x" * (api.MAX_MESSAGE_CHARS + 1)}).status_code == 413
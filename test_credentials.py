@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the API credential pool against a fake provider that answers with
+429s once a key's quota is used up.
+Run with: python -m pytest test_credentials.py
+"""
+
+import pytest
+
+from backend.credentials import CredentialPool, CredentialsExhausted, is_auth_error, is_quota_error
+
+
+class QuotaExceeded(Exception):
+    code = 429
+
+
+class FakeProvider:
+    """Serves `quota` calls per key, then fails like the real APIs do"""
+
+    def __init__(self, quotas, invalid=()):
+        self.quotas = dict(quotas)
+        self.invalid = set(invalid)
+        self.calls = []
+
+    def __call__(self, api_key):
+        self.calls.append(api_key)
+        if api_key in self.invalid:
+            raise PermissionError("403 API key not valid. Please pass a valid API key.")
+        if self.quotas[api_key] <= 0:
+            raise QuotaExceeded("429 Resource has been exhausted (e.g. check quota). Please retry in 30s")
+        self.quotas[api_key] -= 1
+        return f"ok:{api_key}"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rotates_across_keys():
+    provider = FakeProvider({"key-aaaa1111": 10, "key-bbbb2222": 10})
+    pool = CredentialPool("gemini", list(provider.quotas), clock=FakeClock())
+    for _ in range(4):
+        pool.call(provider)
+    assert provider.calls == ["key-aaaa1111", "key-bbbb2222", "key-aaaa1111", "key-bbbb2222"]
+
+
+def test_steers_away_from_exhausted_key():
+    clock = FakeClock()
+    provider = FakeProvider({"key-aaaa1111": 1, "key-bbbb2222": 100})
+    pool = CredentialPool("gemini", list(provider.quotas), clock=clock, quota_cooldown=60)
+
+    results = [pool.call(provider) for _ in range(10)]
+    assert results[-1] == "ok:key-bbbb2222"
+    # Exhausted key was hit once with a 429 and then left alone while cooling down
+    assert provider.calls.count("key-aaaa1111") == 2
+
+    stats = {s["key"]: s for s in pool.stats()}
+    assert stats["…1111"]["quota_errors"] == 1
+    assert stats["…1111"]["available"] is False
+    assert stats["…2222"]["successes"] == 9
+
+    clock.now += 61
+    provider.quotas["key-aaaa1111"] = 5
+    pool.call(provider)
+    assert provider.calls[-1] == "key-aaaa1111"
+
+
+def test_all_keys_exhausted_raises_with_retry_after():
+    provider = FakeProvider({"key-aaaa1111": 0, "key-bbbb2222": 0})
+    pool = CredentialPool("cohere", list(provider.quotas), clock=FakeClock(), quota_cooldown=10)
+
+    with pytest.raises(CredentialsExhausted) as excinfo:
+        pool.call(provider)
+    # The provider's retry hint outranks the shorter default cooldown
+    assert excinfo.value.retry_after == pytest.approx(30)
+    assert "quota" in str(excinfo.value)
+
+    with pytest.raises(CredentialsExhausted):
+        pool.call(provider)
+    assert len(provider.calls) == 2
+
+
+def test_invalid_key_is_parked_and_other_errors_propagate():
+    provider = FakeProvider({"key-aaaa1111": 10, "key-bbbb2222": 10}, invalid={"key-aaaa1111"})
+    pool = CredentialPool("gemini", list(provider.quotas), clock=FakeClock())
+    assert pool.call(provider) == "ok:key-bbbb2222"
+    assert pool.stats()[0]["auth_errors"] == 1
+
+    def broken(api_key):
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        pool.call(broken)
+    assert pool.stats()[1]["in_flight"] == 0
+
+
+def test_error_classification():
+    assert is_quota_error(QuotaExceeded("x"))
+    assert is_quota_error(RuntimeError("ResourceExhausted: quota exceeded"))
+    assert not is_quota_error(RuntimeError("deadline exceeded"))
+    assert is_auth_error(RuntimeError("API key expired. Please renew the API key."))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the crisis detector and the pre-rendered crisis replies.
+Run with: python -m pytest test_crisis.py
+"""
+
+import pytest
+
+from backend.crisis import CRISIS_MESSAGES, HELPLINES, crisis_response, detect_crisis
+
+
+@pytest.mark.parametrize("text, category, language", [
+    ("I'm feeling suicidal tonight", "self_harm", "en"),
+    ("I don’t  want to live anymore", "self_harm", "en"),
+    ("My husband beats me", "abuse", "en"),
+    ("He hits me when he drinks", "abuse", "en"),
+    ("I was raped last year", "abuse", "en"),
+    ("J'ai été violée", "abuse", "fr"),
+    ("That joke killed me, but honestly I want to die", "self_harm", "en"),
+    ("मैं आत्महत्या के बारे में सोच रहा हूं", "self_harm", "hi"),
+    ("Estoy cansado, quiero morir", "self_harm", "es"),
+    ("最近、死にたいと思う", "self_harm", "ja"),
+    ("I keep having PTSD flashbacks", "trauma", "en"),
+    ("Help with substance abuse", "trauma", "en"),
+])
+def test_detects_category_and_language(text, category, language):
+    match = detect_crisis(text)
+    assert match is not None
+    assert (match.category, match.language) == (category, language)
+
+
+@pytest.mark.parametrize("text", ["I had grapes for lunch", "What career suits a therapist?", "I feel great", ""])
+def test_no_false_positives(text):
+    assert detect_crisis(text) is None
+
+
+@pytest.mark.parametrize("text", [
+    "Beats me, what career should I choose?",
+    "It hits me that I need a new job",
+    "tell me about rape seed oil",
+    "kill myself laughing",
+    "That show had me killing myself laughing",
+    "I'd kill myself laughing if he tried",
+    "le viol est un instrument de guerre, disait le cours d'histoire",
+    "Quiero morir de risa con esta película",
+])
+def test_idioms_and_ambiguous_words_are_not_acute(text):
+    match = detect_crisis(text)
+    assert match is None or not match.acute, (text, match and match.term)
+
+
+def test_responses_are_localized_and_carry_helplines():
+    match = detect_crisis("quiero morir")
+    assert crisis_response(match) == f"{CRISIS_MESSAGES['es']['self_harm']}\n\n{HELPLINES['self_harm']}"
+    # An explicit language choice wins over the language of the matched term
+    assert crisis_response(match, "hi").startswith(CRISIS_MESSAGES["hi"]["self_harm"])
+    assert crisis_response(match, "xx").startswith(CRISIS_MESSAGES["en"]["self_harm"])
+    assert crisis_response(detect_crisis("PTSD")) is None
+
+
+def test_every_language_has_both_acute_messages():
+    for language, messages in CRISIS_MESSAGES.items():
+        assert set(messages) == set(HELPLINES), language
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the career and music enhancement registry.
+Run with: python -m pytest test_enhancements.py
+"""
+
+from backend import enhancements
+from backend.analysis import analyze_message
+from backend.enhancements import enhance, snippet
+from backend.fallback_catalog import FallbackCatalog
+
+
+def headings(text):
+    return [line for line in (text or "").split("\n") if line.endswith(":") and not line.startswith(" ")]
+
+
+def test_career_sections_in_registry_order():
+    text = enhance(analyze_message("Help with my interview, and my resume too"))
+    assert headings(text) == ["Resume — quick tips:", "Interview — do this:"]
+    assert "1. Use action verbs to describe achievements.\n" in text
+
+
+def test_one_entry_per_group():
+    text = enhance(analyze_message("Should I pick finance or technology?"))
+    # Only the first industry listed in the registry
+    assert "Technology — quick view:" in text and "Finance — quick view:" not in text
+    sad_and_happy = enhance(analyze_message("play me a song, I'm sad but also happy"))
+    assert headings(sad_and_happy) == ["Here are some uplifting songs for you:"]
+
+
+def test_moods_need_a_music_request():
+    assert enhance(analyze_message("I feel so sad today")) is None
+    assert headings(enhance(analyze_message("any music?"))) == [
+        "I'd love to help with music! Here are some great options:"]
+    mix = enhance(analyze_message("any music?"))
+    assert [line.rsplit("(", 1)[-1] for line in mix.split("\n") if line[:2] in ("1.", "2.", "3.")] == [
+        "for relaxation)", "for energy)", "for comfort)"]
+
+
+def test_playlists_do_not_repeat_within_a_session():
+    first = enhance(analyze_message("play some music, I'm stressed"), session_id="enhance-test")
+    second = enhance(analyze_message("more music please, still stressed"), session_id="enhance-test")
+    songs = [line for text in (first, second) for line in text.split("\n") if line[:2] in ("1.", "2.", "3.")]
+    assert len(songs) == 6 and len({s[3:] for s in songs}) == 6
+
+
+def test_whole_words_only():
+    # "pay" in "repay", "play" in "display", "cv" in "cvs"
+    assert enhance(analyze_message("the display shows what I repay at cvs")) is None
+
+
+def test_snippets_are_memoized():
+    assert snippet("resume", "hi") is snippet("resume", "hi")
+
+
+def test_snippets_are_served_from_the_translated_catalog(tmp_path, monkeypatch):
+    catalog = FallbackCatalog(enhancements.snippet_catalog.source, None, str(tmp_path))
+    catalog.build("hi", lambda text, language: f"[{language}] {text}")
+    monkeypatch.setattr(enhancements, "snippet_catalog", catalog)
+    english = catalog.source["resume"]
+    assert snippet("resume", "hi") == f"[hi] {english}"
+    # No catalog for Tamil yet: English
+    assert snippet("resume", "ta") == english
+    assert f"[hi] {english}" in enhance(analyze_message("Help with my resume"), "hi")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the translated fallback reply catalog.
+Run with: python -m pytest test_fallback_catalog.py
+"""
+
+import json
+
+import pytest
+
+from backend.fallback_catalog import CATALOG_VERSION, FallbackCatalog
+
+SOURCE = {"anxiety": "Breathe in for 4.", "sleep": "Keep a routine."}
+DEFAULT = "I'm listening."
+
+
+def fake_translate(text, language):
+    return f"[{language}] {text}"
+
+
+def test_build_then_serve_translations(tmp_path):
+    catalog = FallbackCatalog(SOURCE, DEFAULT, str(tmp_path))
+    assert catalog.build("hi", fake_translate) == 3
+    responses, default = catalog.get("hi")
+    assert responses == {"anxiety": "[hi] Breathe in for 4.", "sleep": "[hi] Keep a routine."}
+    assert default == "[hi] I'm listening."
+    # English and untranslated languages are served from the source
+    assert catalog.get("auto") == (SOURCE, DEFAULT)
+    assert catalog.get("ta") == (SOURCE, DEFAULT)
+    # Up-to-date intents are not retranslated
+    assert catalog.build("hi", fake_translate) == 0
+
+
+def test_stale_translations_fall_back_to_english(tmp_path):
+    FallbackCatalog(SOURCE, DEFAULT, str(tmp_path)).build("hi", fake_translate)
+    changed = dict(SOURCE, sleep="Keep a routine and skip late caffeine.")
+    catalog = FallbackCatalog(changed, DEFAULT, str(tmp_path))
+    responses, _ = catalog.get("hi")
+    assert responses["anxiety"] == "[hi] Breathe in for 4."
+    assert responses["sleep"] == changed["sleep"]
+    assert catalog.build("hi", fake_translate) == 1
+
+
+def test_failed_build_keeps_finished_intents(tmp_path):
+    def flaky(text, language):
+        if "routine" in text:
+            raise RuntimeError("quota")
+        return fake_translate(text, language)
+
+    catalog = FallbackCatalog(SOURCE, DEFAULT, str(tmp_path))
+    with pytest.raises(RuntimeError):
+        catalog.build("ta", flaky)
+    assert catalog.get("ta")[0]["anxiety"] == "[ta] Breathe in for 4."
+    assert catalog.build("ta", fake_translate) == 2
+
+
+def test_other_catalog_versions_are_ignored(tmp_path):
+    (tmp_path / "hi.json").write_text(json.dumps({
+        "version": CATALOG_VERSION + 1, "responses": {"anxiety": "x"}, "sources": {},
+    }))
+    assert FallbackCatalog(SOURCE, DEFAULT, str(tmp_path)).get("hi") == (SOURCE, DEFAULT)
+
+
+def test_missing_catalog_is_reported_once(tmp_path, capsys):
+    catalog = FallbackCatalog(SOURCE, DEFAULT, str(tmp_path))
+    assert catalog.get("ta") == (SOURCE, DEFAULT)
+    catalog.get("ta")
+    catalog.get("en")
+    out = capsys.readouterr().out
+    assert out.count("No fallback catalog for ta") == 1 and "for en" not in out
+
+
+def test_a_path_in_the_language_is_served_english(tmp_path):
+    # A catalog-shaped file one level up, like backend/data/career.json
+    (tmp_path / "career.json").write_text(json.dumps({"version": CATALOG_VERSION, "roles": []}))
+    (tmp_path / "fallback").mkdir()
+    catalog = FallbackCatalog(SOURCE, DEFAULT, str(tmp_path / "fallback"))
+    assert catalog.get("../career") == (SOURCE, DEFAULT)
+
+
+def test_unknown_languages_share_the_english_entry(tmp_path, capsys):
+    catalog = FallbackCatalog(SOURCE, DEFAULT, str(tmp_path))
+    for i in range(50):
+        assert catalog.get(f"zz{i}") == (SOURCE, DEFAULT)
+    assert list(catalog._languages) == ["en"]
+    assert "No fallback catalog" not in capsys.readouterr().out
+
+def test_empty_translations_are_not_written(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    import backend.gemini as gemini
+    from backend.errors import MalformedResponse
+    from backend.fallback_catalog import gemini_translate
+
+    monkeypatch.setattr(gemini, "generate_content", lambda prompt, model_name: SimpleNamespace(text="  "))
+    catalog = FallbackCatalog(SOURCE, DEFAULT, str(tmp_path))
+    with pytest.raises(MalformedResponse):
+        catalog.build("hi", gemini_translate)
+    assert catalog.read("hi")["responses"] == {}
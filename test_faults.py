@@ -0,0 +1,172 @@
+import contextvars
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+import backend.api as api
+import backend.gemini as gemini
+from backend import faults
+from backend.credentials import CredentialPool, CredentialsExhausted, _pools, is_quota_error
+from backend.errors import MalformedResponse, PartialResponse, UpstreamTimeout, failure_reason
+from backend.faults import FaultInjector, Malformed, parse_faults
+from backend.scheduler import SchedulerBusy
+from benchmarks.fakes import FAKE_MP3, GEMINI_REPLY, FakeConfig, start_fakes
+
+MESSAGES = [
+    "How do I prepare for a job interview next week?",
+    "Can you suggest some music for studying?",
+    "My code review found an error and my manager was upset",
+    "What are some ways to calm down before an exam?",
+]
+
+
+def _reply(message):
+    # generate_reply binds metric labels for the rest of the request; keep them out of this thread
+    return contextvars.copy_context().run(api.generate_reply, message, [api.WEB_SYSTEM_MESSAGE], "es")
+
+
+@pytest.fixture(autouse=True)
+def no_faults():
+    yield
+    faults.configure("")
+
+
+def test_parse_faults():
+    plans = parse_faults("llm:quota=0.2,latency=0.5; tts:partial=0.1,malformed=0.1;")
+    assert set(plans) == {"llm", "tts"}
+    assert plans["llm"].quota == 0.2 and plans["llm"].latency == 0.5 and plans["llm"].timeout == 0.0
+    assert parse_faults("") == {}
+    for spec in ("db:quota=0.1", "llm:explode=0.1", "llm:quota=2", "llm:quota=0.6,partial=0.6"):
+        with pytest.raises(ValueError):
+            parse_faults(spec)
+
+
+def test_injected_failures_are_typed():
+    def injector(spec):
+        return FaultInjector(parse_faults(spec), seed=1, timeout_seconds=0)
+
+    calls = []
+    with pytest.raises(UpstreamTimeout):
+        injector("asr:timeout=1").call("asr", calls.append, 1)
+    with pytest.raises(Exception) as excinfo:
+        injector("llm:quota=1").call("llm", calls.append, 2)
+    assert is_quota_error(excinfo.value) and failure_reason(excinfo.value) == "quota"
+    assert calls == []
+
+    assert isinstance(injector("tts:malformed=1").call("tts", lambda: b"ID3"), Malformed)
+    with pytest.raises(PartialResponse):
+        injector("sentiment:partial=1").call("sentiment", calls.append, 3)
+    # The request went out; its response was lost
+    assert calls == [3]
+    # Other boundaries are untouched
+    assert injector("llm:quota=1").call("tts", lambda: "ok") == "ok"
+
+
+def test_failure_shares_follow_the_plan():
+    injector = FaultInjector(parse_faults("llm:malformed=0.2,partial=0.1"), seed=7)
+    for _ in range(2000):
+        try:
+            injector.call("llm", lambda: "ok")
+        except PartialResponse:
+            pass
+    stats = injector.stats()["llm"]
+    assert stats["calls"] == 2000
+    assert 300 < stats["injected"]["malformed"] < 500
+    assert 130 < stats["injected"]["partial"] < 270
+
+
+def test_failure_reason():
+    assert failure_reason(CredentialsExhausted("gemini", 30)) == "quota"
+    assert failure_reason(SchedulerBusy("LLM queue is full")) == "busy"
+    assert failure_reason(TimeoutError()) == "timeout"
+    assert failure_reason(MalformedResponse("llm", "empty answer")) == "malformed"
+    assert failure_reason(RuntimeError("401 API key not valid")) == "auth"
+    assert failure_reason(RuntimeError("socket closed")) == "error"
+
+
+def test_tts_rejects_a_payload_that_is_not_audio(monkeypatch):
+    from backend import tts
+
+    monkeypatch.setattr(tts, "_render", lambda text, language: FAKE_MP3)
+    assert tts.synthesize_mp3("Take a slow breath.", "en") == (FAKE_MP3, "en")
+    faults.configure("tts:malformed=1")
+    with pytest.raises(MalformedResponse):
+        tts.synthesize_mp3("Take a slow breath.", "en")
+    monkeypatch.setattr(tts, "_render", lambda text, language: b"<html>rate limited</html>")
+    faults.configure("")
+    with pytest.raises(MalformedResponse):
+        tts.synthesize_mp3("Take a slow breath.", "en")
+
+
+def test_tts_reports_the_language_it_fell_back_to(monkeypatch):
+    from backend import tts
+
+    def render(text, language):
+        if language != "en":
+            raise RuntimeError("gTTS 500")
+        return FAKE_MP3
+
+    monkeypatch.setattr(tts, "_render", render)
+    assert tts.synthesize_mp3("Respira despacio.", "es") == (FAKE_MP3, "en")
+    cache = tts.VoiceNoteCache()
+    monkeypatch.setattr(tts, "encode_opus", lambda mp3: b"OggS")
+    note = cache.get_or_create("Respira despacio.", "es")
+    assert note.language == "en"
+    # The English stand-in is not kept, so the next send tries Spanish again
+    assert cache.get(note.key) is None
+
+
+@pytest.fixture
+def gemini_answers(monkeypatch):
+    monkeypatch.setattr(api, "gemini_configured", lambda: True)
+
+    def answer_with(result):
+        def fake_generate_content(prompt, model_name, priority, **kwargs):
+            if isinstance(result, Exception):
+                raise result
+            return result
+        monkeypatch.setattr(api, "generate_content", fake_generate_content)
+
+    return answer_with
+
+
+def test_answers_mentioning_errors_are_kept(gemini_answers):
+    text = "An error in a code review is normal. What part of the feedback is bothering you most?"
+    gemini_answers(SimpleNamespace(text=text))
+    reply = _reply("My code review found an error")
+    assert reply["answer"] == text
+    assert "fallback" not in reply and "unavailable" not in reply["popup_message"]
+
+
+@pytest.mark.parametrize("result, reason", [
+    (CredentialsExhausted("gemini", 30), "quota"),
+    (SchedulerBusy("LLM queue wait exceeded 30s"), "busy"),
+    (SimpleNamespace(text=""), "malformed"),
+])
+def test_model_failures_choose_the_fallback(gemini_answers, result, reason):
+    gemini_answers(result)
+    reply = _reply("How do I prepare for a job interview?")
+    assert reply["fallback"] == reason
+    assert reply["answer"] and "unavailable" in reply["popup_message"]
+
+
+def test_fallbacks_under_concurrent_faults(monkeypatch):
+    with start_fakes(FakeConfig(latency=0.01)) as fakes:
+        monkeypatch.setattr(gemini, "GEMINI_API_ENDPOINT", fakes.services["gemini"].url)
+        monkeypatch.setattr(gemini, "_clients", {})
+        # No cooldown, so every injected 429 costs exactly one answer
+        monkeypatch.setitem(_pools, "gemini", CredentialPool("gemini", ["fake-gemini-key"], quota_cooldown=0))
+        injector = faults.configure("llm:quota=0.15,timeout=0.1,malformed=0.15,partial=0.15", seed=3,
+                                    timeout_seconds=0.05)
+
+        with ThreadPoolExecutor(16) as pool:
+            replies = list(pool.map(_reply, (MESSAGES[i % len(MESSAGES)] for i in range(200))))
+
+    assert all(reply["answer"] for reply in replies)
+    served = Counter(reply.get("fallback") for reply in replies)
+    injected = injector.stats()["llm"]["injected"]
+    assert {reason: served[reason] for reason in injected} == injected
+    answered = [reply["answer"] for reply in replies if "fallback" not in reply]
+    assert answered and all(answer == GEMINI_REPLY for answer in answered)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Tests for the keyword router behind the rule-based fallback replies.
+Run with: python -m pytest test_keyword_router.py
+"""
+
+import pytest
+
+from backend.keyword_router import KeywordRouter, router
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("Hi there", "greeting"),
+    ("I have a terrible headache", "headache"),
+    ("my head pain won't stop", "headache"),
+    ("my back hurts", "pain"),
+    ("I'm so stressed about exams", "stress"),
+    ("Feeling lonely lately", "loneliness"),
+    ("hi, I can't stop panicking", "anxiety"),
+    ("I've been exercising more", "exercise"),
+])
+def test_routes_to_intent(text, intent):
+    assert router.route(text) == intent
+
+
+@pytest.mark.parametrize("text", ["this is it", "download the file", "I had grapes for lunch", ""])
+def test_whole_words_only(text):
+    assert router.route(text) is None
+
+
+def test_priority_beats_position_and_ties_go_to_table_order():
+    # pain appears first but headache is more specific
+    assert router.route("pain from a migraine") == "headache"
+    rules = [
+        {"intent": "a", "priority": 1, "keywords": ["alpha"]},
+        {"intent": "b", "priority": 1, "keywords": ["beta"]},
+    ]
+    assert KeywordRouter(rules).route("beta alpha") == "a"
+
+
+def test_respond_walks_parent_intents():
+    responses = {"anxiety": "breathe", "depression": "you matter"}
+    assert router.respond("so stressed", responses, "default") == "breathe"
+    # loneliness -> sadness -> depression
+    assert router.respond("I feel alone", responses, "default") == "you matter"
+    assert router.respond("tell me a joke", responses, "default") == "default"
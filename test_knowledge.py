@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the local knowledge base over the built-in guides.
+Run with: python -m pytest test_knowledge.py
+"""
+
+import pytest
+
+from backend.career_guidance import career_guidance
+from backend.knowledge import (
+    Document, KnowledgeIndex, career_documents, direct_answer, grounding_notes, guidance_documents,
+)
+
+GUIDES = {
+    "sleep": """🌙 **SLEEP GUIDE** 🌙
+
+**STEP 1: QUICK FIXES**
+• 4-7-8 Breathing: Inhale 4, hold 7, exhale 8
+
+**STEP 2: DAILY RULES**
+• Same bedtime every night
+• No caffeine after 2 PM""",
+    "pain": """I'm sorry you're experiencing pain.
+
+1. **Immediate Relief**:
+   - Rest the affected area
+   - Apply ice for acute injuries""",
+}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return KnowledgeIndex(guidance_documents(GUIDES) + career_documents(career_guidance))
+
+
+def test_guides_split_into_titled_sections():
+    titles = [d.title for d in guidance_documents(GUIDES)]
+    # The emoji banner and the chatty intro are not sections
+    assert titles == ["Sleep: Quick Fixes", "Sleep: Daily Rules", "Pain: Immediate Relief"]
+
+
+def test_search_ranks_the_matching_section_first(index):
+    hits = index.search("what are good resume tips?")
+    assert hits[0].document.title == "Career: Resume Tips"
+    assert [h.score for h in hits] == sorted((h.score for h in hits), reverse=True)
+    assert index.search("daily rules for sleep")[0].document.title == "Sleep: Daily Rules"
+    assert index.search("hello there") == []
+
+
+def test_direct_answer_only_for_close_matches(index):
+    hits = index.search("salary negotiation tips")
+    assert direct_answer(hits).startswith("**Career: Salary Negotiation Tips**")
+    assert direct_answer(index.search("my boss keeps asking about tips for the team party")) is None
+    assert direct_answer(hits, threshold=0) is None
+
+
+def test_grounding_notes_respect_the_token_budget(index):
+    hits = index.search("technology industry skills and salary")
+    notes = grounding_notes(hits)
+    assert notes.startswith("Relevant notes") and "Technology Industry Insights" in notes
+    assert grounding_notes(hits, budget=5) == ""
+
+
+def test_empty_index():
+    assert KnowledgeIndex([]).search("anything") == []
+    assert KnowledgeIndex([Document("Alpha", "alpha beta", "x")]).search("alpha")[0].score > 0.8
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the queued structured logger.
+Run with: python -m pytest test_logs.py
+"""
+
+import json
+import logging
+import queue
+
+import backend.logs as logs
+from backend.logs import EventLogger, JsonFormatter, _QueueHandler, begin_message
+
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_logger(name, level=logging.DEBUG):
+    logger = logging.getLogger(f"test_logs.{name}")
+    logger.setLevel(level)
+    logger.propagate = False
+    capture = Capture()
+    logger.handlers = [capture]
+    return EventLogger(logger), capture
+
+
+def test_user_content_is_redacted():
+    log, capture = make_logger("redact")
+    log.info("Answer", answer="I feel awful today", chars=18, error="x" * 500)
+    fields = capture.records[0].fields
+    assert fields["answer"] == "<18 chars>"
+    assert fields["chars"] == 18
+    assert len(fields["error"]) == logs.MAX_FIELD_CHARS + 1
+
+
+def test_debug_events_are_sampled_per_message(monkeypatch):
+    log, capture = make_logger("sample")
+    monkeypatch.setattr(logs, "LOG_DEBUG_SAMPLE_RATE", 0.0)
+    begin_message()
+    log.debug("one")
+    log.info("always")
+    monkeypatch.setattr(logs, "LOG_DEBUG_SAMPLE_RATE", 1.0)
+    # Still the same message: the decision stands
+    log.debug("two")
+    begin_message()
+    log.debug("three")
+    log.debug("four")
+    assert [r.getMessage() for r in capture.records] == ["always", "three", "four"]
+
+
+def test_levels_below_the_logger_level_cost_nothing():
+    log, capture = make_logger("levels", level=logging.WARNING)
+    log.info("skipped", text="x")
+    log.warning("kept")
+    assert [r.getMessage() for r in capture.records] == ["kept"]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = _QueueHandler(queue.Queue(2))
+    logger = logging.getLogger("test_logs.queue")
+    logger.propagate = False
+    logger.handlers = [handler]
+    for i in range(5):
+        logger.warning("event %d", i)
+    assert handler.queue.qsize() == 2 and handler.dropped == 3
+    # Messages are frozen on enqueue, formatting happens on the writer
+    assert handler.queue.get_nowait().msg == "event 0"
+
+
+def test_json_lines():
+    log, capture = make_logger("json")
+    log.warning("Crisis fast path", category="suicide", language="hi")
+    entry = json.loads(JsonFormatter().format(capture.records[0]))
+    assert entry["level"] == "warning" and entry["event"] == "Crisis fast path"
+    assert entry["category"] == "suicide" and entry["logger"] == "test_logs.json"
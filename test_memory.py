@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Memory budgets and leak checks for long sessions and repeated voice and TTS
+calls, run against the local service fakes in benchmarks/fakes.py.
+Allocations are traced with tracemalloc; a budget that is exceeded reports
+the lines that allocated the most. Run with: python -m pytest test_memory.py
+"""
+
+import gc
+import io
+import logging
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+import wave
+
+import pytest
+from flask import Flask
+
+import backend.gemini as gemini
+from backend.credentials import CredentialPool, _pools
+from backend.logs import _QueueHandler, log_stats
+from backend.session_cache import SessionCache
+from backend.session_store import HISTORY_LIMIT, SQLiteSessionStore
+from benchmarks.fakes import FakeConfig, start_fakes
+
+MESSAGES = [
+    "I've been feeling stressed about my exams and can't sleep",
+    "My manager keeps piling work on me and I feel burnt out",
+    "Can you suggest some music? I'm feeling sad today",
+    "How do I prepare for a job interview next week?",
+    "मुझे बहुत चिंता हो रही है, नींद नहीं आती",
+    "What are some ways to calm down when I feel anxious?",
+]
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _settle():
+    """Let the log writer drain its queue, so queued records do not count as kept, then collect"""
+    deadline = time.monotonic() + 5
+    while log_stats()["queued"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.01)
+    gc.collect()
+
+
+def _top_sites(before, after, limit=10):
+    stats = after.compare_to(before, "lineno")
+    return "\n".join(f"  {stat}" for stat in stats[:limit])
+
+
+class Budget:
+    """Traces `rounds` calls after a warmup and fails when they keep or peak above the budget"""
+
+    def __init__(self, retained_per_call, peak_per_call=None, rss_growth=None):
+        self.retained_per_call = retained_per_call
+        self.peak_per_call = peak_per_call
+        self.rss_growth = rss_growth
+
+    def check(self, call, rounds, warmup=20):
+        # pytest attaches its capture handlers to the backend logger for each test phase, and they
+        # keep every record; measure with only the app's own queue handler
+        logger = logging.getLogger("backend")
+        handlers = logger.handlers
+        logger.handlers = [h for h in handlers if isinstance(h, _QueueHandler)]
+        try:
+            return self._check(call, rounds, warmup)
+        finally:
+            logger.handlers = handlers
+
+    def _check(self, call, rounds, warmup):
+        for i in range(warmup):
+            call(i)
+        _settle()
+        rss_before = _rss_bytes()
+        tracemalloc.start(10)
+        try:
+            before = tracemalloc.take_snapshot()
+            start_current = tracemalloc.get_traced_memory()[0]
+            peak = 0
+            for i in range(rounds):
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                call(warmup + i)
+                peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+            _settle()
+            retained = (tracemalloc.get_traced_memory()[0] - start_current) / rounds
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        rss_after = _rss_bytes()
+
+        if retained > self.retained_per_call:
+            pytest.fail(f"{retained:.0f} bytes kept per call (budget {self.retained_per_call}); "
+                        f"top allocation sites:\n{_top_sites(before, after)}")
+        if self.peak_per_call is not None and peak > self.peak_per_call:
+            pytest.fail(f"{peak} bytes peak in one call (budget {self.peak_per_call}); "
+                        f"top allocation sites:\n{_top_sites(before, after)}")
+        if self.rss_growth is not None and rss_before is not None and rss_after - rss_before > self.rss_growth:
+            pytest.fail(f"RSS grew {(rss_after - rss_before) / 2**20:.1f} MiB over {rounds} calls "
+                        f"(ceiling {self.rss_growth / 2**20:.0f} MiB)")
+        return retained, peak
+
+
+def _wav(seconds=1.0, rate=16000):
+    frames = b"".join(int(6000 * math.sin(2 * math.pi * 220 * i / rate)).to_bytes(2, "little", signed=True)
+                      for i in range(int(seconds * rate)))
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(frames)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def fakes():
+    with start_fakes(FakeConfig()) as running:
+        yield running
+
+
+@pytest.fixture
+def api_client(tmp_path, monkeypatch, fakes):
+    import gtts.tts
+
+    from backend.api import api
+    from backend.tts import use_gtts_host
+
+    # Restored after the test; use_gtts_host replaces it
+    monkeypatch.setattr(gtts.tts, "_translate_url", gtts.tts._translate_url)
+    use_gtts_host(fakes.services["gtts"].url)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path / "tmp"))
+    os.makedirs(tempfile.tempdir)
+    monkeypatch.chdir(tmp_path)
+
+    app = Flask(__name__)
+    app.register_blueprint(api, url_prefix="/home/api")
+    return app.test_client()
+
+
+def test_long_session_stays_bounded(tmp_path, monkeypatch, fakes):
+    from backend import wbot
+
+    monkeypatch.setattr(gemini, "GEMINI_API_ENDPOINT", fakes.services["gemini"].url)
+    monkeypatch.setattr(gemini, "_clients", {})
+    monkeypatch.setitem(_pools, "gemini", CredentialPool("gemini", ["fake-gemini-key"]))
+    cache = SessionCache(SQLiteSessionStore(str(tmp_path / "sessions.db")), flush_interval=60)
+    monkeypatch.setattr(wbot, "get_session_cache", lambda: cache)
+
+    bot = wbot.GeminiBot("memory-session")
+    bot.bot("hello")  # the welcome turn
+
+    def turn(i):
+        assert "error" not in bot.bot(MESSAGES[i % len(MESSAGES)]).lower()
+        if i % 50 == 0:
+            cache.flush()
+
+    Budget(retained_per_call=512, rss_growth=32 * 2**20).check(turn, rounds=300)
+    assert len(bot.session.log) <= HISTORY_LIMIT
+    assert cache.stats()["bytes"] < 64 * 1024
+
+
+def test_session_cache_respects_its_budget(tmp_path):
+    cache = SessionCache(SQLiteSessionStore(str(tmp_path / "sessions.db")), max_bytes=256 * 1024,
+                         flush_interval=60)
+    message = "I keep thinking about everything that went wrong this week. " * 4
+
+    def session_turn(i):
+        entry = cache.get(f"user-{i % 400}")
+        cache.append(entry, [{"role": "user", "content": message}, {"role": "assistant", "content": message}])
+
+    Budget(retained_per_call=2048).check(session_turn, rounds=2000, warmup=400)
+    stats = cache.stats()
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+def test_text_to_speech_leaves_no_files_and_keeps_no_memory(api_client, fakes):
+    def speak(i):
+        response = api_client.post("/home/api/text_to_speech",
+                                   json={"text": MESSAGES[i % len(MESSAGES)][:150], "language": "en"})
+        assert response.status_code == 200 and response.mimetype == "audio/mpeg"
+        response.close()
+
+    Budget(retained_per_call=512).check(speak, rounds=200)
+    assert os.listdir(tempfile.tempdir) == []
+    assert fakes.services["gtts"].requests >= 220
+
+
+def test_voice_uploads_are_not_buffered_or_left_on_disk(api_client, tmp_path):
+    clip = _wav()
+    big = _wav(seconds=60)
+
+    def upload(i):
+        data = big if i % 10 == 0 else clip
+        response = api_client.post("/home/api/voice", data={"audio_data": (io.BytesIO(data), "clip.wav")},
+                                   content_type="multipart/form-data")
+        assert response.status_code == 200
+        response.close()
+
+    # The 2 MB clip goes through the multipart parser, which spools it to disk
+    Budget(retained_per_call=512, peak_per_call=len(big)).check(upload, rounds=100)
+    leftovers = [n for n in os.listdir(tmp_path) if n.startswith("audio_")]
+    assert leftovers == []
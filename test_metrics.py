@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the metrics layer and its Prometheus rendering.
+Run with: python -m pytest test_metrics.py
+"""
+
+import contextvars
+import threading
+
+import pytest
+
+from backend.metrics import (
+    STAGE_ERRORS, STAGE_IN_FLIGHT, STAGE_SECONDS, Histogram, label_in, metric_labels, register_collector, render,
+    span,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(("a",), value)
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="a",le="1"} 3' in lines
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{stage="a"} 4' in lines
+    assert 'test_seconds_sum{stage="a"} 4.05' in lines
+
+
+def test_spans_use_the_bound_labels():
+    with metric_labels(route="/r", channel="telegram", language="hi"):
+        with span("test_labels"):
+            assert STAGE_IN_FLIGHT.value(("test_labels",)) == 1
+    with span("test_labels", language="ta"):
+        pass
+    assert STAGE_SECONDS.count(("test_labels", "/r", "telegram", "hi")) == 1
+    assert STAGE_SECONDS.count(("test_labels", "none", "none", "ta")) == 1
+    assert STAGE_IN_FLIGHT.value(("test_labels",)) == 0
+
+
+def test_failed_spans_count_errors():
+    @span("test_errors")
+    def fail():
+        raise KeyError("x")
+
+    with pytest.raises(KeyError):
+        fail()
+    assert STAGE_ERRORS.value(("test_errors", "none", "none", "none", "KeyError")) == 1
+
+
+def test_labels_do_not_leak_between_threads():
+    seen = {}
+
+    def worker(name):
+        with metric_labels(channel=name):
+            with span(f"test_thread_{name}"):
+                pass
+        seen[name] = True
+
+    threads = [threading.Thread(target=worker, args=(name,)) for name in ("web", "whatsapp")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert STAGE_SECONDS.count(("test_thread_web", "none", "web", "none")) == 1
+    assert STAGE_SECONDS.count(("test_thread_whatsapp", "none", "whatsapp", "none")) == 1
+
+
+def test_render_includes_collectors_and_bounds_label_values():
+    register_collector(lambda: [("test_collected", "gauge", "Collected", [({"kind": "x"}, 2.5)])])
+    with metric_labels(language='bad "value"\n'):
+        with span("test_render"):
+            pass
+    text = render()
+    assert "# TYPE test_collected gauge\ntest_collected{kind=\"x\"} 2.5" in text
+    assert 'audexa_stage_seconds_count{stage="test_render",route="none",channel="none",language="other"} 1' in text
+
+
+def test_client_languages_map_to_known_codes():
+    assert label_in("hi", {"hi", "en"}) == "hi"
+    assert label_in("hi-x-1234", {"hi", "en"}) == "other"
+    assert label_in("", {"hi"}) == "none"
+
+    import backend.api as api
+    from backend import metrics
+
+    def reply_labels(lang):
+        api.generate_reply("How do I sleep better?", [api.WEB_SYSTEM_MESSAGE], lang)
+        return metrics._context.get()
+
+    # generate_reply binds its labels for the rest of the request; run it in a throwaway context
+    assert contextvars.copy_context().run(reply_labels, "ta")[2] == "ta"
+    assert contextvars.copy_context().run(reply_labels, "zz-made-up-42")[2] == "other"
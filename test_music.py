@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the music recommendation catalog.
+Run with: python -m pytest test_music.py
+"""
+
+import json
+
+import pytest
+
+from backend.music import MUSIC_DATA_VERSION, MusicCatalog, Track, get_music_catalog, load_music_data
+
+MOODS = {mood: {"heading": mood, "closing": "", "mix_note": f"for {mood}"} for mood in ("calm", "happy")}
+MIX = {"heading": "Mix", "closing": "", "moods": ["calm", "happy"]}
+
+
+def catalog(tracks):
+    return MusicCatalog(tracks, MOODS, MIX, seed=7)
+
+
+def test_data_file_loads():
+    music = get_music_catalog()
+    assert len(music) >= 30
+    assert set(music.moods) == {"uplifting", "calming", "energetic"}
+    assert music.tracks[0].spotify_url.startswith("https://open.spotify.com/track/")
+    # Tracks without ids link to a search
+    unlinked = next(t for t in music.tracks if not t.youtube)
+    assert "search_query=" in unlinked.to_dict()["youtube_url"]
+
+
+def test_other_data_versions_are_rejected(tmp_path):
+    path = tmp_path / "music.json"
+    path.write_text(json.dumps({"version": MUSIC_DATA_VERSION + 1}))
+    with pytest.raises(ValueError):
+        load_music_data(str(path))
+
+
+def test_no_repeats_until_the_session_has_heard_everything():
+    music = catalog([Track(f"c{i}", f"Calm {i}", "A", "en", "low", ["calm"]) for i in range(9)])
+    heard = [t.id for _ in range(3) for t in music.recommend("calm", session_id="s")]
+    assert len(heard) == len(set(heard)) == 9
+    # Everything heard: songs come round again instead of running dry
+    assert len(music.recommend("calm", session_id="s")) == 3
+    # Other sessions are independent
+    assert len(music.recommend("calm", session_id="other")) == 3
+
+
+def test_language_and_energy_are_preferred_then_widened():
+    music = catalog([
+        Track("hi1", "Hindi", "A", "hi", "low", ["calm"]),
+        Track("en1", "English low", "A", "en", "low", ["calm"]),
+        Track("en2", "English high", "A", "en", "high", ["calm", "happy"]),
+    ])
+    picks = music.recommend("calm", language="hi", k=2)
+    assert picks[0].id == "hi1" and len(picks) == 2
+    assert [t.id for t in music.recommend("calm", language="en", energy="high", k=1)] == ["en2"]
+    with pytest.raises(ValueError):
+        music.recommend("angry")
+
+
+def test_mix_takes_one_per_mood():
+    music = catalog([
+        Track("c", "Calm", "A", "en", "low", ["calm"]),
+        Track("h", "Happy", "A", "en", "high", ["happy"]),
+    ])
+    assert [(t.id, note) for t, note in music.mix()] == [("c", "for calm"), ("h", "for happy")]
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for opt-in request profiling.
+Run with: python -m pytest test_profiling.py
+"""
+
+import pstats
+
+import pytest
+from flask import Flask
+
+import backend.profiling as profiling
+from backend.profiling import ProfileStore, Profiler, install
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    app = Flask(__name__)
+
+    @app.route("/home/api/response")
+    def response():
+        return "ok"
+
+    profiler = install(app, Profiler(ProfileStore(str(tmp_path), max_files=3), sample_rate=0,
+                                     routes=["/home/api/response"]))
+    return app.test_client(), profiler
+
+
+def test_nothing_is_installed_unless_configured(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0.0)
+    app = Flask(__name__)
+    assert install(app) is None
+    assert not app.before_request_funcs and "profile_index" not in app.view_functions
+
+
+def test_token_profiles_one_request(client):
+    client, profiler = client
+    client.get("/home/api/response")
+    client.get("/home/api/response", headers={"X-Profile-Token": "wrong"})
+    assert profiler.profiled == 0
+
+    client.get("/home/api/response", headers={"X-Profile-Token": "secret"})
+    index = client.get("/profiles", headers={"X-Profile-Token": "secret"}).get_json()
+    assert index["profiled"] == 1
+    entry = index["profiles"][0]
+    assert entry["route"] == "home_api_response" and entry["method"] == "GET"
+
+    profile = client.get(f"/profiles/{entry['name']}", headers={"X-Profile-Token": "secret"})
+    assert profile.status_code == 200 and len(profile.data) == entry["bytes"]
+
+
+def test_profiles_are_pstats_and_bounded(client):
+    client, profiler = client
+    for _ in range(5):
+        client.get("/home/api/response", headers={"X-Profile-Token": "secret"})
+    names = [e["name"] for e in profiler.store.index()]
+    assert profiler.profiled == 5 and len(names) == 3
+    stats = pstats.Stats(profiler.store.path(names[0]))
+    assert any(func[2] == "response" for func in stats.stats)
+
+
+def test_index_needs_the_token(client):
+    client, _ = client
+    assert client.get("/profiles").status_code == 404
+    assert client.get("/profiles/../app.py", headers={"X-Profile-Token": "secret"}).status_code == 404
+
+
+def test_sampling_only_covers_listed_routes(tmp_path):
+    profiler = Profiler(ProfileStore(str(tmp_path)), sample_rate=1.0, routes=["/home/api/voice"])
+    assert profiler.wanted("/home/api/voice", None)
+    assert not profiler.wanted("/home/api/text_to_speech", None)
+
+
+def test_one_profile_at_a_time(tmp_path):
+    profiler = Profiler(ProfileStore(str(tmp_path)))
+    first = profiler.start()
+    assert first is not None and profiler.start() is None and profiler.skipped == 1
+    assert profiler.finish(first, "GET", "/x", 0.01)
+    second = profiler.start()
+    assert second is not None
+    profiler.finish(second, "GET", "/x", 0.01)
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+The private SDK attributes the app relies on. These fail when an SDK upgrade
+removes or renames one of them, instead of the app failing on its first call.
+Run with: python -m pytest test_sdk_internals.py
+"""
+
+import inspect
+
+
+def test_gemini_per_key_clients():
+    import google.generativeai as genai
+    from google.generativeai import client
+
+    # backend/gemini.py: _client_for
+    manager = client._ClientManager()
+    assert callable(manager.configure) and callable(manager.make_client)
+    # backend/gemini.py: generate_content swaps in the per-key client
+    assert hasattr(genai.GenerativeModel("gemini-2.0-flash"), "_client")
+    assert "self._client" in inspect.getsource(genai.GenerativeModel.generate_content)
+
+
+def test_gtts_host_override():
+    import gtts.tts
+
+    # backend/tts.py: use_gtts_host
+    assert list(inspect.signature(gtts.tts._translate_url).parameters) == ["tld", "path"]
+    assert "_translate_url(" in inspect.getsource(gtts.tts.gTTS)
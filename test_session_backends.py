@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the session backends and the session cache running on top of them.
+The networked backend is exercised against the in-process InMemoryKV stand-in.
+Run with: python -m pytest test_session_backends.py
+"""
+
+import os
+import tempfile
+
+import pytest
+
+from backend.kv_session_store import InMemoryKV, KeyValueSessionStore, decode_message, encode_message
+from backend.session_cache import SessionCache
+from backend.session_store import SessionConflict, SQLiteSessionStore
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def store(request):
+    if request.param == "sqlite":
+        with tempfile.TemporaryDirectory() as workdir:
+            yield SQLiteSessionStore(os.path.join(workdir, "sessions.db"))
+    else:
+        yield KeyValueSessionStore(InMemoryKV())
+
+
+def test_append_and_bounded_read(store):
+    store.create_session("u1", "en", [{"role": "assistant", "content": "welcome"}])
+    for i in range(20):
+        store.append_messages("u1", [{"role": "user", "content": f"q{i}"}])
+
+    recent = store.recent_messages("u1", limit=5)
+    assert [m["content"] for m in recent] == ["q15", "q16", "q17", "q18", "q19"]
+    assert store.get_session("u1")["message_count"] == 21
+
+
+def test_optimistic_concurrency(store):
+    store.create_session("u1", "en")
+    version = store.get_version("u1")
+    store.append_messages("u1", [{"role": "user", "content": "first"}], expected_version=version)
+
+    with pytest.raises(SessionConflict):
+        store.append_messages("u1", [{"role": "user", "content": "stale"}], expected_version=version)
+    assert [m["content"] for m in store.recent_messages("u1")] == ["first"]
+
+
+def test_compaction_keeps_newest(store):
+    store.create_session("u1", "en")
+    store.append_messages("u1", [{"role": "user", "content": str(i)} for i in range(30)])
+    store.compact("u1", keep=10)
+    assert [m["content"] for m in store.recent_messages("u1", limit=100)] == [str(i) for i in range(20, 30)]
+
+
+def test_workers_share_turns_through_kv_backend():
+    store = KeyValueSessionStore(InMemoryKV())
+    worker_a, worker_b = SessionCache(store), SessionCache(store)
+
+    session = worker_a.get("u1", "en", welcome="welcome")
+    worker_a.append(session, [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}])
+
+    # The next turn lands on another worker and must see the first one
+    session_b = worker_b.get("u1")
+    assert [m["content"] for m in session_b.log] == ["welcome", "hi", "hello"]
+    worker_b.append(session_b, [{"role": "user", "content": "again"}])
+
+    # Worker A's cached copy is now stale and must refresh on access
+    assert worker_a.get("u1").log[-1]["content"] == "again"
+
+
+def test_stale_cache_retries_after_conflict():
+    store = KeyValueSessionStore(InMemoryKV())
+    cache = SessionCache(store)
+    session = cache.get("u1", "en")
+    store.append_messages("u1", [{"role": "user", "content": "from another node"}])
+
+    cache.append(session, [{"role": "user", "content": "local"}])
+    assert cache.stats()["conflicts"] == 1
+    assert [m["content"] for m in store.recent_messages("u1")] == ["from another node", "local"]
+
+
+def test_message_encoding_is_compact_and_lossless():
+    long_message = {"role": "assistant", "content": "Take a slow breath. " * 50}
+    encoded = encode_message(long_message)
+    assert len(encoded) < len(long_message["content"]) // 4
+    assert decode_message(encoded) == long_message
+    assert decode_message(encode_message({"role": "user", "content": "नमस्ते"})) == {"role": "user", "content": "नमस्ते"}
+
+
+def _racing_kv(races):
+    """InMemoryKV where each of the first `races` metadata reads is followed by another node's write"""
+    kv = InMemoryKV()
+    get = kv.get
+
+    def racing_get(key):
+        value = get(key)
+        if key.endswith(":m") and races[0] > 0:
+            races[0] -= 1
+            with kv._lock:
+                kv._touch(key)
+        return value
+    kv.get = racing_get
+    return kv
+
+
+def test_summary_write_retries_after_a_concurrent_turn():
+    races = [0]
+    store = KeyValueSessionStore(_racing_kv(races))
+    store.create_session("u1")
+    races[0] = 2
+    store.save_summary("u1", "talked about exams", 2)
+    assert store.get_session("u1")["summary"] == "talked about exams"
+
+
+def test_summary_that_keeps_conflicting_stays_dirty():
+    races = [0]
+    store = KeyValueSessionStore(_racing_kv(races))
+    cache = SessionCache(store)
+    session = cache.get("u1", "en")
+    races[0] = 1000
+    cache.update_summary(session, "talked about exams", 2)
+    assert session.summary_dirty and store.get_session("u1")["summary"] == ""
+
+    races[0] = 0
+    cache.flush()
+    assert not session.summary_dirty and store.get_session("u1")["summary"] == "talked about exams"
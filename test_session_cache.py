@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process session cache: write-behind, eviction and validation
+against the store.
+Run with: python -m pytest test_session_cache.py
+"""
+
+import time
+
+import pytest
+
+from backend.session_cache import SessionCache
+from backend.session_store import SessionStore, SQLiteSessionStore
+
+
+class FlakyStore(SQLiteSessionStore):
+    """SQLite store whose next `failures` writes of the given kind raise"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.failures = {"save_summary": 0, "write_batch": 0}
+
+    def _maybe_fail(self, kind):
+        if self.failures[kind]:
+            self.failures[kind] -= 1
+            raise OSError(f"{kind} failed")
+
+    def save_summary(self, session_id, summary, summary_upto):
+        self._maybe_fail("save_summary")
+        super().save_summary(session_id, summary, summary_upto)
+
+    def write_batch(self, updates):
+        self._maybe_fail("write_batch")
+        return super().write_batch(updates)
+
+
+def _turn(text):
+    return [{"role": "user", "content": text}, {"role": "assistant", "content": f"re: {text}"}]
+
+
+@pytest.fixture
+def flaky(tmp_path):
+    return FlakyStore(str(tmp_path / "sessions.db"))
+
+
+def test_failed_summary_write_is_retried(flaky):
+    cache = SessionCache(flaky, flush_interval=60)
+    session = cache.get("u1", "en")
+    cache.update_summary(session, "talked about exams", 2)
+    cache.append(session, _turn("hello"))
+
+    flaky.failures["save_summary"] = 1
+    cache.flush()
+    # The messages went out even though the summary did not
+    assert [m["content"] for m in flaky.recent_messages("u1")] == ["hello", "re: hello"]
+    assert session.summary_dirty and flaky.get_session("u1")["summary"] == ""
+
+    cache.flush()
+    assert not session.dirty and flaky.get_session("u1")["summary"] == "talked about exams"
+
+
+def test_processes_sharing_one_sqlite_file_see_each_others_turns(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    worker_a = SessionCache(SQLiteSessionStore(path), flush_interval=60)
+    worker_b = SessionCache(SQLiteSessionStore(path), flush_interval=60)
+    worker_a.get("u1", "en", welcome="welcome")
+    worker_b.get("u1")
+
+    worker_a.append(worker_a.get("u1"), _turn("hi"))
+    worker_a.flush()
+    # B's cached copy is behind the stored version and is reloaded on the hit
+    assert [m["content"] for m in worker_b.get("u1").log] == ["welcome", "hi", "re: hi"]
+
+
+def test_session_store_primitives_are_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        SessionStore()
+
+    class NoSummaries(SessionStore):
+        get_session = get_version = create_session = recent_messages = write_batch = compact = None
+
+    with pytest.raises(TypeError, match="save_summary"):
+        NoSummaries()
+
+
+def test_writes_wait_for_the_flush(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    cache = SessionCache(store, flush_interval=60)
+    session = cache.get("u1", "en")
+    cache.append(session, _turn("one"))
+    cache.append(session, _turn("two"))
+    assert store.recent_messages("u1") == [] and session.dirty
+
+    assert cache.flush() == 1
+    assert [m["content"] for m in store.recent_messages("u1")] == ["one", "re: one", "two", "re: two"]
+    stats = cache.stats()
+    assert (stats["flushes"], stats["flushed_messages"], stats["dirty"]) == (1, 4, 0)
+
+
+def test_background_writer_flushes_and_close_stops_it(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    cache = SessionCache(store, flush_interval=0.01)
+    cache.start()
+    try:
+        cache.append(cache.get("u1", "en"), _turn("hello"))
+        for _ in range(200):
+            if store.recent_messages("u1"):
+                break
+            time.sleep(0.01)
+        assert len(store.recent_messages("u1")) == 2
+    finally:
+        cache.close()
+    assert cache._thread is None
+
+
+def test_idle_sessions_are_flushed_then_evicted(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    cache = SessionCache(store, idle_seconds=0, flush_interval=60)
+    cache.append(cache.get("u1", "en"), _turn("hello"))
+    assert cache.evict_idle() == 1
+    assert cache.stats()["sessions"] == 0 and len(store.recent_messages("u1")) == 2
+    # Loaded back from the store on the next turn
+    assert [m["content"] for m in cache.get("u1").log] == ["hello", "re: hello"]
+    assert cache.stats()["misses"] == 2
+
+
+def test_byte_budget_evicts_least_recently_used(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    cache = SessionCache(store, max_bytes=4096, flush_interval=60)
+    text = "x" * 400
+    for i in range(10):
+        cache.append(cache.get(f"u{i}", "en"), _turn(text))
+        assert cache.stats()["bytes"] <= cache.max_bytes
+
+    stats = cache.stats()
+    assert stats["evictions"] > 0 and 0 < stats["sessions"] < 10
+    assert "u9" in cache._sessions and "u0" not in cache._sessions
+    # Evicted sessions were written on the way out
+    assert all(len(store.recent_messages(f"u{i}")) == 2 for i in range(10) if f"u{i}" not in cache._sessions)
+
+
+def test_append_never_raises_when_the_store_fails(flaky):
+    flaky.shared = True  # write through on every append
+    cache = SessionCache(flaky, max_bytes=1024, flush_interval=60)
+    session = cache.get("u1", "en")
+
+    flaky.failures["write_batch"] = 10
+    cache.append(session, _turn("x" * 2000))
+    # Over budget, but unsaved work is kept in memory rather than dropped
+    assert session.dirty and "u1" in cache._sessions
+
+    flaky.failures["write_batch"] = 0
+    cache.flush()
+    assert len(flaky.recent_messages("u1")) == 2
+
+
+def test_dirty_sessions_are_flushed_at_exit(tmp_path, monkeypatch):
+    import backend.session_cache as session_cache
+
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    hooks = []
+    monkeypatch.setattr(session_cache, "_cache", None)
+    monkeypatch.setattr(session_cache, "get_session_store", lambda: store)
+    monkeypatch.setattr(session_cache.atexit, "register", hooks.append)
+
+    cache = session_cache.get_session_cache()
+    # Stop the background writer so only the exit hook can write
+    cache._stop.set()
+    cache.append(cache.get("u1", "en"), _turn("bye"))
+    assert hooks == [cache.close] and store.recent_messages("u1") == []
+
+    hooks[0]()
+    assert len(store.recent_messages("u1")) == 2
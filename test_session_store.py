@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite session store: versions, compaction and bounded reads.
+Run with: python -m pytest test_session_store.py
+"""
+
+import sqlite3
+
+import pytest
+
+from backend.session_store import COMPACT_KEEP, HISTORY_LIMIT, SessionConflict, SQLiteSessionStore
+
+
+def _messages(n, start=0):
+    return [{"role": "user" if i % 2 else "assistant", "content": f"m{i}"} for i in range(start, start + n)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteSessionStore(str(tmp_path / "sessions.db"))
+
+
+def test_every_write_bumps_the_version(store):
+    store.create_session("u1", "en")
+    assert store.get_version("u1") == 0
+    assert store.append_messages("u1", _messages(2)) == 1
+    store.mark_started("u1")
+    assert store.get_version("u1") == 2 and store.get_session("u1")["start"] is False
+    # The summary is derived data and never conflicts with message writes
+    store.save_summary("u1", "talked about exams", 2)
+    assert store.get_version("u1") == 2
+    assert store.get_version("missing") is None
+
+
+def test_stale_and_missing_writes_are_not_applied(store):
+    store.create_session("u1", "en", _messages(1))
+    version = store.get_version("u1")
+    assert store.write_batch([
+        ("u1", _messages(1, 1), False, version),
+        ("missing", _messages(1), False, None),
+    ]) == {"u1": version + 1, "missing": None}
+    with pytest.raises(SessionConflict):
+        store.append_messages("u1", _messages(1, 2), expected_version=version)
+    assert store.get_session("u1")["message_count"] == 2
+
+
+def test_create_session_does_not_overwrite(store):
+    store.create_session("u1", "hi", _messages(3))
+    store.create_session("u1", "en", _messages(5))
+    session = store.get_session("u1")
+    assert (session["language"], session["message_count"]) == ("hi", 3)
+
+
+def test_older_summaries_do_not_replace_newer_ones(store):
+    store.create_session("u1", "en")
+    store.save_summary("u1", "newer", 40)
+    store.save_summary("u1", "older", 20)
+    assert (store.get_session("u1")["summary"], store.get_session("u1")["summary_upto"]) == ("newer", 40)
+
+
+def test_recent_messages_limits(store):
+    store.create_session("u1", "en", _messages(HISTORY_LIMIT + 10))
+    assert len(store.recent_messages("u1")) == HISTORY_LIMIT
+    assert [m["content"] for m in store.recent_messages("u1", limit=3)] == [
+        f"m{HISTORY_LIMIT + 7}", f"m{HISTORY_LIMIT + 8}", f"m{HISTORY_LIMIT + 9}"]
+    assert len(store.recent_messages("u1", limit=1000)) == HISTORY_LIMIT + 10
+    assert store.recent_messages("u1", limit=0) == []
+    assert store.recent_messages("missing") == []
+
+
+def test_appends_compact_every_n_messages(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), compact_every=10)
+    store.create_session("u1", "en")
+    store.append_messages("u1", _messages(COMPACT_KEEP + 5))
+    # The 10th appended message was crossed, so the newest COMPACT_KEEP are left
+    recent = store.recent_messages("u1", limit=COMPACT_KEEP * 2)
+    assert len(recent) == COMPACT_KEEP and recent[0]["content"] == "m5"
+    store.append_messages("u1", _messages(3, COMPACT_KEEP + 5))
+    assert len(store.recent_messages("u1", limit=COMPACT_KEEP * 2)) == COMPACT_KEEP + 3
+    # The count keeps the whole conversation, compacted or not
+    assert store.get_session("u1")["message_count"] == COMPACT_KEEP + 8
+
+
+def test_compaction_can_be_turned_off(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), compact_every=0)
+    store.create_session("u1", "en")
+    for i in range(30):
+        store.append_messages("u1", _messages(20, i * 20))
+    assert len(store.recent_messages("u1", limit=1000)) == 600
+    assert store.compact("u1", keep=100) == 500
+
+
+def test_databases_without_summaries_are_upgraded(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE sessions (id TEXT PRIMARY KEY, language TEXT NOT NULL DEFAULT 'en',
+                    started INTEGER NOT NULL DEFAULT 1, message_count INTEGER NOT NULL DEFAULT 0,
+                    version INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, updated_at REAL NOT NULL)""")
+    conn.execute("INSERT INTO sessions (id, created_at, updated_at) VALUES ('old', 0, 0)")
+    conn.commit()
+    conn.close()
+
+    store = SQLiteSessionStore(path)
+    assert store.get_session("old")["summary"] == ""
+    store.save_summary("old", "kept", 1)
+    assert store.get_session("old")["summary"] == "kept"
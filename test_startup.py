@@ -0,0 +1,23 @@
+import os
+
+from benchmarks.startup import DEFAULT_BUDGET_SECONDS, _parse_importtime, run
+
+BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", DEFAULT_BUDGET_SECONDS))
+
+
+def test_parse_importtime():
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       120 |        120 |     backend.config\n"
+              "import time:      2000 |       2120 | app\n")
+    assert _parse_importtime(stderr) == [
+        {"module": "backend.config", "self_us": 120, "cumulative_us": 120},
+        {"module": "app", "self_us": 2000, "cumulative_us": 2120},
+    ]
+
+
+def test_cold_start_stays_within_budget():
+    report = run(runs=3, top=10)
+    slowest = ", ".join(f"{m['module']} {m['cumulative_ms']:.0f} ms" for m in report["slowest_modules"][:8])
+    assert report["lazy_loaded"] == [], f"imported at startup, expected on first use: {report['lazy_loaded']}"
+    assert report["seconds"] <= BUDGET_SECONDS, \
+        f"app took {report['seconds']:.2f}s to start (budget {BUDGET_SECONDS}s); slowest: {slowest}"
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the voice note cache, with gTTS and the Opus encoder stubbed out.
+Run with: python -m pytest test_tts.py
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from backend import tts
+from backend.audio import AudioDecodeError
+
+MP3 = b"ID3" + b"\x00" * 997
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    """Count syntheses and transcodes; every clip is a 1000-byte MP3 and a 500-byte OGG"""
+    counts = {"render": 0, "encode": 0}
+
+    def render(text, language):
+        counts["render"] += 1
+        return MP3
+
+    def encode(mp3):
+        counts["encode"] += 1
+        return b"OggS" + b"\x00" * 496
+
+    monkeypatch.setattr(tts, "_render", render)
+    monkeypatch.setattr(tts, "encode_opus", encode)
+    return counts
+
+
+def test_same_text_and_language_reuse_one_note(stubs):
+    cache = tts.VoiceNoteCache()
+    first = cache.get_or_create("Take a slow breath.", "en")
+    assert cache.get_or_create("Take a slow breath.", "en") is first
+    assert stubs == {"render": 1, "encode": 1}
+    assert cache.get_or_create("Take a slow breath.", "hi") is not first
+    # Replies are cut at MAX_VOICE_CHARS, so texts that only differ after it share a note
+    long_text = "a" * tts.MAX_VOICE_CHARS
+    assert cache.get_or_create(long_text + " one", "en") is cache.get_or_create(long_text + " two", "en")
+    assert stubs["render"] == 3
+
+
+def test_cache_stays_within_its_byte_bound(stubs):
+    cache = tts.VoiceNoteCache(max_bytes=3500)  # two 1500-byte notes
+    notes = [cache.get_or_create(f"reply {i}", "en") for i in range(3)]
+    assert cache._bytes == 3000 and len(cache._entries) == 2
+    # The least recently used note went first
+    assert cache.get(notes[0].key) is None
+    cache.get(notes[1].key)
+    cache.get_or_create("reply 3", "en")
+    assert cache.get(notes[1].key) is notes[1] and cache.get(notes[2].key) is None
+    # A single note larger than the bound is still kept, alone
+    tiny = tts.VoiceNoteCache(max_bytes=100)
+    tiny.get_or_create("reply", "en")
+    assert len(tiny._entries) == 1
+
+
+def test_mp3_is_kept_when_ffmpeg_is_missing(stubs, monkeypatch):
+    def no_ffmpeg(mp3):
+        raise AudioDecodeError("ffmpeg is not installed on the server")
+
+    monkeypatch.setattr(tts, "encode_opus", no_ffmpeg)
+    note = tts.VoiceNoteCache().get_or_create("Take a slow breath.", "en")
+    assert note.ogg is None and note.mp3 == MP3 and note.size == len(MP3)
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_voice(self, chat_id, voice, caption):
+        self.sent.append(voice)
+        return SimpleNamespace(voice=SimpleNamespace(file_id=f"file-{len(self.sent)}"))
+
+
+def test_telegram_resends_by_file_id(stubs, monkeypatch):
+    from backend import messaging
+
+    cache = tts.VoiceNoteCache()
+    monkeypatch.setattr(messaging, "voice_cache", cache)
+    bot = FakeBot()
+
+    async def send_twice():
+        for _ in range(2):
+            assert await messaging.messaging_bot.send_telegram_voice(bot, "42", "Take a slow breath.", "en")
+
+    asyncio.run(send_twice())
+    # Uploaded once as OGG, then sent by the file_id Telegram returned
+    assert bot.sent[0].startswith(b"OggS") and bot.sent[1] == "file-1"
+    assert stubs == {"render": 1, "encode": 1}